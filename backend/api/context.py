@@ -0,0 +1,145 @@
+"""
+GraphQL リクエストコンテキスト
+
+1回の GraphQL 操作で共有する DB セッションと DataLoader を持つ。
+セッションは最初に使われたときに開き、操作の終了時に DatabaseSessionExtension が閉じる。
+兄弟フィールドのリゾルバーや DataLoader は並行に実行されるため、同じ AsyncSession の
+利用はロックで直列化する（db()/read_db() のブロック内で DataLoader を待たないこと）。
+"""
+
+import asyncio
+import inspect
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import BaseContext
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField
+
+import database
+from api.loaders import SessionLoaders
+from db_metrics import current_resolver
+
+SessionFactory = Callable[[], AsyncSession]
+
+
+class GraphQLContext(BaseContext):
+    """リクエスト単位の DB セッションと DataLoader"""
+
+    def __init__(self, session_factory: Optional[SessionFactory] = None) -> None:
+        super().__init__()
+        # 指定時は読み書きともこのファクトリーを使う（テスト用）
+        self._session_factory = session_factory
+        self._sessions: Dict[str, AsyncSession] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.loaders = SessionLoaders(self)
+
+    @asynccontextmanager
+    async def db(self) -> AsyncIterator[AsyncSession]:
+        """primary のセッション（書き込み用）"""
+        factory = self._session_factory or database.SessionLocal
+        async with self._use("primary", factory) as session:
+            yield session
+
+    @asynccontextmanager
+    async def read_db(self, *sticky_keys: Optional[str]) -> AsyncIterator[AsyncSession]:
+        """読み取り用のセッション（レプリカ。直近に書き込んだキーを含むなら primary）"""
+        if self._session_factory is not None:
+            name, factory = "primary", self._session_factory
+        else:
+            factory = database.replica_router.read_session_factory(*sticky_keys)
+            name = "primary" if factory is database.SessionLocal else "replica"
+        async with self._use(name, factory) as session:
+            yield session
+
+    @asynccontextmanager
+    async def _use(
+        self, name: str, factory: SessionFactory
+    ) -> AsyncIterator[AsyncSession]:
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            session = self._sessions.get(name)
+            if session is None:
+                session = self._sessions[name] = factory()
+            try:
+                yield session
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def close(self) -> None:
+        """操作で使ったセッションを閉じる"""
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            await session.close()
+
+
+async def get_context() -> GraphQLContext:
+    """GraphQLRouter の context_getter"""
+    return GraphQLContext()
+
+
+class DatabaseSessionExtension(SchemaExtension):
+    """操作ごとに GraphQLContext を用意し、終了時に DB セッションを閉じる"""
+
+    async def on_operation(self) -> AsyncIterator[None]:  # type: ignore[override]
+        context = self.execution_context.context
+        if not isinstance(context, GraphQLContext):
+            context = self.execution_context.context = GraphQLContext()
+        try:
+            yield
+        finally:
+            await context.close()
+
+
+class ResolverMetricsExtension(SchemaExtension):
+    """非同期リゾルバーの実行中に発行した SQL を Type.field ごとに数える（db_metrics 参照）
+
+    DataLoader のバッチ取得は最初に load() したリゾルバーに計上される。
+    """
+
+    def resolve(self, _next, root, info: Info, *args: Any, **kwargs: Any) -> Any:
+        result = _next(root, info, *args, **kwargs)
+        if not inspect.isawaitable(result):
+            return result
+        return self._with_resolver(f"{info.parent_type.name}.{info.field_name}", result)
+
+    @staticmethod
+    async def _with_resolver(resolver: str, result: Awaitable[Any]) -> Any:
+        token = current_resolver.set(resolver)
+        try:
+            return await result
+        finally:
+            current_resolver.reset(token)
+
+
+def selected_fields(info: Info, field_name: Optional[str] = None) -> Set[str]:
+    """GraphQL 選択セットで選択されたフィールド名を取得
+
+    field_name 省略時は解決中のフィールド直下、指定時はその子フィールド配下を返す。
+    """
+
+    def collect(selections: List[Any], names: Set[str]) -> None:
+        for selection in selections:
+            if isinstance(selection, SelectedField):
+                names.add(selection.name)
+            else:
+                # フラグメントは展開する
+                collect(selection.selections, names)
+
+    def find(selections: List[Any]) -> Set[str]:
+        names: Set[str] = set()
+        for selection in selections:
+            if not isinstance(selection, SelectedField):
+                names |= find(selection.selections)
+            elif selection.name == field_name:
+                collect(selection.selections, names)
+        return names
+
+    children = [child for field in info.selected_fields for child in field.selections]
+    if field_name is None:
+        names: Set[str] = set()
+        collect(children, names)
+        return names
+    return find(children)
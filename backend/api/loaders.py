@@ -0,0 +1,70 @@
+"""
+GraphQL DataLoader
+
+同じ操作内の SessionType のネストしたフィールド（messages・lastMessage）を
+セッションIDごとにまとめ、1フィールドあたり1クエリで取得する（N+1 クエリの回避）。
+"""
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from strawberry.dataloader import DataLoader
+
+from config import settings  # type: ignore[attr-defined]
+from models.message import Message
+from services.session_service import MessagePreview, SessionService
+
+if TYPE_CHECKING:
+    from api.context import GraphQLContext
+
+
+class SessionLoaders:
+    """セッションIDをキーにした DataLoader（リクエストごとに作成）"""
+
+    def __init__(self, context: "GraphQLContext") -> None:
+        self._context = context
+        self._messages: Dict[Tuple[bool, bool], DataLoader[str, List[Message]]] = {}
+        self.previews: DataLoader[str, List[MessagePreview]] = DataLoader(
+            load_fn=self._load_previews
+        )
+        self.last_messages: DataLoader[str, Optional[MessagePreview]] = DataLoader(
+            load_fn=self._load_last_messages
+        )
+
+    def messages(
+        self, load_content: bool = True, load_json: bool = True
+    ) -> DataLoader[str, List[Message]]:
+        """セッションの全メッセージ（古い順）。読み込む列の組み合わせごとに分ける"""
+        key = (load_content, load_json)
+        if key not in self._messages:
+
+            async def load(session_ids: List[str]) -> List[List[Message]]:
+                async with self._context.read_db(*session_ids) as db:
+                    messages = await SessionService(db).get_messages_for_sessions(
+                        session_ids, load_content=load_content, load_json=load_json
+                    )
+                return [messages[session_id] for session_id in session_ids]
+
+            self._messages[key] = DataLoader(load_fn=load)
+        return self._messages[key]
+
+    async def _load_previews(
+        self, session_ids: List[str]
+    ) -> List[List[MessagePreview]]:
+        async with self._context.read_db(*session_ids) as db:
+            previews = await SessionService(db).get_latest_messages(
+                session_ids,
+                per_session=settings.session_preview_messages,
+                max_chars=settings.session_preview_max_chars or None,
+            )
+        return [previews[session_id] for session_id in session_ids]
+
+    async def _load_last_messages(
+        self, session_ids: List[str]
+    ) -> List[Optional[MessagePreview]]:
+        async with self._context.read_db(*session_ids) as db:
+            latest = await SessionService(db).get_latest_messages(
+                session_ids,
+                per_session=1,
+                max_chars=settings.session_preview_max_chars or None,
+            )
+        return [next(iter(latest[session_id]), None) for session_id in session_ids]
@@ -7,15 +7,16 @@ import uuid
 import json
 import base64
 from typing import Optional, List
+from strawberry.types import Info
 
 from api.types import SessionType, SessionInput, AskInput, AskPayload
-from api.types.session import UpdateSessionTitleInput
+from api.types.session import UpdateSessionTitleInput, to_session_type
 from api.types.document import UploadDocumentInput, UploadDocumentPayload
 from api.types.deep_research import DeepResearchInput, DeepResearchPayload
 from services import SessionService, RAGService
 from services.document_pipeline import DocumentPipeline
+from services.message_writer import get_message_writer
 from models.message import Message, MessageRole
-from deps import get_db
 
 
 @strawberry.type
@@ -23,117 +24,76 @@ class Mutation:
     """GraphQL Mutation"""
 
     @strawberry.mutation
-    async def create_session(self, input: SessionInput) -> SessionType:
+    async def create_session(self, info: Info, input: SessionInput) -> SessionType:
         """セッション作成"""
-        async for db in get_db():
-            session_service = SessionService(db)
-            session = await session_service.create_session(input.title)
-
-            return SessionType(
-                id=session.id,
-                title=session.title,
-                created_at=session.created_at.isoformat(),
-                updated_at=(
-                    session.updated_at.isoformat() if session.updated_at else None
-                ),
-                messages=[],
-            )
-        # Fallback for mypy
-        raise RuntimeError("Database session not available")
+        async with info.context.db() as db:
+            session = await SessionService(db).create_session(input.title)
+
+        return to_session_type(session)
 
     @strawberry.mutation
     async def update_session(
-        self, id: str, input: SessionInput
+        self, id: str, info: Info, input: SessionInput
     ) -> Optional[SessionType]:
         """セッション更新（従来版・後方互換性維持）"""
-        async for db in get_db():
-            session_service = SessionService(db)
-            session = await session_service.update_session(id, input.title)
-
-            if not session:
-                return None
-
-            return SessionType(
-                id=session.id,
-                title=session.title,
-                created_at=session.created_at.isoformat(),
-                updated_at=(
-                    session.updated_at.isoformat() if session.updated_at else None
-                ),
-                messages=[],
-            )
-        return None  # Fallback for mypy
+        async with info.context.db() as db:
+            session = await SessionService(db).update_session(id, input.title)
+
+        if not session:
+            return None
+        return to_session_type(session)
 
     @strawberry.mutation
     async def update_session_title(
-        self, id: str, input: UpdateSessionTitleInput
+        self, id: str, info: Info, input: UpdateSessionTitleInput
     ) -> Optional[SessionType]:
         """セッションタイトル更新"""
-        async for db in get_db():
-            session_service = SessionService(db)
-            session = await session_service.update_session_title(id, input.title)
-
-            if not session:
-                return None
-
-            return SessionType(
-                id=session.id,
-                title=session.title,
-                created_at=session.created_at.isoformat(),
-                updated_at=(
-                    session.updated_at.isoformat() if session.updated_at else None
-                ),
-                messages=[],
-            )
-        return None  # Fallback for mypy
+        async with info.context.db() as db:
+            session = await SessionService(db).update_session_title(id, input.title)
+
+        if not session:
+            return None
+        return to_session_type(session)
 
     @strawberry.mutation
-    async def delete_session(self, id: str) -> bool:
+    async def delete_session(self, id: str, info: Info) -> bool:
         """セッション削除"""
-        async for db in get_db():
-            session_service = SessionService(db)
-            return await session_service.delete_session(id)
-        return False  # Fallback for mypy
+        async with info.context.db() as db:
+            return await SessionService(db).delete_session(id)
 
     @strawberry.mutation
-    async def delete_multiple_sessions(self, ids: List[str]) -> int:
+    async def delete_multiple_sessions(self, ids: List[str], info: Info) -> int:
         """複数セッション一括削除"""
-        async for db in get_db():
-            session_service = SessionService(db)
-            return await session_service.delete_multiple_sessions(ids)
-        return 0  # Fallback for mypy
+        async with info.context.db() as db:
+            return await SessionService(db).delete_multiple_sessions(ids)
 
     @strawberry.mutation
-    async def ask(self, input: AskInput) -> AskPayload:
+    async def ask(self, info: Info, input: AskInput) -> AskPayload:
         """質問を送信して回答を取得"""
-        async for db in get_db():
-            rag_service = RAGService(db)
-
-            # セッションIDがあればUUIDに変換
-            session_id = None
-            if input.session_id:
-                try:
-                    session_id = uuid.UUID(input.session_id)
-                except ValueError:
-                    raise ValueError("Invalid session ID format")
+        # セッションIDがあればUUIDに変換
+        session_id = None
+        if input.session_id:
+            try:
+                session_id = uuid.UUID(input.session_id)
+            except ValueError:
+                raise ValueError("Invalid session ID format")
 
-            # 質問処理
+        async with info.context.db() as db:
+            rag_service = RAGService(db, message_writer=get_message_writer())
             result = await rag_service.ask_question(
                 question=input.question,
                 session_id=session_id,
                 deep_research=input.deep_research,
             )
 
-            # ストリーム用エンドポイントURL生成
-            stream_url = f"/graphql/stream?id={result['message_id']}"
+        # ストリーム用エンドポイントURL生成
+        stream_url = f"/graphql/stream?id={result['message_id']}"
 
-            return AskPayload(
-                session_id=result["session_id"],
-                message_id=result["message_id"],
-                stream=stream_url,
-            )
-        # Fallback for mypy
-        raise RuntimeError("Database session not available")
+        return AskPayload(
+            session_id=result["session_id"],
+            message_id=result["message_id"],
+            stream=stream_url,
+        )
 
     @strawberry.mutation
     async def upload_document(
@@ -212,23 +172,18 @@ class Mutation:
             # 研究IDを生成
             research_id = str(uuid.uuid4())
 
-            # データベース接続取得
-            async for db in get_db():
-                # ユーザーメッセージを作成・保存
-                user_message = Message(
-                    session_id=str(session_uuid),
-                    role=MessageRole.USER,
-                    content=f"🔍 Deep Research: {input.question}",
-                    citations=None,
-                    meta_data=json.dumps(
-                        {"research_id": research_id, "type": "deep_research_question"}
-                    ),
-                )
-                db.add(user_message)
-                await db.commit()
-                await db.refresh(user_message)
-
-                break
+            # ユーザーメッセージを作成・保存（セッションの更新日時も更新）
+            user_message = Message(
+                session_id=str(session_uuid),
+                role=MessageRole.USER,
+                content=f"🔍 Deep Research: {input.question}",
+                citations=None,
+                meta_data={
+                    "research_id": research_id,
+                    "type": "deep_research_question",
+                },
+            )
+            await get_message_writer().write(user_message, session_id=str(session_uuid))
 
             # ストリーム用エンドポイントURL生成
             stream_url = f"/graphql/stream/deep-research?id={research_id}"
@@ -5,16 +5,20 @@ GraphQL Query リゾルバ
 import strawberry
 import json
 import time
-from typing import List, Optional, Any
+from typing import List, Optional
 from datetime import datetime
 from dataclasses import dataclass
+from strawberry.types import Info
 
-from api.types import SessionType, MessageType, CitationType
+from api.context import selected_fields
+from api.types import SessionType, MessagePageType
 from api.types.session import (
     SessionListInput,
     SessionListResult,
+    SessionSearchHitType,
+    to_session_type,
 )
-from api.types.message import MessageRole as GraphQLMessageRole
+from api.types.message import to_message_type
 from api.types.document import (
     SearchResultType,
     SearchInput,
@@ -22,7 +26,7 @@ from api.types.document import (
     DocumentMetadataType,
 )
 from services import SessionService, RAGService
-from deps import get_db
+from config import settings  # type: ignore[attr-defined]
 
 
 @strawberry.type
@@ -44,106 +48,61 @@ class Query:
         return HealthType(status="ok", timestamp=datetime.now().isoformat())
 
     @strawberry.field
-    async def sessions(self, include_messages: bool = False) -> List[SessionType]:
+    async def sessions(
+        self, info: Info, include_messages: bool = False
+    ) -> List[SessionType]:
         """セッション一覧取得（従来版・後方互換性維持）"""
-        async for db in get_db():
-            session_service = SessionService(db)
-
-            if include_messages:
-                # メッセージも含めて取得（より重い操作）
-                sessions = await session_service.get_sessions_with_messages()
-
-                return [
-                    SessionType(
-                        id=session.id,
-                        title=session.title,
-                        created_at=session.created_at.isoformat(),
-                        updated_at=(
-                            session.updated_at.isoformat()
-                            if session.updated_at
-                            else None
-                        ),
-                        messages=[
-                            MessageType(
-                                id=msg.id,
-                                session_id=session.id,
-                                role=GraphQLMessageRole(msg.role.value),
-                                content=msg.content,
-                                created_at=msg.created_at.isoformat(),
-                                citations=Query._parse_citations(msg.citations),
-                                meta_data=Query._parse_metadata(msg.meta_data),
-                            )
-                            for msg in session.messages[
-                                :3
-                            ]  # 最新3件のみ（パフォーマンス改善）
-                        ],
-                    )
-                    for session in sessions
-                ]
-            else:
-                # 軽量版: メッセージは含めない（デフォルト動作維持）
-                sessions = await session_service.get_sessions()
-
-                return [
-                    SessionType(
-                        id=session.id,
-                        title=session.title,
-                        created_at=session.created_at.isoformat(),
-                        updated_at=(
-                            session.updated_at.isoformat()
-                            if session.updated_at
-                            else None
-                        ),
-                        messages=[],
-                    )
-                    for session in sessions
-                ]
-        return []  # Fallback return for mypy
+        async with info.context.read_db() as db:
+            sessions = await SessionService(db).get_sessions()
+
+        # メッセージは選択時に各セッションの最新分のみをまとめて取得（重い本文は切り詰め）
+        message_mode = "preview" if include_messages else None
+        return [to_session_type(session, message_mode) for session in sessions]
 
     @strawberry.field
-    async def sessions_filtered(self, input: SessionListInput) -> SessionListResult:
+    async def sessions_filtered(
+        self, info: Info, input: SessionListInput
+    ) -> SessionListResult:
         """フィルタリング・ソート機能付きセッション一覧取得"""
-        async for db in get_db():
-            session_service = SessionService(db)
-
-            # 入力パラメータを解析
-            search_query = None
-            created_after = None
-            created_before = None
-            has_messages = None
-
-            if input.filter:
-                search_query = input.filter.search_query
-
-                # 日時文字列をdatetimeに変換
-                if input.filter.created_after:
-                    try:
-                        created_after = datetime.fromisoformat(
-                            input.filter.created_after.replace("Z", "+00:00")
-                        )
-                    except ValueError:
-                        pass
-
-                if input.filter.created_before:
-                    try:
-                        created_before = datetime.fromisoformat(
-                            input.filter.created_before.replace("Z", "+00:00")
-                        )
-                    except ValueError:
-                        pass
-
-                has_messages = input.filter.has_messages
-
-            # ソート設定
-            sort_field = "created_at"
-            sort_order = "desc"
-
-            if input.sort:
-                sort_field = input.sort.field.value
-                sort_order = input.sort.order.value
-
-            # フィルタリング実行
-            result = await session_service.get_sessions_filtered(
+        # 入力パラメータを解析
+        search_query = None
+        created_after = None
+        created_before = None
+        has_messages = None
+
+        if input.filter:
+            search_query = input.filter.search_query
+
+            # 日時文字列をdatetimeに変換
+            if input.filter.created_after:
+                try:
+                    created_after = datetime.fromisoformat(
+                        input.filter.created_after.replace("Z", "+00:00")
+                    )
+                except ValueError:
+                    pass
+
+            if input.filter.created_before:
+                try:
+                    created_before = datetime.fromisoformat(
+                        input.filter.created_before.replace("Z", "+00:00")
+                    )
+                except ValueError:
+                    pass
+
+            has_messages = input.filter.has_messages
+
+        # ソート設定
+        sort_field = "created_at"
+        sort_order = "desc"
+
+        if input.sort:
+            sort_field = input.sort.field.value
+            sort_order = input.sort.order.value
+
+        # フィルタリング実行
+        async with info.context.read_db() as db:
+            result = await SessionService(db).get_sessions_filtered(
                 search_query=search_query,
                 created_after=created_after,
                 created_before=created_before,
@@ -153,117 +112,98 @@ class Query:
                 limit=input.limit,
                 offset=input.offset,
                 include_messages=input.include_messages,
+                after=input.after,
+                include_total_count=input.include_total_count,
             )
 
-            # GraphQL型に変換
-            session_types = []
-            for session in result["sessions"]:
-                messages = []
-                if input.include_messages and hasattr(session, "messages"):
-                    messages = [
-                        MessageType(
-                            id=msg.id,
-                            session_id=session.id,
-                            role=GraphQLMessageRole(msg.role.value),
-                            content=msg.content,
-                            created_at=msg.created_at.isoformat(),
-                            citations=Query._parse_citations(msg.citations),
-                            meta_data=Query._parse_metadata(msg.meta_data),
-                        )
-                        for msg in session.messages[
-                            :3
-                        ]  # 最新3件まで（パフォーマンス改善）
-                    ]
-
-                session_types.append(
-                    SessionType(
-                        id=session.id,
-                        title=session.title,
-                        created_at=session.created_at.isoformat(),
-                        updated_at=(
-                            session.updated_at.isoformat()
-                            if session.updated_at
-                            else None
-                        ),
-                        messages=messages,
-                    )
-                )
-
-            return SessionListResult(
-                sessions=session_types,
-                total_count=result["total_count"],
-                has_more=result["has_more"],
-            )
-
-        # Fallback return for mypy
+        # GraphQL型に変換
+        message_mode = "preview" if input.include_messages else None
         return SessionListResult(
-            sessions=[],
-            total_count=0,
-            has_more=False,
+            sessions=[
+                to_session_type(session, message_mode) for session in result["sessions"]
+            ],
+            total_count=result["total_count"],
+            has_more=result["has_more"],
+            next_cursor=result["next_cursor"],
         )
 
     @strawberry.field
-    async def search_sessions(self, query: str, limit: int = 20) -> List[SessionType]:
+    async def search_sessions(
+        self, info: Info, query: str, limit: int = 20
+    ) -> List[SessionType]:
         """セッション検索（簡易版）"""
-        async for db in get_db():
-            session_service = SessionService(db)
-            sessions = await session_service.search_sessions(query, limit)
-
-            return [
-                SessionType(
-                    id=session.id,
-                    title=session.title,
-                    created_at=session.created_at.isoformat(),
-                    updated_at=(
-                        session.updated_at.isoformat() if session.updated_at else None
-                    ),
-                    messages=[],
-                )
-                for session in sessions
-            ]
-        return []  # Fallback return for mypy
+        async with info.context.read_db() as db:
+            sessions = await SessionService(db).search_sessions(query, limit)
+
+        return [to_session_type(session) for session in sessions]
 
     @strawberry.field
-    async def session(self, id: str) -> Optional[SessionType]:
-        """セッション詳細取得"""
-        async for db in get_db():
-            session_service = SessionService(db)
-            session = await session_service.get_session_with_messages(id)
-
-            if not session:
-                return None
-
-            # メッセージをGraphQL型に変換
-            messages = [
-                MessageType(
-                    id=msg.id,
-                    session_id=session.id,
-                    role=GraphQLMessageRole(msg.role.value),
-                    content=msg.content,
-                    created_at=msg.created_at.isoformat(),
-                    citations=Query._parse_citations(msg.citations),
-                    meta_data=Query._parse_metadata(msg.meta_data),
-                )
-                for msg in session.messages
-            ]
-
-            return SessionType(
-                id=session.id,
-                title=session.title,
-                created_at=session.created_at.isoformat(),
-                updated_at=(
-                    session.updated_at.isoformat() if session.updated_at else None
-                ),
-                messages=messages,
+    async def search_messages(
+        self, info: Info, query: str, limit: int = 20
+    ) -> List[SessionSearchHitType]:
+        """セッション・メッセージ全文検索（一致度順・スニペット付き）"""
+        async with info.context.read_db() as db:
+            hits = await SessionService(db).search_messages(query, limit)
+
+        return [
+            SessionSearchHitType(
+                session_id=hit.session_id,
+                session_title=hit.session_title,
+                message_id=hit.message_id,
+                snippet=hit.snippet,
+                score=hit.score,
             )
-        return None  # Fallback return for mypy
+            for hit in hits
+        ]
+
+    @strawberry.field
+    async def session(self, id: str, info: Info) -> Optional[SessionType]:
+        """セッション詳細取得（messages は選択時に全件を取得）"""
+        async with info.context.read_db(id) as db:
+            session = await SessionService(db).get_session(id)
+
+        if not session:
+            return None
+        return to_session_type(session, message_mode="all")
 
     @strawberry.field
-    async def search_documents(self, input: SearchInput) -> SearchResultType:
+    async def session_messages(
+        self,
+        session_id: str,
+        info: Info,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> MessagePageType:
+        """セッションのメッセージを新しい順にページング取得
+
+        limit は 1〜SESSION_MESSAGE_PAGE_SIZE に丸める（未指定時は上限値）。
+        """
+        page_size = settings.session_message_page_size
+        limit = page_size if limit is None else min(max(limit, 1), page_size)
+        fields = selected_fields(info, "messages")
+        async with info.context.read_db(session_id) as db:
+            page = await SessionService(db).get_session_messages(
+                session_id,
+                limit=limit,
+                after=after,
+                load_content="content" in fields,
+                load_json=bool(fields & {"citations", "metaData"}),
+            )
+
+        return MessagePageType(
+            messages=[to_message_type(msg, fields) for msg in page["messages"]],
+            has_more=page["has_more"],
+            next_cursor=page["next_cursor"],
+        )
+
+    @strawberry.field
+    async def search_documents(
+        self, info: Info, input: SearchInput
+    ) -> SearchResultType:
         """ドキュメント検索"""
         start_time = time.time()
 
-        async for db in get_db():
+        async with info.context.read_db() as db:
             rag_service = RAGService(db)
 
             # フィルタをJSONから辞書に変換
@@ -311,45 +251,3 @@ class Query:
                 documents=documents,
                 execution_time_ms=execution_time_ms,
             )
-
-        # Fallback return for mypy
-        return SearchResultType(
-            query=input.query,
-            total_count=0,
-            documents=[],
-            execution_time_ms=0,
-        )
-
-    @staticmethod
-    def _parse_citations(citations_json: Optional[str]) -> List[CitationType]:
-        """引用情報JSONを構造化データに変換"""
-        if not citations_json:
-            return []
-
-        try:
-            citations_data = json.loads(citations_json)
-            return [
-                CitationType(
-                    id=citation.get("id", idx + 1),  # idフィールドを追加
-                    title=citation.get("title", ""),
-                    content=citation.get("content", ""),  # contentフィールドを追加
-                    url=citation.get("url", ""),
-                    source=citation.get("source", ""),
-                    score=citation.get("score", 0.0),
-                )
-                for idx, citation in enumerate(citations_data)
-                if isinstance(citation, dict)
-            ]
-        except (json.JSONDecodeError, AttributeError):
-            return []
-
-    @staticmethod
-    def _parse_metadata(metadata_json: Optional[str]) -> Any:
-        """メタデータJSONを構造化データに変換"""
-        if not metadata_json:
-            return None
-
-        try:
-            return json.loads(metadata_json)
-        except json.JSONDecodeError:
-            return None
@@ -6,9 +6,10 @@ import strawberry
 import uuid
 from typing import AsyncGenerator, Optional
 from dataclasses import dataclass
-import json
 
 from services import RAGService
+from services.message_writer import get_message_writer
+from services.stream_shaper import shape_stream
 from services.deep_research import DeepResearchLangGraphAgent
 from models.message import Message, MessageRole
 from deps import get_db
@@ -51,7 +52,7 @@ class Subscription:
     ) -> AsyncGenerator[StreamChunk, None]:
         """ストリーミング回答"""
         async for db in get_db():
-            rag_service = RAGService(db)
+            rag_service = RAGService(db, message_writer=get_message_writer())
 
             # セッションIDがあればUUIDに変換
             session_uuid = None
@@ -66,12 +67,14 @@ class Subscription:
                     )
                     return
 
-            # ストリーミング処理
+            # ストリーミング処理（差分を時間・サイズで結合して送信回数を削減）
             try:
-                async for chunk in rag_service.stream_answer(
-                    question=question,
-                    session_id=session_uuid,
-                    deep_research=deep_research,
+                async for chunk in shape_stream(
+                    rag_service.stream_answer(
+                        question=question,
+                        session_id=session_uuid,
+                        deep_research=deep_research,
+                    )
                 ):
                     if "error" in chunk:
                         yield StreamChunk(
@@ -197,25 +200,21 @@ class Subscription:
                     # 最終レポートをアシスタントメッセージとして保存
                     if final_report:
                         try:
-                            async for db in get_db():
-                                # アシスタントメッセージを作成・保存
-                                assistant_message = Message(
-                                    session_id=str(session_uuid),
-                                    role=MessageRole.ASSISTANT,
-                                    content=final_report,
-                                    citations=None,
-                                    meta_data=json.dumps(
-                                        {
-                                            "research_id": research_id,
-                                            "type": "deep_research_report",
-                                        }
-                                    ),
-                                )
-                                db.add(assistant_message)
-                                await db.commit()
-                                await db.refresh(assistant_message)
-                                print("✅ Deep Research report saved to database")
-                                break
+                            # アシスタントメッセージを作成・保存
+                            assistant_message = Message(
+                                session_id=str(session_uuid),
+                                role=MessageRole.ASSISTANT,
+                                content=final_report,
+                                citations=None,
+                                meta_data={
+                                    "research_id": research_id,
+                                    "type": "deep_research_report",
+                                },
+                            )
+                            await get_message_writer().write(
+                                assistant_message, session_id=str(session_uuid)
+                            )
+                            print("✅ Deep Research report saved to database")
                         except Exception as save_error:
                             print(
                                 f"❌ Failed to save Deep Research report: {str(save_error)}"
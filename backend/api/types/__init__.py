@@ -3,12 +3,13 @@ GraphQL型定義
 """
 
 from .ask import AskInput, AskPayload
-from .message import MessageType, MessageRole, CitationType
+from .message import MessageType, MessagePageType, MessageRole, CitationType
 from .session import (
     SessionType,
     SessionInput,
     SessionListInput,
     SessionListResult,
+    SessionSearchHitType,
     SessionFilterInput,
     SessionSortInput,
     SessionSortField,
@@ -27,12 +28,14 @@ __all__ = [
     "AskInput",
     "AskPayload",
     "MessageType",
+    "MessagePageType",
     "MessageRole",
     "CitationType",
     "SessionType",
     "SessionInput",
     "SessionListInput",
     "SessionListResult",
+    "SessionSearchHitType",
     "SessionFilterInput",
     "SessionSortInput",
     "SessionSortField",
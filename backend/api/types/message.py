@@ -3,7 +3,8 @@
 """
 
 import strawberry
-from typing import Optional, List
+import json
+from typing import Any, Optional, List, Set
 from dataclasses import dataclass
 import enum
 
@@ -43,6 +44,16 @@ class MessageType:
     created_at: str
 
 
+@strawberry.type
+@dataclass
+class MessagePageType:
+    """メッセージのページ型（新しい順）"""
+
+    messages: List[MessageType]
+    has_more: bool
+    next_cursor: Optional[str] = None  # 次ページ取得用カーソル
+
+
 @strawberry.input
 class MessageInput:
     """メッセージ作成入力"""
@@ -52,3 +63,59 @@ class MessageInput:
     content: str
     citations: Optional[str] = None  # JSON文字列として受け取り
     meta_data: Optional[str] = None  # JSON文字列として受け取り
+
+
+def parse_citations(citations: Any) -> List[CitationType]:
+    """引用情報（JSON列の値、旧形式のJSON文字列も可）を構造化データに変換"""
+    if not citations:
+        return []
+
+    try:
+        # JSON列は読み込み時に復元済み。旧形式の文字列のみパースする
+        citations_data = (
+            json.loads(citations) if isinstance(citations, str) else citations
+        )
+        return [
+            CitationType(
+                id=citation.get("id", idx + 1),  # idフィールドを追加
+                title=citation.get("title", ""),
+                content=citation.get("content", ""),  # contentフィールドを追加
+                url=citation.get("url", ""),
+                source=citation.get("source", ""),
+                score=citation.get("score", 0.0),
+            )
+            for idx, citation in enumerate(citations_data)
+            if isinstance(citation, dict)
+        ]
+    except (json.JSONDecodeError, AttributeError, TypeError):
+        return []
+
+
+def parse_metadata(metadata: Any) -> Any:
+    """メタデータ（JSON列の値、旧形式のJSON文字列も可）を構造化データに変換"""
+    if not metadata:
+        return None
+    if not isinstance(metadata, str):
+        return metadata
+
+    try:
+        return json.loads(metadata)
+    except json.JSONDecodeError:
+        return None
+
+
+def to_message_type(msg: Any, fields: Optional[Set[str]] = None) -> MessageType:
+    """メッセージをGraphQL型に変換（fields 指定時、未選択の本文・JSON は参照しない）"""
+
+    def selected(name: str) -> bool:
+        return fields is None or name in fields
+
+    return MessageType(
+        id=msg.id,
+        session_id=msg.session_id,
+        role=MessageRole(msg.role.value),
+        content=msg.content if selected("content") else "",
+        created_at=msg.created_at.isoformat(),
+        citations=parse_citations(msg.citations) if selected("citations") else [],
+        meta_data=parse_metadata(msg.meta_data) if selected("metaData") else None,
+    )
@@ -3,23 +3,70 @@
 """
 
 import strawberry
-from typing import List, Optional
+from typing import Any, List, Optional
 from dataclasses import dataclass
 from enum import Enum
+from strawberry.types import Info
 
-from .message import MessageType
+from api.context import selected_fields
+from .message import MessageType, to_message_type
 
 
 @strawberry.type
-@dataclass
 class SessionType:
-    """セッション型"""
+    """セッション型
+
+    messages・lastMessage は選択されたときだけ、
+    同じ操作内のセッション分を DataLoader でまとめて取得する。
+    messageCount・lastMessageAt は sessions の集計列から返す。
+    """
 
     id: str
     title: str
     created_at: str
     updated_at: Optional[str] = None
-    messages: List[MessageType] = strawberry.field(default_factory=list)
+    message_count: int = 0
+    last_message_at: Optional[str] = None  # メッセージがなければ作成日時
+    # messages の内容（None: 返さない, "preview": 最新の抜粋, "all": 全件）
+    message_mode: strawberry.Private[Optional[str]] = None
+
+    @strawberry.field
+    async def messages(self, info: Info) -> List[MessageType]:
+        """メッセージ（古い順）"""
+        loaders = info.context.loaders
+        if self.message_mode == "preview":
+            previews = await loaders.previews.load(self.id)
+            return [to_message_type(msg) for msg in previews]
+        if self.message_mode == "all":
+            # 選択されたフィールドの列だけを読み込む（本文・JSON は要求時のみ）
+            fields = selected_fields(info)
+            messages = await loaders.messages(
+                load_content="content" in fields,
+                load_json=bool(fields & {"citations", "metaData"}),
+            ).load(self.id)
+            return [to_message_type(msg, fields) for msg in messages]
+        return []
+
+    @strawberry.field
+    async def last_message(self, info: Info) -> Optional[MessageType]:
+        """最新のメッセージ（本文は一覧用に切り詰め）"""
+        message = await info.context.loaders.last_messages.load(self.id)
+        return to_message_type(message) if message is not None else None
+
+
+def to_session_type(session: Any, message_mode: Optional[str] = None) -> SessionType:
+    """セッションをGraphQL型に変換（メッセージ類は選択時に DataLoader で取得）"""
+    return SessionType(
+        id=session.id,
+        title=session.title,
+        created_at=session.created_at.isoformat(),
+        updated_at=session.updated_at.isoformat() if session.updated_at else None,
+        message_count=session.message_count or 0,
+        last_message_at=(
+            session.last_message_at.isoformat() if session.last_message_at else None
+        ),
+        message_mode=message_mode,
+    )
 
 
 @strawberry.input
@@ -35,6 +82,8 @@ class SessionSortField(Enum):
 
     CREATED_AT = "created_at"
     UPDATED_AT = "updated_at"
+    LAST_MESSAGE_AT = "last_message_at"
+    MESSAGE_COUNT = "message_count"
     TITLE = "title"
 
 
@@ -72,7 +121,9 @@ class SessionListInput:
     sort: Optional[SessionSortInput] = None
     limit: Optional[int] = None  # 取得件数制限
     offset: Optional[int] = None  # オフセット（ページネーション用）
+    after: Optional[str] = None  # 前ページの next_cursor（キーセットページング）
     include_messages: bool = False  # メッセージを含めるかどうか
+    include_total_count: bool = True  # 総件数を数えるかどうか
 
 
 @strawberry.input
@@ -88,5 +139,18 @@ class SessionListResult:
     """セッション一覧結果型"""
 
     sessions: List[SessionType]
-    total_count: int
+    total_count: Optional[int]  # include_total_count=false のとき null
     has_more: bool
+    next_cursor: Optional[str] = None  # 次ページ取得用カーソル
+
+
+@strawberry.type
+@dataclass
+class SessionSearchHitType:
+    """セッション・メッセージ検索結果型"""
+
+    session_id: str
+    session_title: str
+    message_id: Optional[str]  # null のときはタイトル一致
+    snippet: str  # 一致箇所を <mark> で囲んだ抜粋
+    score: float
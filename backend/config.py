@@ -54,6 +54,16 @@ class Settings(BaseSettings):
         description="データベース接続URL",
         alias="DATABASE_URL",
     )
+    database_read_replica_urls: str = Field(
+        default="",
+        description="読み取りレプリカの接続URL（カンマ区切り）",
+        alias="DATABASE_READ_REPLICA_URLS",
+    )
+    database_replica_sticky_seconds: float = Field(
+        default=5.0,
+        description="書き込み後に同じセッションを primary から読む時間（秒）",
+        alias="DATABASE_REPLICA_STICKY_SECONDS",
+    )
     db_pool_size: int = Field(
         default=10, description="データベース接続プールサイズ", alias="DB_POOL_SIZE"
     )
@@ -63,6 +73,11 @@ class Settings(BaseSettings):
     db_pool_timeout: int = Field(
         default=30, description="接続タイムアウト", alias="DB_POOL_TIMEOUT"
     )
+    db_slow_query_seconds: float = Field(
+        default=0.5,
+        description="この秒数以上かかった SQL を警告ログに出す（0 以下で無効）",
+        alias="DB_SLOW_QUERY_SECONDS",
+    )
     sql_debug: bool = Field(
         default=False, description="SQLデバッグ出力", alias="SQL_DEBUG"
     )
@@ -86,11 +101,174 @@ class Settings(BaseSettings):
     llm_max_retries: int = Field(
         default=3, description="最大リトライ回数", alias="LLM_MAX_RETRIES"
     )
+    llm_retry_base_delay: float = Field(
+        default=0.5,
+        description="リトライ初回待機時間（秒、指数バックオフの基準）",
+        alias="LLM_RETRY_BASE_DELAY",
+    )
+    llm_retry_max_delay: float = Field(
+        default=8.0,
+        description="リトライ1回あたりの最大待機時間（秒）",
+        alias="LLM_RETRY_MAX_DELAY",
+    )
+    llm_retry_budget: float = Field(
+        default=20.0,
+        description="1リクエストあたりのリトライ総待機時間の上限（秒）",
+        alias="LLM_RETRY_BUDGET",
+    )
     llm_rate_limit_per_minute: int = Field(
         default=60,
         description="1分あたりのレート制限",
         alias="LLM_RATE_LIMIT_PER_MINUTE",
     )
+    llm_token_rate_limit_per_minute: int = Field(
+        default=0,
+        description="1分あたりのトークン数制限（0で無効）",
+        alias="LLM_TOKEN_RATE_LIMIT_PER_MINUTE",
+    )
+    llm_rate_limit_burst: int = Field(
+        default=10,
+        description="レート制限のバースト許容リクエスト数",
+        alias="LLM_RATE_LIMIT_BURST",
+    )
+    llm_rate_limit_max_wait: float = Field(
+        default=30.0,
+        description="レート制限の最大待機時間（秒）",
+        alias="LLM_RATE_LIMIT_MAX_WAIT",
+    )
+    llm_connect_timeout: float = Field(
+        default=5.0, description="LLM接続タイムアウト（秒）", alias="LLM_CONNECT_TIMEOUT"
+    )
+    llm_stream_read_timeout: float = Field(
+        default=30.0,
+        description="ストリーミング時のチャンク間読み取りタイムアウト（秒）",
+        alias="LLM_STREAM_READ_TIMEOUT",
+    )
+    llm_stream_batch_chars: int = Field(
+        default=32,
+        description="ストリーミング差分をまとめて送出する文字数",
+        alias="LLM_STREAM_BATCH_CHARS",
+    )
+    llm_stream_batch_interval: float = Field(
+        default=0.03,
+        description="ストリーミング差分をまとめる最大時間（秒）",
+        alias="LLM_STREAM_BATCH_INTERVAL",
+    )
+    llm_prompt_cache_enabled: bool = Field(
+        default=True,
+        description="対応モデルで安定プロンプトプレフィックスにキャッシュ制御ヒントを付与",
+        alias="LLM_PROMPT_CACHE_ENABLED",
+    )
+    llm_tokenizer: str = Field(
+        default="auto",
+        description="トークン数カウントに使うトークナイザー（auto/tiktoken/heuristic）",
+        alias="LLM_TOKENIZER",
+    )
+    llm_session_token_budget: int = Field(
+        default=0,
+        description="セッションあたりの累計トークン上限（0で無制限）",
+        alias="LLM_SESSION_TOKEN_BUDGET",
+    )
+    llm_batch_concurrency: int = Field(
+        default=8,
+        description="バッチ生成の最大並列数",
+        alias="LLM_BATCH_CONCURRENCY",
+    )
+    llm_record_path: str = Field(
+        default="",
+        description="実プロバイダーの応答をタイミング込みで記録するカセットファイル（空で無効）",
+        alias="LLM_RECORD_PATH",
+    )
+    llm_replay_path: str = Field(
+        default="",
+        description="replay プロバイダーが再生するカセットファイル",
+        alias="LLM_REPLAY_PATH",
+    )
+    llm_replay_time_scale: float = Field(
+        default=1.0,
+        description="再生時の待機時間の倍率（0で待機なし）",
+        alias="LLM_REPLAY_TIME_SCALE",
+    )
+    llm_max_connections: int = Field(
+        default=100,
+        description="上流ホストごとの最大接続数",
+        alias="LLM_MAX_CONNECTIONS",
+    )
+    llm_max_keepalive_connections: int = Field(
+        default=20,
+        description="上流ホストごとのKeep-Alive接続数",
+        alias="LLM_MAX_KEEPALIVE_CONNECTIONS",
+    )
+    llm_keepalive_expiry: float = Field(
+        default=30.0,
+        description="Keep-Alive接続の保持時間（秒）",
+        alias="LLM_KEEPALIVE_EXPIRY",
+    )
+    llm_http2: bool = Field(
+        default=True,
+        description="HTTP/2を使用（h2インストール時のみ有効）",
+        alias="LLM_HTTP2",
+    )
+    llm_circuit_failure_threshold: float = Field(
+        default=0.5,
+        description="サーキットを開く失敗率（エラー・低速応答の割合）",
+        alias="LLM_CIRCUIT_FAILURE_THRESHOLD",
+    )
+    llm_circuit_window_size: int = Field(
+        default=20,
+        description="失敗率を集計する直近の呼び出し数",
+        alias="LLM_CIRCUIT_WINDOW_SIZE",
+    )
+    llm_circuit_min_calls: int = Field(
+        default=5,
+        description="失敗率を判定する最小呼び出し数",
+        alias="LLM_CIRCUIT_MIN_CALLS",
+    )
+    llm_circuit_open_seconds: float = Field(
+        default=30.0,
+        description="サーキットを開いてから再試行するまでの時間（秒）",
+        alias="LLM_CIRCUIT_OPEN_SECONDS",
+    )
+    llm_circuit_slow_call_seconds: float = Field(
+        default=20.0,
+        description="低速応答とみなす初回応答までの時間（秒、ストリーミングのみ判定）",
+        alias="LLM_CIRCUIT_SLOW_CALL_SECONDS",
+    )
+    llm_routing_preference: str = Field(
+        default="",
+        description="レイテンシ順に並べ替えるプロバイダー（カンマ区切り、空で優先順位固定）",
+        alias="LLM_ROUTING_PREFERENCE",
+    )
+    llm_latency_ewma_alpha: float = Field(
+        default=0.2,
+        description="TTFT・スループットの指数移動平均の平滑化係数",
+        alias="LLM_LATENCY_EWMA_ALPHA",
+    )
+    llm_hedging_enabled: bool = Field(
+        default=False,
+        description="初回トークンが遅い場合に次のプロバイダーへ並行リクエスト",
+        alias="LLM_HEDGING_ENABLED",
+    )
+    llm_hedge_min_delay: float = Field(
+        default=0.25,
+        description="ヘッジ要求を送るまでの最小待機時間（秒）",
+        alias="LLM_HEDGE_MIN_DELAY",
+    )
+    llm_hedge_min_samples: int = Field(
+        default=10,
+        description="ヘッジ判定（p95 TTFT）に必要な最小サンプル数",
+        alias="LLM_HEDGE_MIN_SAMPLES",
+    )
+    llm_health_check_interval: float = Field(
+        default=30.0,
+        description="プロバイダーのバックグラウンドヘルスチェック間隔（秒）",
+        alias="LLM_HEALTH_CHECK_INTERVAL",
+    )
+    llm_health_check_timeout: float = Field(
+        default=5.0,
+        description="ヘルスチェック1回あたりのタイムアウト（秒）",
+        alias="LLM_HEALTH_CHECK_TIMEOUT",
+    )
 
     # =============================================================================
     # API Keys
@@ -232,6 +410,141 @@ class Settings(BaseSettings):
     cache_max_size: int = Field(
         default=1000, description="キャッシュ最大サイズ", alias="CACHE_MAX_SIZE"
     )
+    session_count_cache_ttl_seconds: int = Field(
+        default=30,
+        description="セッション一覧の総件数キャッシュTTL（秒、0で無効）",
+        alias="SESSION_COUNT_CACHE_TTL_SECONDS",
+    )
+    session_preview_messages: int = Field(
+        default=3,
+        description="セッション一覧に含める最新メッセージ数",
+        alias="SESSION_PREVIEW_MESSAGES",
+    )
+    session_preview_max_chars: int = Field(
+        default=300,
+        description="セッション一覧のメッセージ本文の最大文字数（0で切り詰めない）",
+        alias="SESSION_PREVIEW_MAX_CHARS",
+    )
+    session_message_page_size: int = Field(
+        default=50,
+        description="セッションのメッセージ取得時の1ページあたりの件数",
+        alias="SESSION_MESSAGE_PAGE_SIZE",
+    )
+    session_delete_batch_size: int = Field(
+        default=1000,
+        description="セッション一括削除の1バッチあたりの件数",
+        alias="SESSION_DELETE_BATCH_SIZE",
+    )
+
+    # =============================================================================
+    # メッセージ書き込み（ライトビハインド）設定
+    # =============================================================================
+    message_write_behind_enabled: bool = Field(
+        default=True,
+        description="メッセージ保存とセッション更新日時をまとめてコミットする",
+        alias="MESSAGE_WRITE_BEHIND_ENABLED",
+    )
+    message_flush_interval: float = Field(
+        default=0.02,
+        description="書き込みをまとめる最大待ち時間（秒）",
+        alias="MESSAGE_FLUSH_INTERVAL",
+    )
+    message_flush_max_batch: int = Field(
+        default=100,
+        description="1トランザクションにまとめる最大件数（超えたら即時コミット）",
+        alias="MESSAGE_FLUSH_MAX_BATCH",
+    )
+    message_write_durable: bool = Field(
+        default=True,
+        description="コミット完了まで呼び出し元を待たせる（false でキュー投入後すぐ戻る）",
+        alias="MESSAGE_WRITE_DURABLE",
+    )
+
+    # =============================================================================
+    # ストリーミング配信設定
+    # =============================================================================
+    stream_flush_interval: float = Field(
+        default=0.03,
+        description="クライアント向けストリームの差分結合間隔（秒）",
+        alias="STREAM_FLUSH_INTERVAL",
+    )
+    stream_max_frame_bytes: int = Field(
+        default=1024,
+        description="1フレームに結合する最大バイト数（超えたら即時送出）",
+        alias="STREAM_MAX_FRAME_BYTES",
+    )
+    stream_max_buffer_bytes: int = Field(
+        default=262144,
+        description="クライアント1接続あたりの未送信バッファ上限（バイト）",
+        alias="STREAM_MAX_BUFFER_BYTES",
+    )
+    stream_slow_consumer_timeout: float = Field(
+        default=30.0,
+        description="バッファ上限到達後にストリームを打ち切るまでの時間（秒）",
+        alias="STREAM_SLOW_CONSUMER_TIMEOUT",
+    )
+
+    # =============================================================================
+    # Deep Research 予算設定
+    # =============================================================================
+    research_max_concurrent_runs: int = Field(
+        default=4,
+        description="予算を縮小せずに同時実行できるDeep Research数",
+        alias="RESEARCH_MAX_CONCURRENT_RUNS",
+    )
+    research_max_searches: int = Field(
+        default=3, description="1実行あたりの最大検索回数", alias="RESEARCH_MAX_SEARCHES"
+    )
+    research_min_documents: int = Field(
+        default=5,
+        description="十分と判定する高関連度ドキュメント数",
+        alias="RESEARCH_MIN_DOCUMENTS",
+    )
+    research_relevance_threshold: float = Field(
+        default=0.7,
+        description="高関連度と判定するスコア閾値",
+        alias="RESEARCH_RELEVANCE_THRESHOLD",
+    )
+    research_report_max_tokens: int = Field(
+        default=3000,
+        description="レポート生成の最大トークン数",
+        alias="RESEARCH_REPORT_MAX_TOKENS",
+    )
+    research_report_min_tokens: int = Field(
+        default=1000,
+        description="高負荷時でも確保するレポート生成トークン数",
+        alias="RESEARCH_REPORT_MIN_TOKENS",
+    )
+    research_min_marginal_gain: int = Field(
+        default=1,
+        description="検索を継続するために必要な1回あたりの新規高関連度ドキュメント数",
+        alias="RESEARCH_MIN_MARGINAL_GAIN",
+    )
+    research_map_reduce_threshold_chars: int = Field(
+        default=10000,
+        description="Map-Reduceレポート生成に切り替える参考資料の総文字数",
+        alias="RESEARCH_MAP_REDUCE_THRESHOLD_CHARS",
+    )
+    research_map_concurrency: int = Field(
+        default=4,
+        description="ソース別要約（Map）の最大並列数",
+        alias="RESEARCH_MAP_CONCURRENCY",
+    )
+    research_map_max_documents: int = Field(
+        default=50,
+        description="Map-Reduceで使用する最大ドキュメント数",
+        alias="RESEARCH_MAP_MAX_DOCUMENTS",
+    )
+    research_map_group_chars: int = Field(
+        default=6000,
+        description="ソース別要約に渡す最大文字数",
+        alias="RESEARCH_MAP_GROUP_CHARS",
+    )
+    research_map_summary_tokens: int = Field(
+        default=500,
+        description="ソース別要約の最大トークン数",
+        alias="RESEARCH_MAP_SUMMARY_TOKENS",
+    )
 
     # =============================================================================
     # バリデーター
@@ -335,6 +648,14 @@ class Settings(BaseSettings):
         """CORS許可オリジンをリストで取得"""
         return [origin.strip() for origin in self.allowed_origins.split(",")]
 
+    def get_routing_preference_list(self) -> List[str]:
+        """レイテンシルーティング対象のプロバイダーリストを取得"""
+        return [
+            provider.strip().lower()
+            for provider in self.llm_routing_preference.split(",")
+            if provider.strip()
+        ]
+
     def get_fallback_providers_list(self) -> List[str]:
         """フォールバックプロバイダーをリストで取得"""
         return [provider.strip() for provider in self.llm_fallback_providers.split(",")]
@@ -1,25 +1,47 @@
 """
 データベース接続設定
 PostgreSQL対応・接続プール最適化・ヘルスチェック機能付き
+
+DATABASE_READ_REPLICA_URLS を設定すると、読み取り専用のリゾルバーは
+get_read_db() 経由でレプリカ（ラウンドロビン）に振り分けられる。
+書き込みをコミットしたキー（チャットセッションID、一覧は LIST_KEY）は
+DATABASE_REPLICA_STICKY_SECONDS の間 primary から読み、自分の書き込みを読めるようにする。
+スティッキー状態はプロセス内で管理する。
 """
 
+import asyncio
+import itertools
 import logging
 import os
-from typing import Any, AsyncGenerator, Dict
+import time
+from typing import Any, AsyncGenerator, Dict, Iterable, List, Optional, Set
 
+from sqlalchemy import event, make_url, text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
+from sqlalchemy.orm import ORMExecuteState, Session as SyncSession
 from sqlalchemy.pool import StaticPool
 
+from config import settings  # type: ignore[attr-defined]
+from db_metrics import get_database_metrics, instrument_engine, metered_pool_class
+
 logger = logging.getLogger(__name__)
 
+# セッション一覧・検索のスティッキーキー
+LIST_KEY = "sessions"
+# 一括 UPDATE/DELETE 文で書き込み対象のキーを指定する実行オプション
+STICKY_KEYS_OPTION = "sticky_keys"
 
-def get_database_config() -> Dict[str, Any]:
+
+def get_database_config(database_url: Optional[str] = None) -> Dict[str, Any]:
     """環境に応じたデータベース設定を取得"""
-    database_url = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./app.db")
+    database_url = database_url or os.getenv(
+        "DATABASE_URL", "sqlite+aiosqlite:///./app.db"
+    )
     environment = os.getenv("ENVIRONMENT", "development")
 
     # 接続プール設定
@@ -43,9 +65,9 @@ def get_database_config() -> Dict[str, Any]:
 
     elif database_url.startswith("sqlite"):
         # SQLite: 開発・テスト環境設定
-        pool_config = {
-            "poolclass": StaticPool,  # SQLiteは静的プール
-        }
+        # 単一接続の StaticPool はインメモリDBのみ（ファイルDBで共有すると
+        # 同時リクエストのトランザクションが混線する）
+        pool_config = {"poolclass": StaticPool} if ":memory:" in database_url else {}
 
         connect_args = {
             "check_same_thread": False,
@@ -63,25 +85,164 @@ def get_database_config() -> Dict[str, Any]:
     }
 
 
+def _create_engine(config: Dict[str, Any], name: str) -> AsyncEngine:
+    """エンジンを作成し、プール取得待ち・SQL 実行時間の計測を登録"""
+    pool_config = dict(config["pool_config"])
+    url = make_url(config["url"])
+    pool_class = pool_config.get("poolclass") or url.get_dialect().get_pool_class(url)
+    pool_config["poolclass"] = metered_pool_class(pool_class)
+
+    created = create_async_engine(
+        config["url"],
+        echo=config["echo"],
+        future=True,
+        connect_args=config["connect_args"],
+        pool_logging_name=name,
+        **pool_config,
+    )
+    instrument_engine(created, name, slow_query_seconds=slow_query_seconds)
+    return created
+
+
+def _session_factory(bind: AsyncEngine, **kwargs: Any) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False,
+        autocommit=False,
+        **kwargs,
+    )
+
+
+def _mask_url(url: str) -> str:
+    return url.split("@")[0] + "@***"
+
+
+class PrimarySession(SyncSession):
+    """primary 用のセッション（コミットした書き込みのキーを ReplicaRouter に記録）"""
+
+
+class ReplicaRouter:
+    """読み取りのレプリカ振り分けと書き込み直後のスティッキー管理"""
+
+    def __init__(
+        self,
+        replicas: Iterable[AsyncEngine] = (),
+        sticky_seconds: float = 5.0,
+    ) -> None:
+        self.replicas: List[AsyncEngine] = list(replicas)
+        self.sticky_seconds = max(0.0, sticky_seconds)
+        self._factories = [_session_factory(replica) for replica in self.replicas]
+        self._next = itertools.cycle(range(len(self.replicas)))
+        self._last_write: Dict[str, float] = {}
+        self._stats: Dict[str, int] = {
+            "replica_reads": 0,
+            "primary_reads": 0,
+            "sticky_reads": 0,
+        }
+
+    def record_write(self, keys: Iterable[str]) -> None:
+        """コミットした書き込みのキーを記録"""
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        for key in keys:
+            self._last_write[key] = now
+        if len(self._last_write) > 10000:
+            # 期限切れのキーを掃除
+            self._last_write = {
+                key: at
+                for key, at in self._last_write.items()
+                if now - at < self.sticky_seconds
+            }
+
+    def is_sticky(self, key: str) -> bool:
+        """直近に書き込んだキーか（レプリカ遅延中は primary から読む）"""
+        written_at = self._last_write.get(key)
+        return (
+            written_at is not None
+            and time.monotonic() - written_at < self.sticky_seconds
+        )
+
+    def read_session_factory(self, *sticky_keys: Optional[str]) -> async_sessionmaker:
+        """読み取りに使うセッションファクトリーを選択（キー省略時は一覧）"""
+        if not self.replicas:
+            self._stats["primary_reads"] += 1
+            return SessionLocal
+        keys = [key for key in sticky_keys if key] or [LIST_KEY]
+        if any(self.is_sticky(key) for key in keys):
+            self._stats["sticky_reads"] += 1
+            return SessionLocal
+        self._stats["replica_reads"] += 1
+        return self._factories[next(self._next)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "replicas": len(self.replicas),
+            "sticky_seconds": self.sticky_seconds,
+            "sticky_keys": sum(1 for key in self._last_write if self.is_sticky(key)),
+        }
+
+
+def _written_keys(session: SyncSession) -> Set[str]:
+    return session.info.setdefault("written_keys", set())
+
+
+@event.listens_for(PrimarySession, "after_flush")
+def _collect_flushed_keys(session: SyncSession, flush_context: Any) -> None:
+    keys = _written_keys(session)
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if getattr(obj, "__tablename__", None) == "sessions":
+            keys.update((obj.id, LIST_KEY))
+        elif getattr(obj, "session_id", None):
+            keys.add(obj.session_id)
+
+
+@event.listens_for(PrimarySession, "do_orm_execute")
+def _collect_bulk_keys(state: ORMExecuteState) -> None:
+    if state.is_update or state.is_delete:
+        # キー指定のない一括更新・削除は一覧に影響するものとみなす
+        sticky_keys = state.execution_options.get(STICKY_KEYS_OPTION)
+        _written_keys(state.session).update(sticky_keys or (LIST_KEY,))
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def _record_committed_keys(session: SyncSession) -> None:
+    keys = session.info.pop("written_keys", None)
+    if keys:
+        replica_router.record_write(keys)
+
+
+@event.listens_for(PrimarySession, "after_rollback")
+def _discard_written_keys(session: SyncSession) -> None:
+    session.info.pop("written_keys", None)
+
+
 # データベース設定
 db_config = get_database_config()
 
+# この秒数以上かかった SQL を警告ログに出す（0 以下で無効）
+slow_query_seconds = settings.db_slow_query_seconds
+
 # 非同期エンジン作成
-engine = create_async_engine(
-    db_config["url"],
-    echo=db_config["echo"],
-    future=True,
-    connect_args=db_config["connect_args"],
-    **db_config["pool_config"],
-)
+engine = _create_engine(db_config, "primary")
 
 # セッションファクトリー
-SessionLocal = async_sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False,
-    autocommit=False,
+SessionLocal = _session_factory(engine, sync_session_class=PrimarySession)
+
+# 読み取りレプリカ（カンマ区切り）
+replica_urls = [
+    url.strip() for url in settings.database_read_replica_urls.split(",") if url.strip()
+]
+replica_engines = [
+    _create_engine(get_database_config(url), f"replica_{index}")
+    for index, url in enumerate(replica_urls)
+]
+replica_router = ReplicaRouter(
+    replica_engines,
+    sticky_seconds=settings.database_replica_sticky_seconds,
 )
 
 
@@ -97,54 +258,111 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.close()
 
 
-async def check_database_health() -> Dict[str, Any]:
-    """データベース接続ヘルスチェック"""
-    try:
-        async with engine.begin() as conn:
-            # 基本接続テスト
-            result = await conn.execute("SELECT 1 as health_check")
-            health_result = result.scalar()
-
-            # 接続プール状態取得
-            pool = engine.pool
-            pool_status = (
-                {
-                    "size": pool.size(),
-                    "checked_in": pool.checkedin(),
-                    "checked_out": pool.checkedout(),
-                    "overflow": pool.overflow(),
-                }
-                if hasattr(pool, "size")
-                else {"status": "No pool (SQLite)"}
-            )
-
-            return {
-                "status": "healthy",
-                "database_url": db_config["url"].split("@")[0] + "@***",
-                "health_check_result": health_result,
-                "pool_status": pool_status,
-                "engine_echo": db_config["echo"],
-            }
+async def get_read_db(
+    sticky_key: Optional[str] = None,
+) -> AsyncGenerator[AsyncSession, None]:
+    """読み取り専用のデータベースセッション取得
+
+    レプリカ設定時はレプリカに振り分ける。sticky_key（チャットセッションID、
+    省略時は一覧）に直近の書き込みがあれば primary から読む。
+    """
+    async with replica_router.read_session_factory(sticky_key)() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
 
+def _pool_stats(target: AsyncEngine) -> Dict[str, Any]:
+    pool = target.pool
+    if not hasattr(pool, "size"):
+        return {"status": f"No pool ({type(pool).__name__})"}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """エンジンごとの接続プール状態・取得待ち時間・SQL 統計とレプリカ振り分け統計"""
+    metrics = get_database_metrics()
+    engines: Dict[str, Any] = {}
+    targets = [("primary", db_config["url"], engine)]
+    targets += [
+        (f"replica_{index}", url, replica)
+        for index, (url, replica) in enumerate(zip(replica_urls, replica_engines))
+    ]
+    for name, url, target in targets:
+        engines[name] = {
+            "url": _mask_url(url),
+            **_pool_stats(target),
+            **metrics.engine(name).get_stats(),
+        }
+    return {
+        "engines": engines,
+        "routing": replica_router.get_stats(),
+        "resolvers": metrics.get_stats()["resolvers"],
+        "slow_query_seconds": slow_query_seconds,
+    }
+
+
+async def check_database_health(timeout: float = 3.0) -> Dict[str, Any]:
+    """データベース接続ヘルスチェック
+
+    primary で SELECT 1 を実行する。プール枯渇時に /health が詰まらないよう
+    接続取得を含めて timeout 秒で打ち切る。
+    """
+
+    async def ping() -> Any:
+        async with engine.connect() as conn:
+            result = await conn.execute(text("SELECT 1"))
+            return result.scalar()
+
+    started = time.perf_counter()
+    try:
+        health_result = await asyncio.wait_for(ping(), timeout=timeout)
     except Exception as e:
-        logger.error(f"Database health check failed: {e}")
+        error = (
+            f"timed out after {timeout}s"
+            if isinstance(e, asyncio.TimeoutError)
+            else str(e)
+        )
+        logger.error(f"Database health check failed: {error}")
         return {
             "status": "unhealthy",
-            "error": str(e),
-            "database_url": db_config["url"].split("@")[0] + "@***",
+            "error": error,
+            "database_url": _mask_url(db_config["url"]),
+            "pool_status": _pool_stats(engine),
         }
 
+    return {
+        "status": "healthy",
+        "database_url": _mask_url(db_config["url"]),
+        "health_check_result": health_result,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "pool_status": _pool_stats(engine),
+        "engine_echo": db_config["echo"],
+    }
+
 
 async def close_database() -> None:
     """データベース接続クローズ（アプリケーション終了時）"""
     try:
-        await engine.dispose()
+        for target in [engine, *replica_engines]:
+            await target.dispose()
         logger.info("Database connections closed successfully")
     except Exception as e:
         logger.error(f"Error closing database connections: {e}")
 
 
 # 初期化時ログ出力
-logger.info(f"Database initialized: {db_config['url'].split('@')[0]}@***")
+logger.info(f"Database initialized: {_mask_url(db_config['url'])}")
+if replica_urls:
+    logger.info(f"Read replicas: {[_mask_url(url) for url in replica_urls]}")
 logger.info(f"Engine echo: {db_config['echo']}")
 logger.info(f"Pool config: {db_config['pool_config']}")
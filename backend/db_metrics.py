@@ -0,0 +1,224 @@
+"""
+データベース メトリクス
+
+エンジンごとに接続プールの取得待ち時間・SQL 実行時間をヒストグラムで集計し、
+しきい値（DB_SLOW_QUERY_SECONDS）を超えた SQL をログに出力する。
+GraphQL の操作中は実行中のリゾルバー（Type.field）ごとに SQL 件数を数える。
+集計はプロセス内のみで、/metrics から参照する。
+"""
+
+import functools
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import Pool
+
+logger = structlog.get_logger(__name__)
+
+# ヒストグラムの上限値（秒）
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# 遅い SQL のログに出す文字数
+_STATEMENT_LOG_CHARS = 500
+
+# 実行中の GraphQL リゾルバー（"Query.sessions" 等）
+current_resolver: ContextVar[Optional[str]] = ContextVar(
+    "current_resolver", default=None
+)
+
+
+class Histogram:
+    """累積バケットのヒストグラム（Prometheus の histogram と同じ形）"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, upper in enumerate(self.buckets):
+            if value <= upper:
+                break
+        else:
+            index = len(self.buckets)
+        self._counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets: Dict[str, int] = {}
+        for upper, count in zip([*map(str, self.buckets), "+Inf"], self._counts):
+            cumulative += count
+            buckets[upper] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "buckets": buckets,
+        }
+
+
+class EngineMetrics:
+    """1エンジン（primary・レプリカ）の統計"""
+
+    def __init__(self) -> None:
+        self.acquire_wait = Histogram()
+        self.acquire_timeouts = 0
+        self.statements = Histogram()
+        self.slow_statements = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "acquire_wait_seconds": self.acquire_wait.to_dict(),
+            "acquire_timeouts": self.acquire_timeouts,
+            "statement_seconds": self.statements.to_dict(),
+            "slow_statements": self.slow_statements,
+        }
+
+
+class DatabaseMetrics:
+    """エンジン別・リゾルバー別のデータベース統計"""
+
+    def __init__(self) -> None:
+        self.engines: Dict[str, EngineMetrics] = {}
+        self.resolvers: Dict[str, Dict[str, float]] = {}
+
+    def engine(self, name: str) -> EngineMetrics:
+        metrics = self.engines.get(name)
+        if metrics is None:
+            metrics = self.engines[name] = EngineMetrics()
+        return metrics
+
+    def record_resolver_statement(self, resolver: str, seconds: float) -> None:
+        stats = self.resolvers.setdefault(resolver, {"queries": 0, "seconds": 0.0})
+        stats["queries"] += 1
+        stats["seconds"] += seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "engines": {
+                name: metrics.get_stats() for name, metrics in self.engines.items()
+            },
+            "resolvers": {
+                resolver: {
+                    "queries": int(stats["queries"]),
+                    "seconds": round(stats["seconds"], 6),
+                }
+                for resolver, stats in sorted(self.resolvers.items())
+            },
+        }
+
+
+_database_metrics: Optional[DatabaseMetrics] = None
+
+
+def get_database_metrics() -> DatabaseMetrics:
+    """プロセス共有のデータベース統計を取得"""
+    global _database_metrics
+    if _database_metrics is None:
+        _database_metrics = DatabaseMetrics()
+    return _database_metrics
+
+
+def reset_database_metrics() -> None:
+    """統計を破棄（テスト用）"""
+    global _database_metrics
+    _database_metrics = None
+
+
+class _MeteredPool(Pool):
+    """接続の取得待ち時間を計測するプール（logging_name をエンジン名に使う）"""
+
+    def connect(self) -> Any:
+        metrics = get_database_metrics().engine(self.logging_name or "default")
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            metrics.acquire_timeouts += 1
+            logger.error(
+                "Database connection pool exhausted",
+                engine=self.logging_name,
+                waited_seconds=round(time.perf_counter() - started, 3),
+                status=self.status(),
+            )
+            raise
+        metrics.acquire_wait.observe(time.perf_counter() - started)
+        return connection
+
+
+@functools.lru_cache(maxsize=None)
+def metered_pool_class(pool_class: Type[Pool]) -> Type[Pool]:
+    """プールクラスに取得待ち時間の計測を加えたサブクラス"""
+    if issubclass(pool_class, _MeteredPool):
+        return pool_class
+    return type(f"Metered{pool_class.__name__}", (_MeteredPool, pool_class), {})
+
+
+def instrument_engine(
+    engine: AsyncEngine, name: str, slow_query_seconds: float = 0.0
+) -> None:
+    """SQL の実行時間・リゾルバー別件数の計測と遅い SQL のログを登録
+
+    slow_query_seconds が 0 以下なら遅い SQL のログは出さない。
+    """
+
+    def before_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any):
+        starts: List[float] = conn.info.setdefault("query_start_time", [])
+        starts.append(time.perf_counter())
+
+    def after_cursor_execute(conn: Any, cursor: Any, statement: str, *args: Any):
+        starts: List[float] = conn.info.get("query_start_time") or []
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        database_metrics = get_database_metrics()
+        metrics = database_metrics.engine(name)
+        metrics.statements.observe(elapsed)
+
+        resolver = current_resolver.get()
+        if resolver is not None:
+            database_metrics.record_resolver_statement(resolver, elapsed)
+
+        if 0 < slow_query_seconds <= elapsed:
+            metrics.slow_statements += 1
+            logger.warning(
+                "Slow database statement",
+                engine=name,
+                seconds=round(elapsed, 3),
+                resolver=resolver,
+                statement=statement[:_STATEMENT_LOG_CHARS],
+            )
+
+    def handle_error(context: Any) -> None:
+        # 失敗した SQL の開始時刻を破棄
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start_time")
+            if starts:
+                starts.pop()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", handle_error)
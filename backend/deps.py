@@ -2,8 +2,9 @@
 依存性注入
 """
 
-from database import get_db
+from database import get_db, get_read_db
 
 # データベースセッション依存性注入
 # FastAPI router で使用: Depends(get_db)
-__all__ = ["get_db"]
+# 読み取り専用のリゾルバーは get_read_db（レプリカ設定時はレプリカから読む）
+__all__ = ["get_db", "get_read_db"]
@@ -8,14 +8,19 @@ from fastapi import FastAPI, Query as FastAPIQuery
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from strawberry.fastapi import GraphQLRouter
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
-import json
 import sys
 
+from api.context import (
+    DatabaseSessionExtension,
+    ResolverMetricsExtension,
+    get_context,
+)
 from api.resolvers import Query, Mutation, Subscription
 from config import get_settings  # type: ignore
 from pydantic import ValidationError
+from utils import fast_json
 from utils.logging import setup_logging, get_logger
 
 # 設定検証とロード
@@ -55,9 +60,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("❌ データベーステーブル初期化エラー", error=str(e))
 
+    # LLMプロバイダーのバックグラウンドヘルスチェック開始
+    from providers.health_monitor import get_health_monitor
+
+    health_monitor = get_health_monitor()
+    health_monitor.start()
+
     yield
     logger.info("Shutting down QRAI API")
 
+    await health_monitor.stop()
+
+    # ライトビハインド中のメッセージ書き込みをフラッシュ
+    from services.message_writer import get_message_writer
+
+    await get_message_writer().close()
+
+    # LLMプロバイダー共有HTTPクライアントをクローズ
+    from providers.transport import close_http_clients
+
+    await close_http_clients()
+
 
 # FastAPIアプリケーション作成
 app = FastAPI(
@@ -76,11 +99,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# GraphQLスキーマ作成
-schema = strawberry.Schema(query=Query, mutation=Mutation, subscription=Subscription)
+# GraphQLスキーマ作成（操作ごとの DB セッションと DataLoader をコンテキストで共有）
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[DatabaseSessionExtension, ResolverMetricsExtension],
+)
 
 # GraphQLルーター設定
-graphql_app = GraphQLRouter(schema, path="/graphql")
+graphql_app = GraphQLRouter(schema, path="/graphql", context_getter=get_context)
 
 app.include_router(graphql_app, prefix="")
 
@@ -98,22 +126,57 @@ async def root():
 @app.get("/health")
 async def health_check():
     """ヘルスチェックエンドポイント"""
+    from database import check_database_health
+    from providers.health_monitor import get_health_monitor
+
     # APIキー設定状況
     api_status = settings.validate_api_keys()
     configured_apis = [api for api, status in api_status.items() if status]
 
+    database_health = await check_database_health()
+
     return {
-        "status": "ok",
+        "status": "ok" if database_health["status"] == "healthy" else "degraded",
         "timestamp": datetime.now().isoformat(),
         "environment": settings.environment,
         "app_name": settings.app_name,
         "version": settings.app_version,
         "database": settings.get_database_info()["scheme"],
+        "database_health": database_health,
         "configured_apis": configured_apis,
+        "llm_providers": get_health_monitor().get_snapshot(),
         "debug_mode": settings.debug,
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """運用メトリクスエンドポイント"""
+    from database import get_pool_stats
+    from providers.circuit_breaker import get_circuit_breaker_stats
+    from providers.latency import get_latency_tracker
+    from providers.prompt_cache import get_prompt_cache_stats
+    from providers.rate_limit import get_rate_limiter
+    from services.message_writer import get_message_writer
+    from services.stream_shaper import get_stream_shaping_stats
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "llm_rate_limiter": get_rate_limiter().get_metrics(),
+        "llm_circuit_breakers": get_circuit_breaker_stats(),
+        "llm_latency": get_latency_tracker().get_metrics(),
+        "llm_prompt_cache": get_prompt_cache_stats(),
+        "stream_shaping": get_stream_shaping_stats(),
+        "message_writer": get_message_writer().get_stats(),
+        "database": get_pool_stats(),
+    }
+
+
+def _sse_event(payload: dict) -> str:
+    """SSE イベント文字列を生成"""
+    return "data: " + fast_json.dumps(payload) + "\n\n"
+
+
 @app.get("/graphql/stream")
 async def graphql_stream(
     id: str = FastAPIQuery(..., description="Message ID for streaming"),
@@ -127,12 +190,14 @@ async def graphql_stream(
             # データベース接続取得
             from deps import get_db
             from services import RAGService
+            from services.message_writer import get_message_writer
+            from services.stream_shaper import shape_stream
 
             async for db in get_db():
-                rag_service = RAGService(db)
+                rag_service = RAGService(db, message_writer=get_message_writer())
 
                 # SSE ヘッダー
-                yield "data: " + json.dumps({"type": "connection_init"}) + "\n\n"
+                yield _sse_event({"type": "connection_init"})
 
                 # メッセージIDからメッセージ情報を取得
                 from models.message import Message
@@ -143,15 +208,15 @@ async def graphql_stream(
                 message = result.scalar_one_or_none()
 
                 if not message:
-                    yield "data: " + json.dumps(
+                    yield _sse_event(
                         {"type": "error", "messageId": id, "error": "Message not found"}
-                    ) + "\n\n"
+                    )
                     return
 
                 # メッセージ処理開始
-                yield "data: " + json.dumps(
+                yield _sse_event(
                     {"type": "message", "messageId": id, "status": "processing"}
-                ) + "\n\n"
+                )
 
                 # セッションIDをUUIDに変換
                 import uuid
@@ -159,37 +224,45 @@ async def graphql_stream(
                 session_uuid = uuid.UUID(message.session_id)
 
                 # ストリーミング処理（メッセージ作成なし）
-                async for chunk in rag_service.stream_response_only(
-                    question=message.content,
-                    session_id=session_uuid,
-                    user_message_id=message.id,
-                ):
-                    if "error" in chunk:
-                        yield "data: " + json.dumps(
-                            {"type": "error", "messageId": id, "error": chunk["error"]}
-                        ) + "\n\n"
-                        break
-                    elif chunk.get("chunk"):
-                        yield "data: " + json.dumps(
-                            {
-                                "type": "chunk",
-                                "messageId": id,
-                                "content": chunk["chunk"],
-                            }
-                        ) + "\n\n"
-
-                    if chunk.get("is_complete"):
-                        # 完了通知
-                        yield "data: " + json.dumps(
-                            {"type": "complete", "messageId": id}
-                        ) + "\n\n"
-                        break
+                # 差分を時間・サイズで結合し、遅いクライアントにはバックプレッシャー
+                async with aclosing(
+                    shape_stream(
+                        rag_service.stream_response_only(
+                            question=message.content,
+                            session_id=session_uuid,
+                            user_message_id=message.id,
+                        )
+                    )
+                ) as frames:
+                    async for chunk in frames:
+                        if "error" in chunk:
+                            yield _sse_event(
+                                {
+                                    "type": "error",
+                                    "messageId": id,
+                                    "error": chunk["error"],
+                                }
+                            )
+                            break
+                        elif chunk.get("chunk"):
+                            yield _sse_event(
+                                {
+                                    "type": "chunk",
+                                    "messageId": id,
+                                    "content": chunk["chunk"],
+                                }
+                            )
+
+                        if chunk.get("is_complete"):
+                            # 完了通知
+                            yield _sse_event({"type": "complete", "messageId": id})
+                            break
 
         except Exception as e:
             logger.error("❌ SSE ストリーミングエラー", error=str(e), message_id=id)
-            yield "data: " + json.dumps(
+            yield _sse_event(
                 {"type": "error", "messageId": id, "error": "Internal server error"}
-            ) + "\n\n"
+            )
 
     return StreamingResponse(
         generate_stream(),
@@ -0,0 +1,64 @@
+"""Add LLM usage records
+
+Revision ID: 7d2e4a1c9b35
+Revises: 0c43933b4673
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from alembic import op  # type: ignore[attr-defined]
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7d2e4a1c9b35"
+down_revision = "0c43933b4673"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_usage_records",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("session_id", sa.String(length=36), nullable=True),
+        sa.Column("message_id", sa.String(length=36), nullable=True),
+        sa.Column("provider", sa.String(length=50), nullable=False),
+        sa.Column("model", sa.String(length=255), nullable=False),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False),
+        sa.Column("total_tokens", sa.Integer(), nullable=False),
+        sa.Column("cached_tokens", sa.Integer(), nullable=False),
+        sa.Column("estimated", sa.Boolean(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["session_id"],
+            ["sessions.id"],
+            ondelete="SET NULL",
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_llm_usage_records_session_id",
+        "llm_usage_records",
+        ["session_id"],
+    )
+    op.create_index(
+        "ix_llm_usage_records_provider_model_created_at",
+        "llm_usage_records",
+        ["provider", "model", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_llm_usage_records_provider_model_created_at",
+        table_name="llm_usage_records",
+    )
+    op.drop_index("ix_llm_usage_records_session_id", table_name="llm_usage_records")
+    op.drop_table("llm_usage_records")
@@ -0,0 +1,37 @@
+"""Add session listing indexes
+
+Revision ID: a3f1c8e2d4b6
+Revises: 7d2e4a1c9b35
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from alembic import op  # type: ignore[attr-defined]
+
+
+# revision identifiers, used by Alembic.
+revision = "a3f1c8e2d4b6"
+down_revision = "7d2e4a1c9b35"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_sessions_updated_at_id", "sessions", ["updated_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_sessions_created_at_id", "sessions", ["created_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_messages_session_id_created_at",
+        "messages",
+        ["session_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_session_id_created_at", table_name="messages")
+    op.drop_index("ix_sessions_created_at_id", table_name="sessions")
+    op.drop_index("ix_sessions_updated_at_id", table_name="sessions")
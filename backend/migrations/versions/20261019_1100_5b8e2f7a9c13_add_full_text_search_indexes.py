@@ -0,0 +1,121 @@
+"""Add full-text search indexes
+
+Revision ID: 5b8e2f7a9c13
+Revises: a3f1c8e2d4b6
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from alembic import op  # type: ignore[attr-defined]
+
+
+# revision identifiers, used by Alembic.
+revision = "5b8e2f7a9c13"
+down_revision = "a3f1c8e2d4b6"
+branch_labels = None
+depends_on = None
+
+# models.search_index の定義を固定したもの（モデル側の変更に追従させない）
+SQLITE_FTS_DDL = [
+    # メッセージ本文
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content, content='messages', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages
+    BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    # セッションタイトル
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(
+        title, content='sessions', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_ai AFTER INSERT ON sessions BEGIN
+        INSERT INTO sessions_fts(rowid, title) VALUES (new.rowid, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_ad AFTER DELETE ON sessions BEGIN
+        INSERT INTO sessions_fts(sessions_fts, rowid, title)
+        VALUES ('delete', old.rowid, old.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_au AFTER UPDATE OF title ON sessions
+    BEGIN
+        INSERT INTO sessions_fts(sessions_fts, rowid, title)
+        VALUES ('delete', old.rowid, old.title);
+        INSERT INTO sessions_fts(rowid, title) VALUES (new.rowid, new.title);
+    END
+    """,
+]
+
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS sessions_fts_au",
+    "DROP TRIGGER IF EXISTS sessions_fts_ad",
+    "DROP TRIGGER IF EXISTS sessions_fts_ai",
+    "DROP TABLE IF EXISTS sessions_fts",
+    "DROP TRIGGER IF EXISTS messages_fts_au",
+    "DROP TRIGGER IF EXISTS messages_fts_ad",
+    "DROP TRIGGER IF EXISTS messages_fts_ai",
+    "DROP TABLE IF EXISTS messages_fts",
+]
+
+# 既存データからインデックスを再構築（VACUUM で rowid が変わった場合にも使う）
+SQLITE_FTS_REBUILD = [
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+    "INSERT INTO sessions_fts(sessions_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # 日本語の部分一致にも効くよう tsvector ではなく trigram を使う
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.create_index(
+            "ix_messages_content_trgm",
+            "messages",
+            ["content"],
+            postgresql_using="gin",
+            postgresql_ops={"content": "gin_trgm_ops"},
+        )
+        op.create_index(
+            "ix_sessions_title_trgm",
+            "sessions",
+            ["title"],
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        )
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DDL + SQLITE_FTS_REBUILD:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.drop_index("ix_sessions_title_trgm", table_name="sessions")
+        op.drop_index("ix_messages_content_trgm", table_name="messages")
+    elif dialect == "sqlite":
+        for statement in SQLITE_FTS_DROP:
+            op.execute(statement)
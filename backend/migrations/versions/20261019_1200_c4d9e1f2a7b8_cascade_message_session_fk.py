@@ -0,0 +1,37 @@
+"""Cascade message deletes from sessions
+
+Revision ID: c4d9e1f2a7b8
+Revises: 5b8e2f7a9c13
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op  # type: ignore[attr-defined]
+
+
+# revision identifiers, used by Alembic.
+revision = "c4d9e1f2a7b8"
+down_revision = "5b8e2f7a9c13"
+branch_labels = None
+depends_on = None
+
+# PostgreSQL が初期マイグレーションで付けた制約名
+FK_NAME = "messages_session_id_fkey"
+
+
+def upgrade() -> None:
+    # SQLite は外部キー制約の変更にテーブル再作成が必要で、既定では制約も
+    # 無効なため対象外（一括削除はアプリ側で子テーブルも削除する）
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_constraint(FK_NAME, "messages", type_="foreignkey")
+    op.create_foreign_key(
+        FK_NAME, "messages", "sessions", ["session_id"], ["id"], ondelete="CASCADE"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.drop_constraint(FK_NAME, "messages", type_="foreignkey")
+    op.create_foreign_key(FK_NAME, "messages", "sessions", ["session_id"], ["id"])
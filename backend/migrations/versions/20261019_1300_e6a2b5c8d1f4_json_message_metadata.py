@@ -0,0 +1,70 @@
+"""Store message citations and metadata as JSON
+
+Revision ID: e6a2b5c8d1f4
+Revises: c4d9e1f2a7b8
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from alembic import op  # type: ignore[attr-defined]
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "e6a2b5c8d1f4"
+down_revision = "c4d9e1f2a7b8"
+branch_labels = None
+depends_on = None
+
+META_INDEXED_KEYS = ("research_id", "type", "provider")
+JSON_COLUMNS = ("citations", "meta_data")
+
+
+def _key_expression(dialect: str, key: str) -> str:
+    if dialect == "postgresql":
+        return f"(meta_data ->> '{key}')"
+    return f"json_extract(meta_data, '$.{key}')"
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # 既存の JSON 文字列を JSONB に変換（空文字は NULL）
+        for column in JSON_COLUMNS:
+            op.alter_column(
+                "messages",
+                column,
+                type_=postgresql.JSONB(),
+                existing_type=sa.Text(),
+                existing_nullable=True,
+                postgresql_using=(
+                    f"CASE WHEN {column} IS NULL OR {column} = '' "
+                    f"THEN NULL ELSE {column}::jsonb END"
+                ),
+            )
+    # SQLite の JSON 型は TEXT として保存されるため、既存データはそのまま読める
+
+    for key in META_INDEXED_KEYS:
+        op.create_index(
+            f"ix_messages_meta_{key}",
+            "messages",
+            [sa.text(_key_expression(dialect, key))],
+        )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    for key in META_INDEXED_KEYS:
+        op.drop_index(f"ix_messages_meta_{key}", table_name="messages")
+
+    if dialect == "postgresql":
+        for column in JSON_COLUMNS:
+            op.alter_column(
+                "messages",
+                column,
+                type_=sa.Text(),
+                existing_type=postgresql.JSONB(),
+                existing_nullable=True,
+                postgresql_using=f"{column}::text",
+            )
@@ -0,0 +1,178 @@
+"""Denormalize message count and last message time on sessions
+
+Revision ID: f7c3d9a2b6e1
+Revises: e6a2b5c8d1f4
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from typing import List
+
+from alembic import op  # type: ignore[attr-defined]
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "f7c3d9a2b6e1"
+down_revision = "e6a2b5c8d1f4"
+branch_labels = None
+depends_on = None
+
+# models.session_stats の定義を固定したもの（モデル側の変更に追従させない）
+SQLITE_STATS_DDL: List[str] = [
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_stats_ai AFTER INSERT ON messages BEGIN
+        UPDATE sessions SET
+            message_count = message_count + 1,
+            last_message_at = CASE
+                WHEN last_message_at IS NULL OR new.created_at > last_message_at
+                THEN new.created_at ELSE last_message_at END
+        WHERE id = new.session_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_stats_ad AFTER DELETE ON messages BEGIN
+        UPDATE sessions SET
+            message_count = MAX(message_count - 1, 0),
+            last_message_at = COALESCE(
+                (SELECT MAX(created_at) FROM messages
+                 WHERE session_id = old.session_id),
+                created_at
+            )
+        WHERE id = old.session_id;
+    END
+    """,
+]
+
+SQLITE_STATS_DROP: List[str] = [
+    "DROP TRIGGER IF EXISTS messages_stats_ad",
+    "DROP TRIGGER IF EXISTS messages_stats_ai",
+]
+
+POSTGRES_STATS_DDL: List[str] = [
+    """
+    CREATE OR REPLACE FUNCTION messages_stats_after_insert() RETURNS trigger AS $$
+    BEGIN
+        UPDATE sessions AS s SET
+            message_count = s.message_count + n.added,
+            last_message_at = GREATEST(s.last_message_at, n.last_at)
+        FROM (
+            SELECT session_id, COUNT(*) AS added, MAX(created_at) AS last_at
+            FROM inserted_messages GROUP BY session_id
+        ) AS n
+        WHERE s.id = n.session_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION messages_stats_after_delete() RETURNS trigger AS $$
+    BEGIN
+        UPDATE sessions AS s SET
+            message_count = GREATEST(s.message_count - d.removed, 0),
+            last_message_at = COALESCE(
+                (SELECT MAX(m.created_at) FROM messages AS m
+                 WHERE m.session_id = s.id),
+                s.created_at
+            )
+        FROM (
+            SELECT session_id, COUNT(*) AS removed
+            FROM deleted_messages GROUP BY session_id
+        ) AS d
+        WHERE s.id = d.session_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS messages_stats_ai ON messages",
+    """
+    CREATE TRIGGER messages_stats_ai AFTER INSERT ON messages
+    REFERENCING NEW TABLE AS inserted_messages
+    FOR EACH STATEMENT EXECUTE FUNCTION messages_stats_after_insert()
+    """,
+    "DROP TRIGGER IF EXISTS messages_stats_ad ON messages",
+    """
+    CREATE TRIGGER messages_stats_ad AFTER DELETE ON messages
+    REFERENCING OLD TABLE AS deleted_messages
+    FOR EACH STATEMENT EXECUTE FUNCTION messages_stats_after_delete()
+    """,
+]
+
+POSTGRES_STATS_DROP: List[str] = [
+    "DROP TRIGGER IF EXISTS messages_stats_ad ON messages",
+    "DROP TRIGGER IF EXISTS messages_stats_ai ON messages",
+    "DROP FUNCTION IF EXISTS messages_stats_after_delete()",
+    "DROP FUNCTION IF EXISTS messages_stats_after_insert()",
+]
+
+# 既存データから集計を作り直す
+STATS_BACKFILL = """
+UPDATE sessions SET
+    message_count = (
+        SELECT COUNT(*) FROM messages WHERE messages.session_id = sessions.id
+    ),
+    last_message_at = COALESCE(
+        (SELECT MAX(messages.created_at) FROM messages
+         WHERE messages.session_id = sessions.id),
+        sessions.created_at
+    )
+"""
+
+
+def _stats_ddl(dialect: str) -> List[str]:
+    """方言ごとのトリガー作成 DDL"""
+    if dialect == "postgresql":
+        return POSTGRES_STATS_DDL
+    if dialect == "sqlite":
+        return SQLITE_STATS_DDL
+    return []
+
+
+def _stats_drop(dialect: str) -> List[str]:
+    """方言ごとのトリガー削除 DDL"""
+    if dialect == "postgresql":
+        return POSTGRES_STATS_DROP
+    if dialect == "sqlite":
+        return SQLITE_STATS_DROP
+    return []
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.add_column(
+        "sessions",
+        sa.Column("message_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "sessions",
+        sa.Column("last_message_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    # 既存セッションを集計してからトリガーで追従させる
+    op.execute(STATS_BACKFILL)
+    # SQLite は NOT NULL への変更にテーブル再作成（FTS の rowid が変わる）が必要なため
+    # NULL 許可のまま（値は既定値とトリガーで常に入る）
+    if dialect == "postgresql":
+        op.alter_column(
+            "sessions",
+            "last_message_at",
+            existing_type=sa.DateTime(timezone=True),
+            nullable=False,
+        )
+    for statement in _stats_ddl(dialect):
+        op.execute(statement)
+
+    op.create_index(
+        "ix_sessions_last_message_at_id", "sessions", ["last_message_at", "id"]
+    )
+    op.create_index("ix_sessions_message_count_id", "sessions", ["message_count", "id"])
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    op.drop_index("ix_sessions_message_count_id", table_name="sessions")
+    op.drop_index("ix_sessions_last_message_at_id", table_name="sessions")
+    for statement in _stats_drop(dialect):
+        op.execute(statement)
+    op.drop_column("sessions", "last_message_at")
+    op.drop_column("sessions", "message_count")
@@ -12,9 +12,13 @@ Base = declarative_base()
 if TYPE_CHECKING:
     from .session import Session
     from .message import Message, MessageRole
+    from .usage import UsageRecord
 else:
     # モデルをインポート（循環参照回避のため最後に）
     from .session import Session  # noqa: E402
     from .message import Message, MessageRole  # noqa: E402
+    from .usage import UsageRecord  # noqa: E402
+    from . import search_index  # noqa: E402,F401
+    from . import session_stats  # noqa: E402,F401
 
-__all__ = ["Base", "Session", "Message", "MessageRole"]
+__all__ = ["Base", "Session", "Message", "MessageRole", "UsageRecord"]
@@ -0,0 +1,50 @@
+"""
+JSON 列の共通定義
+
+PostgreSQL では JSONB、それ以外（SQLite）では JSON として保存する。
+json_text() はトップレベルキーを文字列で取り出す式で、式インデックスと
+検索条件の両方で同じ SQL になるため、インデックスが使われる。
+"""
+
+import re
+from typing import Any
+
+from sqlalchemy import JSON, String, literal_column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+_KEY_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class json_text(FunctionElement):  # noqa: N801 - SQL 関数と同じ命名
+    """JSON 列のトップレベルキーの値（文字列）"""
+
+    type = String()
+    name = "json_text"
+    inherit_cache = True
+
+    def __init__(self, column: Any, key: str):
+        if not _KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid JSON key: {key}")
+        # キーもリテラルとして式に含め、キャッシュキーとインデックス定義に反映させる
+        super().__init__(column, literal_column(f"'{key}'"))
+
+
+def _column_and_key(element: json_text, compiler: Any, **kw: Any) -> tuple:
+    column, key = list(element.clauses)
+    return compiler.process(column, **kw), key.name.strip("'")
+
+
+@compiles(json_text)
+def _compile_json_text(element: json_text, compiler: Any, **kw: Any) -> str:
+    column, key = _column_and_key(element, compiler, **kw)
+    return f"json_extract({column}, '$.{key}')"
+
+
+@compiles(json_text, "postgresql")
+def _compile_json_text_postgresql(element: json_text, compiler: Any, **kw: Any) -> str:
+    column, key = _column_and_key(element, compiler, **kw)
+    return f"({column} ->> '{key}')"
@@ -3,13 +3,22 @@
 """
 
 from datetime import datetime, timezone
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from enum import Enum
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import (
+    Column,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    Index,
+    Enum as SQLEnum,
+)
 from sqlalchemy.orm import relationship, Mapped
 import uuid
 
 from . import Base
+from .json_fields import JSONType, json_text
 
 if TYPE_CHECKING:
     from .session import Session
@@ -26,23 +35,27 @@ class Message(Base):  # type: ignore[valid-type,misc]
     """チャットメッセージ"""
 
     __tablename__ = "messages"
+    __table_args__ = (
+        # セッション内のメッセージを時系列で取得するため
+        Index("ix_messages_session_id_created_at", "session_id", "created_at"),
+    )
 
     id: Mapped[str] = Column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
     )
     session_id: Mapped[str] = Column(
-        String(36), ForeignKey("sessions.id"), nullable=False
+        String(36), ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False
     )
     role: Mapped[MessageRole] = Column(SQLEnum(MessageRole), nullable=False)
     content: Mapped[str] = Column(Text, nullable=False)
 
-    # RAG関連のメタデータ（JSONで格納）
-    citations: Mapped[Optional[str]] = Column(
-        Text, nullable=True
-    )  # 引用情報（JSON文字列）
-    meta_data: Mapped[Optional[str]] = Column(
-        Text, nullable=True
-    )  # その他のメタデータ（JSON文字列）
+    # RAG関連のメタデータ（PostgreSQL では JSONB）
+    citations: Mapped[Optional[List[Dict[str, Any]]]] = Column(
+        JSONType, nullable=True
+    )  # 引用情報
+    meta_data: Mapped[Optional[Dict[str, Any]]] = Column(
+        JSONType, nullable=True
+    )  # その他のメタデータ（research_id, type, provider 等）
 
     created_at: Mapped[datetime] = Column(
         DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
@@ -53,3 +66,10 @@ class Message(Base):  # type: ignore[valid-type,misc]
 
     def __repr__(self):
         return f"<Message(id={self.id}, role={self.role.value}, session_id={self.session_id})>"
+
+
+# よく絞り込むメタデータキーの式インデックス
+META_INDEXED_KEYS = ("research_id", "type", "provider")
+
+for _key in META_INDEXED_KEYS:
+    Index(f"ix_messages_meta_{_key}", json_text(Message.__table__.c.meta_data, _key))
@@ -0,0 +1,109 @@
+"""
+全文検索インデックス（SQLite FTS5）
+
+開発環境の SQLite では trigram トークナイザーの FTS5 仮想テーブルを
+messages / sessions の外部コンテンツとして作成し、トリガーで同期する。
+PostgreSQL では pg_trgm の GIN インデックスをマイグレーションで作成する。
+"""
+
+from typing import Any, List
+
+from sqlalchemy import event, text
+
+from . import Base
+
+SQLITE_FTS_DDL: List[str] = [
+    # メッセージ本文
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content, content='messages', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages
+    BEGIN
+        INSERT INTO messages_fts(messages_fts, rowid, content)
+        VALUES ('delete', old.rowid, old.content);
+        INSERT INTO messages_fts(rowid, content) VALUES (new.rowid, new.content);
+    END
+    """,
+    # セッションタイトル
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(
+        title, content='sessions', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_ai AFTER INSERT ON sessions BEGIN
+        INSERT INTO sessions_fts(rowid, title) VALUES (new.rowid, new.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_ad AFTER DELETE ON sessions BEGIN
+        INSERT INTO sessions_fts(sessions_fts, rowid, title)
+        VALUES ('delete', old.rowid, old.title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS sessions_fts_au AFTER UPDATE OF title ON sessions
+    BEGIN
+        INSERT INTO sessions_fts(sessions_fts, rowid, title)
+        VALUES ('delete', old.rowid, old.title);
+        INSERT INTO sessions_fts(rowid, title) VALUES (new.rowid, new.title);
+    END
+    """,
+]
+
+SQLITE_FTS_DROP: List[str] = [
+    "DROP TRIGGER IF EXISTS sessions_fts_au",
+    "DROP TRIGGER IF EXISTS sessions_fts_ad",
+    "DROP TRIGGER IF EXISTS sessions_fts_ai",
+    "DROP TABLE IF EXISTS sessions_fts",
+    "DROP TRIGGER IF EXISTS messages_fts_au",
+    "DROP TRIGGER IF EXISTS messages_fts_ad",
+    "DROP TRIGGER IF EXISTS messages_fts_ai",
+    "DROP TABLE IF EXISTS messages_fts",
+]
+
+# 既存データからインデックスを再構築（VACUUM で rowid が変わった場合にも使う）
+SQLITE_FTS_REBUILD: List[str] = [
+    "INSERT INTO messages_fts(messages_fts) VALUES ('rebuild')",
+    "INSERT INTO sessions_fts(sessions_fts) VALUES ('rebuild')",
+]
+
+
+def _create_sqlite_fts(target: Any, connection: Any, **kw: Any) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'")
+    ).first()
+    for statement in SQLITE_FTS_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        # 既存の開発DBに後から追加した場合は既存行を取り込む
+        for statement in SQLITE_FTS_REBUILD:
+            connection.execute(text(statement))
+
+
+def _drop_sqlite_fts(target: Any, connection: Any, **kw: Any) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SQLITE_FTS_DROP:
+        connection.execute(text(statement))
+
+
+# create_all / drop_all（開発環境の起動時・テスト）でも作成されるようにする
+event.listen(Base.metadata, "after_create", _create_sqlite_fts)
+event.listen(Base.metadata, "before_drop", _drop_sqlite_fts)
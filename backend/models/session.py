@@ -2,7 +2,7 @@
 チャットセッションモデル
 """
 
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index, Integer
 from sqlalchemy.orm import relationship, Mapped
 import uuid
 from datetime import datetime, timezone
@@ -18,6 +18,13 @@ class Session(Base):  # type: ignore[valid-type,misc]
     """チャットセッション"""
 
     __tablename__ = "sessions"
+    __table_args__ = (
+        # 一覧のキーセットページング用（ソートキー, ID）
+        Index("ix_sessions_updated_at_id", "updated_at", "id"),
+        Index("ix_sessions_created_at_id", "created_at", "id"),
+        Index("ix_sessions_last_message_at_id", "last_message_at", "id"),
+        Index("ix_sessions_message_count_id", "message_count", "id"),
+    )
 
     id: Mapped[str] = Column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
@@ -32,6 +39,17 @@ class Session(Base):  # type: ignore[valid-type,misc]
         onupdate=lambda: datetime.now(timezone.utc),
     )
 
+    # メッセージ集計（messages のトリガーで更新。models/session_stats.py 参照）
+    message_count: Mapped[int] = Column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    last_message_at: Mapped[datetime] = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        # メッセージがないうちは作成日時
+        default=lambda context: context.get_current_parameters()["created_at"],
+    )
+
     # リレーション
     messages: Mapped[List["Message"]] = relationship(
         "Message", back_populates="session", cascade="all, delete-orphan"
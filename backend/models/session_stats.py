@@ -0,0 +1,150 @@
+"""
+セッションのメッセージ集計（message_count・last_message_at）
+
+messages の INSERT / DELETE 時にトリガーで sessions の件数と最終メッセージ日時を
+同じトランザクション内で更新する（一括 INSERT・集合演算の DELETE も対象）。
+SQLite は行トリガー、PostgreSQL は遷移テーブルを使う文トリガーでまとめて更新する。
+メッセージがないセッションの last_message_at は作成日時にする（並び替えで NULL を扱わないため）。
+"""
+
+from typing import Any, List
+
+from sqlalchemy import event, inspect, text
+
+from . import Base
+
+SQLITE_STATS_DDL: List[str] = [
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_stats_ai AFTER INSERT ON messages BEGIN
+        UPDATE sessions SET
+            message_count = message_count + 1,
+            last_message_at = CASE
+                WHEN last_message_at IS NULL OR new.created_at > last_message_at
+                THEN new.created_at ELSE last_message_at END
+        WHERE id = new.session_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS messages_stats_ad AFTER DELETE ON messages BEGIN
+        UPDATE sessions SET
+            message_count = MAX(message_count - 1, 0),
+            last_message_at = COALESCE(
+                (SELECT MAX(created_at) FROM messages
+                 WHERE session_id = old.session_id),
+                created_at
+            )
+        WHERE id = old.session_id;
+    END
+    """,
+]
+
+SQLITE_STATS_DROP: List[str] = [
+    "DROP TRIGGER IF EXISTS messages_stats_ad",
+    "DROP TRIGGER IF EXISTS messages_stats_ai",
+]
+
+POSTGRES_STATS_DDL: List[str] = [
+    """
+    CREATE OR REPLACE FUNCTION messages_stats_after_insert() RETURNS trigger AS $$
+    BEGIN
+        UPDATE sessions AS s SET
+            message_count = s.message_count + n.added,
+            last_message_at = GREATEST(s.last_message_at, n.last_at)
+        FROM (
+            SELECT session_id, COUNT(*) AS added, MAX(created_at) AS last_at
+            FROM inserted_messages GROUP BY session_id
+        ) AS n
+        WHERE s.id = n.session_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION messages_stats_after_delete() RETURNS trigger AS $$
+    BEGIN
+        UPDATE sessions AS s SET
+            message_count = GREATEST(s.message_count - d.removed, 0),
+            last_message_at = COALESCE(
+                (SELECT MAX(m.created_at) FROM messages AS m
+                 WHERE m.session_id = s.id),
+                s.created_at
+            )
+        FROM (
+            SELECT session_id, COUNT(*) AS removed
+            FROM deleted_messages GROUP BY session_id
+        ) AS d
+        WHERE s.id = d.session_id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS messages_stats_ai ON messages",
+    """
+    CREATE TRIGGER messages_stats_ai AFTER INSERT ON messages
+    REFERENCING NEW TABLE AS inserted_messages
+    FOR EACH STATEMENT EXECUTE FUNCTION messages_stats_after_insert()
+    """,
+    "DROP TRIGGER IF EXISTS messages_stats_ad ON messages",
+    """
+    CREATE TRIGGER messages_stats_ad AFTER DELETE ON messages
+    REFERENCING OLD TABLE AS deleted_messages
+    FOR EACH STATEMENT EXECUTE FUNCTION messages_stats_after_delete()
+    """,
+]
+
+POSTGRES_STATS_DROP: List[str] = [
+    "DROP TRIGGER IF EXISTS messages_stats_ad ON messages",
+    "DROP TRIGGER IF EXISTS messages_stats_ai ON messages",
+    "DROP FUNCTION IF EXISTS messages_stats_after_delete()",
+    "DROP FUNCTION IF EXISTS messages_stats_after_insert()",
+]
+
+# 既存データから集計を作り直す
+STATS_BACKFILL = """
+UPDATE sessions SET
+    message_count = (
+        SELECT COUNT(*) FROM messages WHERE messages.session_id = sessions.id
+    ),
+    last_message_at = COALESCE(
+        (SELECT MAX(messages.created_at) FROM messages
+         WHERE messages.session_id = sessions.id),
+        sessions.created_at
+    )
+"""
+
+
+def stats_ddl(dialect: str) -> List[str]:
+    """方言ごとのトリガー作成 DDL"""
+    if dialect == "postgresql":
+        return POSTGRES_STATS_DDL
+    if dialect == "sqlite":
+        return SQLITE_STATS_DDL
+    return []
+
+
+def stats_drop(dialect: str) -> List[str]:
+    """方言ごとのトリガー削除 DDL"""
+    if dialect == "postgresql":
+        return POSTGRES_STATS_DROP
+    if dialect == "sqlite":
+        return SQLITE_STATS_DROP
+    return []
+
+
+def _create_stats_triggers(target: Any, connection: Any, **kw: Any) -> None:
+    # マイグレーション前の既存DB（列がない）ではトリガーを作らない
+    columns = {c["name"] for c in inspect(connection).get_columns("sessions")}
+    if "message_count" not in columns:
+        return
+    for statement in stats_ddl(connection.dialect.name):
+        connection.execute(text(statement))
+
+
+def _drop_stats_triggers(target: Any, connection: Any, **kw: Any) -> None:
+    for statement in stats_drop(connection.dialect.name):
+        connection.execute(text(statement))
+
+
+# create_all / drop_all（開発環境の起動時・テスト）でも作成されるようにする
+event.listen(Base.metadata, "after_create", _create_stats_triggers)
+event.listen(Base.metadata, "before_drop", _drop_stats_triggers)
@@ -0,0 +1,54 @@
+"""
+LLMトークン使用量モデル
+"""
+
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped
+import uuid
+
+from . import Base
+
+
+class UsageRecord(Base):  # type: ignore[valid-type,misc]
+    """LLM呼び出し1回分のトークン使用量"""
+
+    __tablename__ = "llm_usage_records"
+    __table_args__ = (
+        Index("ix_llm_usage_records_session_id", "session_id"),
+        Index(
+            "ix_llm_usage_records_provider_model_created_at",
+            "provider",
+            "model",
+            "created_at",
+        ),
+    )
+
+    id: Mapped[str] = Column(
+        String(36), primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    # セッション削除後も容量計画のため集計値は残す
+    session_id: Mapped[Optional[str]] = Column(
+        String(36), ForeignKey("sessions.id", ondelete="SET NULL"), nullable=True
+    )
+    message_id: Mapped[Optional[str]] = Column(String(36), nullable=True)
+    provider: Mapped[str] = Column(String(50), nullable=False)
+    model: Mapped[str] = Column(String(255), nullable=False)
+
+    prompt_tokens: Mapped[int] = Column(Integer, nullable=False, default=0)
+    completion_tokens: Mapped[int] = Column(Integer, nullable=False, default=0)
+    total_tokens: Mapped[int] = Column(Integer, nullable=False, default=0)
+    cached_tokens: Mapped[int] = Column(Integer, nullable=False, default=0)
+    # 上流が使用量を返さずローカルトークナイザーで推定した場合 True
+    estimated: Mapped[bool] = Column(Boolean, nullable=False, default=False)
+
+    created_at: Mapped[datetime] = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+
+    def __repr__(self):
+        return (
+            f"<UsageRecord(provider={self.provider}, model={self.model}, "
+            f"total_tokens={self.total_tokens})>"
+        )
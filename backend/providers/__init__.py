@@ -6,6 +6,8 @@ from .base import ILLMProvider, LLMResponse, LLMError
 from .factory import LLMProviderFactory
 from .openrouter import OpenRouterProvider
 from .google_ai import GoogleAIProvider
+from .prompt_cache import PromptParts
+from .rate_limit import LLMRateLimitError
 
 __all__ = [
     "ILLMProvider",
@@ -14,4 +16,6 @@ __all__ = [
     "LLMProviderFactory",
     "OpenRouterProvider",
     "GoogleAIProvider",
+    "LLMRateLimitError",
+    "PromptParts",
 ]
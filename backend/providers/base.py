@@ -47,6 +47,7 @@ class ILLMProvider(ABC):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
         **kwargs
     ) -> LLMResponse:
         """テキスト生成"""
@@ -59,6 +60,7 @@ class ILLMProvider(ABC):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
         **kwargs
     ) -> AsyncGenerator[str, None]:
         """ストリーミングテキスト生成"""
@@ -80,6 +82,7 @@ class ILLMProvider(ABC):
             model=model,
             max_tokens=max_tokens,
             temperature=temperature,
+            system_message=system_message,
             **kwargs
         )
         async for content in stream_gen:  # type: ignore
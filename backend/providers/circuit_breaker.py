@@ -0,0 +1,177 @@
+"""
+LLMプロバイダー サーキットブレーカー
+
+プロバイダーごとに直近の呼び出し結果（エラー・低速応答）をスライディングウィンドウで集計し、
+失敗率が閾値を超えたら一定時間 OPEN にして呼び出しを止める。
+待機時間経過後は HALF_OPEN として1リクエストだけ試行し、成功すれば CLOSED に戻す。
+"""
+
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional
+
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
+
+logger = structlog.get_logger(__name__)
+
+
+class CircuitState(Enum):
+    """サーキットブレーカーの状態"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """エラー率・レイテンシに基づくサーキットブレーカー"""
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        slow_call_seconds: float = 20.0,
+    ) -> None:
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+
+        self.state = CircuitState.CLOSED
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        # True = 失敗（エラーまたは低速応答）
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)
+        self.total_failures = 0
+        self.total_successes = 0
+        self.times_opened = 0
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def allow_request(self) -> bool:
+        """呼び出してよいか（HALF_OPEN では同時に1件のみ許可）"""
+        if self.state == CircuitState.CLOSED:
+            return True
+
+        if self.state == CircuitState.OPEN:
+            if (
+                self.opened_at is not None
+                and time.monotonic() - self.opened_at >= self.open_seconds
+            ):
+                self.state = CircuitState.HALF_OPEN
+                logger.info("Circuit half-open, probing provider", provider=self.name)
+            else:
+                return False
+
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """成功を記録（初回応答までの時間 latency が閾値を超えたら失敗として扱う）
+
+        latency を渡さない呼び出し（非ストリーミング生成など）は低速判定しない。
+        """
+        if latency is not None and latency > self.slow_call_seconds:
+            logger.warning(
+                "Slow LLM provider response",
+                provider=self.name,
+                latency=round(latency, 3),
+            )
+            self.record_failure()
+            return
+
+        self.total_successes += 1
+        if self.state == CircuitState.HALF_OPEN:
+            self._close()
+            return
+        self._outcomes.append(False)
+
+    def record_failure(self) -> None:
+        """失敗を記録し、必要であれば OPEN に遷移"""
+        self.total_failures += 1
+        if self.state == CircuitState.HALF_OPEN:
+            self._open()
+            return
+
+        self._outcomes.append(True)
+        if (
+            len(self._outcomes) >= self.min_calls
+            and self.failure_rate >= self.failure_rate_threshold
+        ):
+            self._open()
+
+    def release(self) -> None:
+        """結果を記録せずに終了した呼び出しの試行枠を解放"""
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        self.state = CircuitState.OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.times_opened += 1
+        logger.warning(
+            "Circuit opened for LLM provider",
+            provider=self.name,
+            failure_rate=round(self.failure_rate, 3),
+        )
+
+    def _close(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.opened_at = None
+        self._probe_in_flight = False
+        self._outcomes.clear()
+        logger.info("Circuit closed, provider restored", provider=self.name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """状態と集計値を取得"""
+        return {
+            "state": self.state.value,
+            "failure_rate": round(self.failure_rate, 3),
+            "window_calls": len(self._outcomes),
+            "total_successes": self.total_successes,
+            "total_failures": self.total_failures,
+            "times_opened": self.times_opened,
+        }
+
+
+# プロバイダー名ごとのプロセス共有ブレーカー
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider_name: str) -> CircuitBreaker:
+    """プロバイダーのサーキットブレーカーを取得（未作成なら設定値で作成）"""
+    breaker = _breakers.get(provider_name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            provider_name,
+            failure_rate_threshold=settings.llm_circuit_failure_threshold,
+            window_size=settings.llm_circuit_window_size,
+            min_calls=settings.llm_circuit_min_calls,
+            open_seconds=settings.llm_circuit_open_seconds,
+            slow_call_seconds=settings.llm_circuit_slow_call_seconds,
+        )
+        _breakers[provider_name] = breaker
+    return breaker
+
+
+def get_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """全プロバイダーのブレーカー状態を取得"""
+    return {name: breaker.get_stats() for name, breaker in _breakers.items()}
+
+
+def reset_circuit_breakers() -> None:
+    """全ブレーカーを破棄（テスト用）"""
+    _breakers.clear()
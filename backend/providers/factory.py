@@ -10,6 +10,8 @@ from config import settings  # type: ignore[attr-defined]
 from .mock import MockLLMProvider
 from .openrouter import OpenRouterProvider
 from .google_ai import GoogleAIProvider
+from .health_monitor import get_health_monitor
+from .replay import RecordingLLMProvider, ReplayLLMProvider
 
 logger = structlog.get_logger(__name__)
 
@@ -21,6 +23,7 @@ class LLMProviderFactory:
         "mock": MockLLMProvider,
         "openrouter": OpenRouterProvider,
         "google_ai": GoogleAIProvider,
+        "replay": ReplayLLMProvider,
     }
 
     @classmethod
@@ -59,6 +62,15 @@ class LLMProviderFactory:
                     api_key=settings.google_ai_api_key
                 )
                 return google_provider
+            elif provider_name == "replay":
+                if not settings.llm_replay_path:
+                    logger.warning("LLM replay path not configured")
+                    return None
+                replay_provider: ILLMProvider = provider_class(
+                    path=settings.llm_replay_path,
+                    time_scale=settings.llm_replay_time_scale,
+                )
+                return replay_provider
 
         except Exception as e:
             logger.error(
@@ -70,26 +82,24 @@ class LLMProviderFactory:
 
     @classmethod
     async def get_healthy_provider(cls) -> Optional[ILLMProvider]:
-        """ヘルスチェック済みの利用可能なプロバイダーを取得"""
-        provider_names = cls._get_provider_priority_order()
+        """ヘルスチェック済みの利用可能なプロバイダーを取得
 
-        for provider_name in provider_names:
-            try:
-                provider = cls.create_provider(provider_name)
-                if provider and await cls._health_check_provider(provider):
-                    logger.info("Selected healthy provider", provider=provider_name)
-                    return provider
-                else:
-                    logger.warning(
-                        "Provider health check failed", provider=provider_name
-                    )
-            except Exception as e:
-                logger.error(
-                    "Provider initialization failed",
-                    provider=provider_name,
-                    error=str(e),
-                )
+        上流へは問い合わせず、バックグラウンドモニターのキャッシュを参照する。
+        """
+        monitor = get_health_monitor()
+
+        for provider_name in cls._get_provider_priority_order():
+            if provider_name == "mock":
+                continue
+            if not cls.is_provider_configured(provider_name):
                 continue
+            if not monitor.is_healthy(provider_name):
+                logger.warning("Provider marked unhealthy", provider=provider_name)
+                continue
+            provider = cls.create_provider(provider_name)
+            if provider:
+                logger.info("Selected healthy provider", provider=provider_name)
+                return provider
 
         logger.error("No healthy providers available, falling back to mock")
         return MockLLMProvider()
@@ -108,6 +118,42 @@ class LLMProviderFactory:
         logger.warning("No providers available, falling back to mock")
         return "mock"
 
+    @classmethod
+    def create_provider_chain(cls) -> List[ILLMProvider]:
+        """優先順位順のフェイルオーバー用プロバイダーリストを作成
+
+        実プロバイダーが1つでも利用可能な場合、モックは含めない。
+        """
+        order = cls._get_provider_priority_order()
+        if order[0] == "mock":
+            # プライマリに明示的にモックが指定されている場合（開発環境）
+            return [MockLLMProvider()]
+
+        chain: List[ILLMProvider] = []
+        for provider_name in order:
+            if provider_name == "mock":
+                continue
+            provider = cls.create_provider(provider_name)
+            if provider and cls._is_provider_available(provider, provider_name):
+                chain.append(cls._with_recording(provider))
+
+        if not chain:
+            logger.warning("No providers available, falling back to mock")
+            chain.append(MockLLMProvider())
+
+        logger.info(
+            "Provider failover chain",
+            providers=[provider.provider_name for provider in chain],
+        )
+        return chain
+
+    @staticmethod
+    def _with_recording(provider: ILLMProvider) -> ILLMProvider:
+        """LLM_RECORD_PATH 設定時は実プロバイダーの応答を記録するラッパーで包む"""
+        if not settings.llm_record_path or isinstance(provider, ReplayLLMProvider):
+            return provider
+        return RecordingLLMProvider(provider, settings.llm_record_path)
+
     @classmethod
     def _get_provider_priority_order(cls) -> List[str]:
         """プロバイダーの優先順位リストを取得"""
@@ -138,11 +184,9 @@ class LLMProviderFactory:
         try:
             # タイムアウト付きでヘルスチェック実行
             health_result = await asyncio.wait_for(provider.health_check(), timeout=5.0)
-            return (
-                health_result.get("status") == "ok"
-                if isinstance(health_result, dict)
-                else False
-            )
+            if isinstance(health_result, dict):
+                return health_result.get("status") == "ok"
+            return bool(health_result)
         except asyncio.TimeoutError:
             logger.warning("Provider health check timeout")
             return False
@@ -158,6 +202,11 @@ class LLMProviderFactory:
         if not provider:
             return False
 
+        return cls.is_provider_configured(provider_name)
+
+    @classmethod
+    def is_provider_configured(cls, provider_name: str) -> bool:
+        """プロバイダーの利用設定（APIキー）が揃っているか（インスタンス化しない）"""
         if provider_name == "mock":
             return True
 
@@ -166,6 +215,8 @@ class LLMProviderFactory:
             return bool(settings.openrouter_api_key)
         elif provider_name == "google_ai":
             return bool(settings.google_ai_api_key)
+        elif provider_name == "replay":
+            return bool(settings.llm_replay_path)
 
         return False
 
@@ -178,9 +229,9 @@ class LLMProviderFactory:
             "available_providers": cls.get_available_providers(),
             "priority_order": cls._get_provider_priority_order(),
             "provider_status": {
-                name: cls._is_provider_available(cls.create_provider(name), name)
-                for name in cls._providers.keys()
+                name: cls.is_provider_configured(name) for name in cls._providers.keys()
             },
+            "provider_health": get_health_monitor().get_snapshot(),
         }
 
     @staticmethod
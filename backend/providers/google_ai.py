@@ -3,11 +3,16 @@ Google AI Studio プロバイダー実装
 """
 
 import httpx
-from typing import AsyncGenerator, Optional
-import json
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, Optional
 import structlog
 
 from .base import ILLMProvider, LLMResponse, LLMError
+from .prompt_cache import extract_cache_usage
+from .rate_limit import acquire_rate_limit
+from .retry import get_retry_policy, send_with_retry, stream_with_retry
+from .sse import batch_deltas, iter_sse_json
+from .transport import get_http_client, stream_timeout
 
 logger = structlog.get_logger(__name__)
 
@@ -18,7 +23,9 @@ class GoogleAIProvider(ILLMProvider):
     def __init__(self, api_key: str, **kwargs):
         super().__init__(api_key, **kwargs)
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
-        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
+        # 上流ホスト単位でプロセス共有される接続プール付きクライアント
+        self.client = get_http_client(self.base_url)
+        self.retry_policy = get_retry_policy()
 
     @property
     def provider_name(self) -> str:
@@ -34,24 +41,34 @@ class GoogleAIProvider(ILLMProvider):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
         **kwargs,
     ) -> LLMResponse:
         """テキスト生成"""
+        await acquire_rate_limit(
+            self.provider_name,
+            model or self.default_model,
+            prompt,
+            max_tokens,
+            system_message,
+        )
         try:
             model_name = model or self.default_model
-            url = f"/models/{model_name}:generateContent"
+            url = f"{self.base_url}/models/{model_name}:generateContent"
 
-            payload = {
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {
-                    "maxOutputTokens": max_tokens or 1000,
-                    "temperature": temperature or 0.7,
-                },
-            }
+            payload = self._build_payload(
+                prompt, system_message, max_tokens, temperature
+            )
 
             params = {"key": self.api_key}
-            response = await self.client.post(url, json=payload, params=params)
-            response.raise_for_status()
+            response = await send_with_retry(
+                self.client,
+                "POST",
+                url,
+                json=payload,
+                params=params,
+                policy=self.retry_policy,
+            )
 
             data = response.json()
 
@@ -60,12 +77,17 @@ class GoogleAIProvider(ILLMProvider):
 
             content = data["candidates"][0]["content"]["parts"][0]["text"]
 
+            metadata: Dict[str, Any] = {"response_id": data.get("modelVersion")}
+            prompt_cache = extract_cache_usage(data.get("usageMetadata"))
+            if prompt_cache:
+                metadata["prompt_cache"] = prompt_cache
+
             return LLMResponse(
                 content=content,
                 provider=self.provider_name,
                 model=model_name,
                 usage=data.get("usageMetadata"),
-                metadata={"response_id": data.get("modelVersion")},
+                metadata=metadata,
             )
 
         except httpx.HTTPStatusError as e:
@@ -85,44 +107,42 @@ class GoogleAIProvider(ILLMProvider):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
         **kwargs,
     ) -> AsyncGenerator[str, None]:
-        """ストリーミングテキスト生成"""
+        """ストリーミングテキスト生成（usage を渡すと最終チャンクの使用量を格納）"""
+        await acquire_rate_limit(
+            self.provider_name,
+            model or self.default_model,
+            prompt,
+            max_tokens,
+            system_message,
+        )
         try:
             model_name = model or self.default_model
-            url = f"/models/{model_name}:streamGenerateContent"
+            url = f"{self.base_url}/models/{model_name}:streamGenerateContent"
 
-            payload = {
-                "contents": [{"parts": [{"text": prompt}]}],
-                "generationConfig": {
-                    "maxOutputTokens": max_tokens or 1000,
-                    "temperature": temperature or 0.7,
-                },
-            }
+            payload = self._build_payload(
+                prompt, system_message, max_tokens, temperature
+            )
 
-            params = {"key": self.api_key}
+            # alt=sse で JSON 配列ではなく SSE イベントとして受信
+            params = {"key": self.api_key, "alt": "sse"}
 
-            async with self.client.stream(
-                "POST", url, json=payload, params=params
+            async with stream_with_retry(
+                self.client,
+                "POST",
+                url,
+                json=payload,
+                params=params,
+                timeout=stream_timeout(),
+                policy=self.retry_policy,
             ) as response:
-                response.raise_for_status()
-
-                async for line in response.aiter_lines():
-                    if line.strip():
-                        try:
-                            data = json.loads(line)
-                            if "candidates" in data and len(data["candidates"]) > 0:
-                                candidate = data["candidates"][0]
-                                if (
-                                    "content" in candidate
-                                    and "parts" in candidate["content"]
-                                ):
-                                    for part in candidate["content"]["parts"]:
-                                        if "text" in part:
-                                            text_content: str = part["text"]
-                                            yield text_content
-                        except json.JSONDecodeError:
-                            continue
+                async for text_content in batch_deltas(
+                    self._iter_deltas(response, usage)
+                ):
+                    yield text_content
 
         except httpx.HTTPStatusError as e:
             logger.error(
@@ -142,27 +162,87 @@ class GoogleAIProvider(ILLMProvider):
         temperature: Optional[float] = None,
         **kwargs,
     ) -> AsyncGenerator[LLMResponse, None]:
-        """ストリーミングレスポンス生成"""
-        async for content in self.stream_generate(
+        """ストリーミングレスポンス生成（使用量は本文なしの最終レスポンスで返す）"""
+        usage: Dict[str, Any] = {}
+        deltas = self.stream_generate(
             prompt=prompt,
+            system_message=system_message,
             model=model,
             max_tokens=max_tokens,
             temperature=temperature,
-            **kwargs,
-        ):
+            usage=usage,
+        )
+        async with aclosing(deltas):
+            async for content in deltas:
+                yield LLMResponse(
+                    content=content,
+                    provider=self.provider_name,
+                    model=model or self.default_model,
+                    usage=None,
+                    metadata={"chunk": True},
+                )
+
+        if usage:
+            metadata: Dict[str, Any] = {"chunk": True, "final": True}
+            prompt_cache = extract_cache_usage(usage)
+            if prompt_cache:
+                metadata["prompt_cache"] = prompt_cache
             yield LLMResponse(
-                content=content,
+                content="",
                 provider=self.provider_name,
                 model=model or self.default_model,
-                usage=None,
-                metadata={"chunk": True},
+                usage=usage,
+                metadata=metadata,
             )
 
+    @staticmethod
+    def _build_payload(
+        prompt: str,
+        system_message: Optional[str],
+        max_tokens: Optional[int],
+        temperature: Optional[float],
+    ) -> Dict[str, Any]:
+        """リクエストボディ作成
+
+        Gemini は共通プレフィックスを暗黙的にキャッシュするため、
+        安定した指示文は systemInstruction として contents より前に置く。
+        """
+        payload: Dict[str, Any] = {
+            "contents": [{"parts": [{"text": str(prompt)}]}],
+            "generationConfig": {
+                "maxOutputTokens": max_tokens or 1000,
+                "temperature": 0.7 if temperature is None else temperature,
+            },
+        }
+        if system_message:
+            payload["systemInstruction"] = {"parts": [{"text": str(system_message)}]}
+        return payload
+
+    @staticmethod
+    async def _iter_deltas(
+        response: httpx.Response, usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[str, None]:
+        """SSE イベントからテキスト差分を取り出す（使用量は usage に格納）"""
+        async for data in iter_sse_json(response):
+            # usageMetadata は累計値のため最後のイベントの値が最終使用量
+            if usage is not None and data.get("usageMetadata"):
+                usage.update(data["usageMetadata"])
+            candidates = data.get("candidates")
+            if not candidates:
+                continue
+            for part in candidates[0].get("content", {}).get("parts", []):
+                text = part.get("text")
+                if text:
+                    yield text
+
     async def is_available(self) -> bool:
         """プロバイダーが利用可能かチェック"""
         try:
             # Google AI APIの場合、モデル一覧取得でヘルスチェック
-            response = await self.client.get(f"/models/{self.default_model}")
+            response = await self.client.get(
+                f"{self.base_url}/models/{self.default_model}",
+                params={"key": self.api_key},
+            )
             return bool(response.status_code == 200)
         except Exception:
             return False
@@ -175,4 +255,5 @@ class GoogleAIProvider(ILLMProvider):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        # 共有クライアントはアプリケーション終了時にまとめてクローズする
+        pass
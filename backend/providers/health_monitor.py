@@ -0,0 +1,148 @@
+"""
+LLMプロバイダー バックグラウンドヘルスモニター
+
+設定済みプロバイダーを一定間隔で軽量リクエストにより並列プローブし、
+結果をタイムスタンプ付きでキャッシュする。
+プロバイダー選択や /health はキャッシュを O(1) で参照するだけで、上流へは問い合わせない。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
+from .base import ILLMProvider
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class ProviderHealth:
+    """プロバイダーの直近のヘルスチェック結果"""
+
+    provider: str
+    healthy: Optional[bool] = None
+    checked_at: Optional[datetime] = None
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    consecutive_failures: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "latency_ms": self.latency_ms,
+            "error": self.error,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ProviderHealthMonitor:
+    """設定済みプロバイダーを定期プローブするモニター"""
+
+    def __init__(self, interval: float = 30.0, timeout: float = 5.0) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self._providers: Dict[str, ILLMProvider] = {}
+        self._health: Dict[str, ProviderHealth] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _load_providers(self) -> None:
+        """プローブ対象（APIキー設定済みの実プロバイダー）を一度だけ生成"""
+        from .factory import LLMProviderFactory
+
+        for name in LLMProviderFactory._get_provider_priority_order():
+            if name == "mock" or name in self._providers:
+                continue
+            if not LLMProviderFactory.is_provider_configured(name):
+                continue
+            provider = LLMProviderFactory.create_provider(name)
+            if provider is not None:
+                self._providers[name] = provider
+                self._health.setdefault(name, ProviderHealth(provider=name))
+
+    async def _probe(self, name: str, provider: ILLMProvider) -> None:
+        health = self._health.setdefault(name, ProviderHealth(provider=name))
+        started_at = time.monotonic()
+        try:
+            healthy = bool(
+                await asyncio.wait_for(provider.health_check(), timeout=self.timeout)
+            )
+            error = None if healthy else "health check returned unhealthy"
+        except asyncio.TimeoutError:
+            healthy, error = False, f"timeout after {self.timeout:.1f}s"
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        if healthy != health.healthy:
+            log = logger.info if healthy else logger.warning
+            log("LLM provider health changed", provider=name, healthy=healthy)
+
+        health.healthy = healthy
+        health.error = error
+        health.checked_at = datetime.now(timezone.utc)
+        health.latency_ms = round((time.monotonic() - started_at) * 1000, 1)
+        health.consecutive_failures = 0 if healthy else health.consecutive_failures + 1
+
+    async def probe_all(self) -> None:
+        """全プロバイダーを並列にプローブ"""
+        self._load_providers()
+        await asyncio.gather(
+            *(self._probe(name, provider) for name, provider in self._providers.items())
+        )
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error("LLM provider health probe failed", error=str(e))
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """バックグラウンドプローブを開始"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Started LLM provider health monitor", interval=self.interval)
+
+    async def stop(self) -> None:
+        """バックグラウンドプローブを停止"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def get_health(self, name: str) -> Optional[ProviderHealth]:
+        """キャッシュ済みのヘルス情報（未プローブなら None）"""
+        return self._health.get(name)
+
+    def is_healthy(self, name: str) -> bool:
+        """キャッシュ上で利用可能か（未確認のプロバイダーは利用可能とみなす）"""
+        health = self._health.get(name)
+        return health is None or health.healthy is not False
+
+    def get_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """全プロバイダーのキャッシュ済みヘルス情報"""
+        return {name: health.to_dict() for name, health in self._health.items()}
+
+
+_health_monitor: Optional[ProviderHealthMonitor] = None
+
+
+def get_health_monitor() -> ProviderHealthMonitor:
+    """プロセス共有のヘルスモニターを取得"""
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = ProviderHealthMonitor(
+            interval=settings.llm_health_check_interval,
+            timeout=settings.llm_health_check_timeout,
+        )
+    return _health_monitor
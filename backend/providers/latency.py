@@ -0,0 +1,103 @@
+"""
+LLMプロバイダー レイテンシ計測
+
+プロバイダー×モデルごとに初回トークンまでの時間（TTFT）とスループットを
+指数移動平均（EWMA）で保持し、ルーティングとヘッジ要求の判断に使う。
+"""
+
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from config import settings  # type: ignore[attr-defined]
+
+# p95 算出に使う直近サンプル数
+_SAMPLE_WINDOW = 100
+
+
+class LatencyStats:
+    """1プロバイダー×モデルのレイテンシ統計"""
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self.alpha = alpha
+        self.ewma_ttft: Optional[float] = None
+        self.ewma_throughput: Optional[float] = None
+        self.ttft_samples: Deque[float] = deque(maxlen=_SAMPLE_WINDOW)
+        self.streams = 0
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return self.alpha * value + (1 - self.alpha) * current
+
+    def record_ttft(self, seconds: float) -> None:
+        """初回トークンまでの時間を記録"""
+        self.ewma_ttft = self._ewma(self.ewma_ttft, seconds)
+        self.ttft_samples.append(seconds)
+        self.streams += 1
+
+    def record_throughput(self, chars_per_second: float) -> None:
+        """初回トークン以降の生成速度（文字/秒）を記録"""
+        self.ewma_throughput = self._ewma(self.ewma_throughput, chars_per_second)
+
+    def p95_ttft(self, min_samples: int) -> Optional[float]:
+        """直近サンプルの TTFT p95（サンプル不足なら None）"""
+        if len(self.ttft_samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self.ttft_samples)
+        index = max(0, math.ceil(len(ordered) * 0.95) - 1)
+        return ordered[index]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ewma_ttft": (
+                round(self.ewma_ttft, 4) if self.ewma_ttft is not None else None
+            ),
+            "ewma_throughput": (
+                round(self.ewma_throughput, 2)
+                if self.ewma_throughput is not None
+                else None
+            ),
+            "p95_ttft": self.p95_ttft(1),
+            "streams": self.streams,
+        }
+
+
+class LatencyTracker:
+    """プロバイダー×モデル単位のレイテンシ統計の集合"""
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self.alpha = alpha
+        self._stats: Dict[str, LatencyStats] = {}
+
+    @staticmethod
+    def key(provider: str, model: str) -> str:
+        return f"{provider}/{model}"
+
+    def get(self, provider: str, model: str) -> LatencyStats:
+        key = self.key(provider, model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = LatencyStats(self.alpha)
+            self._stats[key] = stats
+        return stats
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {key: stats.get_stats() for key, stats in self._stats.items()}
+
+
+_latency_tracker: Optional[LatencyTracker] = None
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """プロセス共有のレイテンシトラッカーを取得"""
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = LatencyTracker(alpha=settings.llm_latency_ewma_alpha)
+    return _latency_tracker
+
+
+def reset_latency_tracker() -> None:
+    """統計を破棄（テスト用）"""
+    global _latency_tracker
+    _latency_tracker = None
@@ -2,11 +2,12 @@
 テスト用モックLLMプロバイダー
 """
 
-from typing import AsyncGenerator, Optional
+from typing import AsyncGenerator, List, Optional
 import asyncio
 import structlog
 
 from .base import ILLMProvider, LLMResponse, LLMError
+from .tokenizer import estimate_usage
 
 logger = structlog.get_logger(__name__)
 
@@ -33,6 +34,7 @@ class MockLLMProvider(ILLMProvider):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
         **kwargs,
     ) -> LLMResponse:
         """モックテキスト生成"""
@@ -48,10 +50,7 @@ class MockLLMProvider(ILLMProvider):
             content=mock_content,
             provider=self.provider_name,
             model=model or self.default_model,
-            usage={
-                "prompt_tokens": len(prompt),
-                "completion_tokens": len(mock_content),
-            },
+            usage=estimate_usage(prompt, mock_content, system_message),
             metadata={"mock": True, "response_id": "mock_123"},
         )
 
@@ -61,6 +60,7 @@ class MockLLMProvider(ILLMProvider):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
         **kwargs,
     ) -> AsyncGenerator[str, None]:
         """モックストリーミングテキスト生成"""
@@ -87,13 +87,16 @@ class MockLLMProvider(ILLMProvider):
         **kwargs,
     ) -> AsyncGenerator[LLMResponse, None]:
         """モックストリーミングレスポンス生成"""
+        parts: List[str] = []
         async for content in self.stream_generate(
             prompt=prompt,
             model=model,
             max_tokens=max_tokens,
             temperature=temperature,
+            system_message=system_message,
             **kwargs,
         ):
+            parts.append(content)
             yield LLMResponse(
                 content=content,
                 provider=self.provider_name,
@@ -102,6 +105,15 @@ class MockLLMProvider(ILLMProvider):
                 metadata={"chunk": True, "mock": True},
             )
 
+        # 実プロバイダーと同様に最終チャンクで使用量を返す
+        yield LLMResponse(
+            content="",
+            provider=self.provider_name,
+            model=model or self.default_model,
+            usage=estimate_usage(prompt, "".join(parts), system_message),
+            metadata={"chunk": True, "mock": True, "final": True},
+        )
+
     async def is_available(self) -> bool:
         """プロバイダーが利用可能かチェック"""
         return True  # モックは常に利用可能
@@ -3,11 +3,20 @@ OpenRouter LLMプロバイダー実装
 """
 
 import httpx
-from typing import AsyncGenerator, Optional
-import json
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Dict, List, Optional
 import structlog
 
 from .base import ILLMProvider, LLMResponse, LLMError
+from .prompt_cache import (
+    build_message_content,
+    extract_cache_usage,
+    supports_cache_control,
+)
+from .rate_limit import acquire_rate_limit
+from .retry import get_retry_policy, send_with_retry, stream_with_retry
+from .sse import batch_deltas, iter_sse_json
+from .transport import get_http_client, stream_timeout
 
 logger = structlog.get_logger(__name__)
 
@@ -17,17 +26,16 @@ class OpenRouterProvider(ILLMProvider):
 
     def __init__(self, api_key: str, base_url: str, **kwargs):
         super().__init__(api_key, **kwargs)
-        self.base_url = base_url
-        self.client = httpx.AsyncClient(
-            base_url=base_url,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "HTTP-Referer": "https://qrai.app",  # OpenRouter要件
-                "X-Title": "QRAI MVP",
-            },
-            timeout=30.0,
-        )
+        self.base_url = base_url.rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://qrai.app",  # OpenRouter要件
+            "X-Title": "QRAI MVP",
+        }
+        # 上流ホスト単位でプロセス共有される接続プール付きクライアント
+        self.client = get_http_client(self.base_url)
+        self.retry_policy = get_retry_policy()
 
     @property
     def provider_name(self) -> str:
@@ -43,30 +51,51 @@ class OpenRouterProvider(ILLMProvider):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
         **kwargs,
     ) -> LLMResponse:
         """テキスト生成"""
+        await acquire_rate_limit(
+            self.provider_name,
+            model or self.default_model,
+            prompt,
+            max_tokens,
+            system_message,
+        )
         try:
             payload = {
                 "model": model or self.default_model,
-                "messages": [{"role": "user", "content": prompt}],
+                "messages": self._build_messages(
+                    prompt, system_message, model or self.default_model
+                ),
                 "max_tokens": max_tokens or 1000,
-                "temperature": temperature or 0.7,
+                "temperature": 0.7 if temperature is None else temperature,
                 "stream": False,
             }
 
-            response = await self.client.post("/chat/completions", json=payload)
-            response.raise_for_status()
+            response = await send_with_retry(
+                self.client,
+                "POST",
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                headers=self.headers,
+                policy=self.retry_policy,
+            )
 
             data = response.json()
             content = data["choices"][0]["message"]["content"]
 
+            metadata: Dict[str, Any] = {"response_id": data.get("id")}
+            prompt_cache = extract_cache_usage(data.get("usage"))
+            if prompt_cache:
+                metadata["prompt_cache"] = prompt_cache
+
             return LLMResponse(
                 content=content,
                 provider=self.provider_name,
                 model=model or self.default_model,
                 usage=data.get("usage"),
-                metadata={"response_id": data.get("id")},
+                metadata=metadata,
             )
 
         except httpx.HTTPStatusError as e:
@@ -89,61 +118,41 @@ class OpenRouterProvider(ILLMProvider):
         temperature: Optional[float] = None,
         **kwargs,
     ) -> AsyncGenerator[LLMResponse, None]:
-        """ストリーミングレスポンス生成（LLMServiceインターフェース準拠）"""
-        try:
-            # システムメッセージと組み合わせたメッセージリスト作成
-            messages = []
-            if system_message:
-                messages.append({"role": "system", "content": system_message})
-            messages.append({"role": "user", "content": prompt})
-
-            payload = {
-                "model": model or self.default_model,
-                "messages": messages,
-                "max_tokens": max_tokens or 1000,
-                "temperature": temperature or 0.7,
-                "stream": True,
-            }
+        """ストリーミングレスポンス生成（LLMServiceインターフェース準拠）
 
-            async with self.client.stream(
-                "POST", "/chat/completions", json=payload
-            ) as response:
-                response.raise_for_status()
-
-                full_content = ""
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data_str = line[6:]  # "data: " を除去
-                        if data_str.strip() == "[DONE]":
-                            break
-
-                        try:
-                            data = json.loads(data_str)
-                            if "choices" in data and len(data["choices"]) > 0:
-                                delta = data["choices"][0].get("delta", {})
-                                if "content" in delta:
-                                    content: str = delta["content"]
-                                    full_content += content
-
-                                    # LLMResponseとして返却
-                                    yield LLMResponse(
-                                        content=content,
-                                        provider=self.provider_name,
-                                        model=model or self.default_model,
-                                        usage=None,  # ストリーミング中は使用量不明
-                                        metadata={"chunk": True},
-                                    )
-                        except json.JSONDecodeError:
-                            continue
+        上流が最終チャンクで返す使用量は、本文なしの最終レスポンスとして返す。
+        """
+        usage: Dict[str, Any] = {}
+        deltas = self.stream_generate(
+            prompt,
+            system_message=system_message,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            usage=usage,
+        )
+        async with aclosing(deltas):
+            async for content in deltas:
+                yield LLMResponse(
+                    content=content,
+                    provider=self.provider_name,
+                    model=model or self.default_model,
+                    usage=None,  # ストリーミング中は使用量不明
+                    metadata={"chunk": True},
+                )
 
-        except httpx.HTTPStatusError as e:
-            logger.error(
-                "OpenRouter streaming HTTP error", status_code=e.response.status_code
+        if usage:
+            metadata: Dict[str, Any] = {"chunk": True, "final": True}
+            prompt_cache = extract_cache_usage(usage)
+            if prompt_cache:
+                metadata["prompt_cache"] = prompt_cache
+            yield LLMResponse(
+                content="",
+                provider=self.provider_name,
+                model=model or self.default_model,
+                usage=usage,
+                metadata=metadata,
             )
-            raise LLMError(f"OpenRouter streaming error: {e.response.status_code}")
-        except Exception as e:
-            logger.error("OpenRouter streaming unexpected error", error=str(e))
-            raise LLMError(f"OpenRouter streaming error: {str(e)}")
 
     async def stream_generate(  # type: ignore[override]
         self,
@@ -151,38 +160,42 @@ class OpenRouterProvider(ILLMProvider):
         model: Optional[str] = None,
         max_tokens: Optional[int] = None,
         temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
         **kwargs,
     ) -> AsyncGenerator[str, None]:
-        """ストリーミングテキスト生成"""
+        """ストリーミングテキスト生成（usage を渡すと最終チャンクの使用量を格納）"""
+        await acquire_rate_limit(
+            self.provider_name,
+            model or self.default_model,
+            prompt,
+            max_tokens,
+            system_message,
+        )
         try:
             payload = {
                 "model": model or self.default_model,
-                "messages": [{"role": "user", "content": prompt}],
+                "messages": self._build_messages(
+                    prompt, system_message, model or self.default_model
+                ),
                 "max_tokens": max_tokens or 1000,
-                "temperature": temperature or 0.7,
+                "temperature": 0.7 if temperature is None else temperature,
                 "stream": True,
+                # 最終チャンクで実際の使用量を返させる
+                "usage": {"include": True},
             }
 
-            async with self.client.stream(
-                "POST", "/chat/completions", json=payload
+            async with stream_with_retry(
+                self.client,
+                "POST",
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                headers=self.headers,
+                timeout=stream_timeout(),
+                policy=self.retry_policy,
             ) as response:
-                response.raise_for_status()
-
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data_str = line[6:]  # "data: " を除去
-                        if data_str.strip() == "[DONE]":
-                            break
-
-                        try:
-                            data = json.loads(data_str)
-                            if "choices" in data and len(data["choices"]) > 0:
-                                delta = data["choices"][0].get("delta", {})
-                                if "content" in delta:
-                                    content: str = delta["content"]
-                                    yield content
-                        except json.JSONDecodeError:
-                            continue
+                async for content in batch_deltas(self._iter_deltas(response, usage)):
+                    yield content
 
         except httpx.HTTPStatusError as e:
             logger.error(
@@ -193,10 +206,46 @@ class OpenRouterProvider(ILLMProvider):
             logger.error("OpenRouter streaming unexpected error", error=str(e))
             raise LLMError(f"OpenRouter streaming error: {str(e)}")
 
+    @staticmethod
+    def _build_messages(
+        prompt: str, system_message: Optional[str], model: str
+    ) -> List[Dict[str, Any]]:
+        """メッセージリスト作成（対応モデルでは安定プレフィックスにキャッシュ制御を付与）"""
+        cache_control = supports_cache_control(model)
+        messages: List[Dict[str, Any]] = []
+        if system_message:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": build_message_content(system_message, cache_control),
+                }
+            )
+        messages.append(
+            {"role": "user", "content": build_message_content(prompt, cache_control)}
+        )
+        return messages
+
+    @staticmethod
+    async def _iter_deltas(
+        response: httpx.Response, usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncGenerator[str, None]:
+        """SSE イベントからテキスト差分を取り出す（使用量は usage に格納）"""
+        async for data in iter_sse_json(response):
+            if usage is not None and data.get("usage"):
+                usage.update(data["usage"])
+            choices = data.get("choices")
+            if choices:
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+
     async def is_available(self) -> bool:
         """プロバイダーが利用可能かチェック"""
         try:
-            response = await self.client.get("/models")
+            # モデル一覧（大きなレスポンス）ではなくAPIキー情報で疎通確認
+            response = await self.client.get(
+                f"{self.base_url}/auth/key", headers=self.headers
+            )
             return bool(response.status_code == 200)
         except Exception:
             return False
@@ -209,4 +258,5 @@ class OpenRouterProvider(ILLMProvider):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.client.aclose()
+        # 共有クライアントはアプリケーション終了時にまとめてクローズする
+        pass
@@ -0,0 +1,107 @@
+"""
+プロンプトキャッシュ支援
+
+プロンプトをリクエスト間で共通の安定プレフィックスと可変サフィックスに分け、
+上流が対応している場合はプレフィックスにキャッシュ制御ヒントを付与する。
+上流が返すキャッシュ利用量を正規化し、ヒット率として集計する。
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+from config import settings  # type: ignore[attr-defined]
+
+
+class PromptParts(str):
+    """安定プレフィックスと可変サフィックスに分割されたプロンプト
+
+    str のサブクラスなので、分割を意識しない箇所では連結済みの文字列として扱える。
+    """
+
+    prefix: str
+    suffix: str
+
+    def __new__(cls, prefix: str, suffix: str = "") -> "PromptParts":
+        obj = super().__new__(cls, prefix + suffix)
+        obj.prefix = prefix
+        obj.suffix = suffix
+        return obj
+
+
+def supports_cache_control(model: str) -> bool:
+    """明示的なキャッシュ制御ヒント（cache_control）に対応するモデルか"""
+    return settings.llm_prompt_cache_enabled and model.startswith("anthropic/")
+
+
+def build_message_content(
+    text: str, cache_control: bool
+) -> Union[str, List[Dict[str, Any]]]:
+    """OpenAI互換メッセージの content を構築（プレフィックスにキャッシュ制御を付与）"""
+    if not cache_control or not isinstance(text, PromptParts) or not text.prefix:
+        return str(text)
+
+    parts: List[Dict[str, Any]] = [
+        {
+            "type": "text",
+            "text": text.prefix,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    if text.suffix:
+        parts.append({"type": "text", "text": text.suffix})
+    return parts
+
+
+def _first_present(*values: Any) -> Optional[Any]:
+    """None でない最初の値"""
+    return next((value for value in values if value is not None), None)
+
+
+def extract_cache_usage(usage: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """上流の使用量からキャッシュ読み取りトークン数とヒット率を取り出す
+
+    OpenAI互換（prompt_tokens_details.cached_tokens）、Anthropic
+    （cache_read_input_tokens）、Google（cachedContentTokenCount）に対応する。
+    """
+    if not usage:
+        return None
+
+    prompt_tokens = (
+        _first_present(usage.get("prompt_tokens"), usage.get("promptTokenCount")) or 0
+    )
+    details = usage.get("prompt_tokens_details") or {}
+    # 0（キャッシュミス）も報告値として扱うため、最初に存在するキーを使う
+    cached_tokens = _first_present(
+        details.get("cached_tokens"),
+        usage.get("cache_read_input_tokens"),
+        usage.get("cachedContentTokenCount"),
+    )
+    if cached_tokens is None:
+        return None
+
+    _record(int(prompt_tokens), int(cached_tokens))
+    return {
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "hit_rate": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+    }
+
+
+# プロセス全体のキャッシュ利用統計
+_stats: Dict[str, int] = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+
+
+def _record(prompt_tokens: int, cached_tokens: int) -> None:
+    _stats["requests"] += 1
+    _stats["prompt_tokens"] += prompt_tokens
+    _stats["cached_tokens"] += cached_tokens
+
+
+def get_prompt_cache_stats() -> Dict[str, Any]:
+    """キャッシュ利用統計（トークン単位のヒット率）を取得"""
+    prompt_tokens = _stats["prompt_tokens"]
+    return {
+        **_stats,
+        "hit_rate": (
+            round(_stats["cached_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+        ),
+    }
@@ -0,0 +1,229 @@
+"""
+LLMプロバイダー クライアント側レート制限
+
+プロバイダー×モデルごとにリクエスト数・トークン数の2軸トークンバケットを持ち、
+待機中のリクエストは到着順（FIFO）に公平に受け付ける。
+最大待機時間を超える見込みのリクエストは LLMRateLimitError で即座に拒否する。
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
+from .base import LLMError
+from .tokenizer import count_tokens
+
+logger = structlog.get_logger(__name__)
+
+
+class LLMRateLimitError(LLMError):
+    """クライアント側レート制限の待機上限超過エラー"""
+
+    pass
+
+
+class TokenBucket:
+    """一定レートで補充されるトークンバケット"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(capacity or rate_per_minute)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+        self.updated_at = now
+
+    def time_until_available(self, amount: float, now: float) -> float:
+        """指定量を消費できるまでの待ち時間（秒）"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate_per_second
+
+    def consume(self, amount: float) -> None:
+        """指定量を消費（呼び出し前に time_until_available で確認すること）"""
+        self.tokens -= min(amount, self.capacity)
+
+
+@dataclass
+class _LimiterState:
+    """プロバイダー×モデルごとの制限状態とメトリクス"""
+
+    requests: TokenBucket
+    tokens: Optional[TokenBucket]
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    total_wait_seconds: float = 0.0
+
+
+class RateLimiter:
+    """プロバイダー×モデル単位の非同期レートリミッター"""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int = 0,
+        burst: Optional[int] = None,
+        max_wait: float = 30.0,
+    ) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.burst = burst
+        self.max_wait = max_wait
+        self._states: Dict[Tuple[str, str], _LimiterState] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.requests_per_minute > 0 or self.tokens_per_minute > 0
+
+    def _get_state(self, provider: str, model: str) -> _LimiterState:
+        key = (provider, model)
+        state = self._states.get(key)
+        if state is None:
+            state = _LimiterState(
+                requests=TokenBucket(
+                    max(self.requests_per_minute, 1), capacity=self.burst
+                ),
+                tokens=(
+                    TokenBucket(self.tokens_per_minute)
+                    if self.tokens_per_minute > 0
+                    else None
+                ),
+            )
+            self._states[key] = state
+        return state
+
+    def _time_until_admitted(self, state: _LimiterState, tokens: int) -> float:
+        now = time.monotonic()
+        wait = (
+            state.requests.time_until_available(1, now)
+            if self.requests_per_minute > 0
+            else 0.0
+        )
+        if state.tokens is not None and tokens > 0:
+            wait = max(wait, state.tokens.time_until_available(tokens, now))
+        return wait
+
+    async def acquire(self, provider: str, model: str, tokens: int = 0) -> None:
+        """リクエストの送信枠を取得（待機上限を超える場合は LLMRateLimitError）"""
+        if not self.enabled:
+            return
+
+        state = self._get_state(provider, model)
+        started_at = time.monotonic()
+        deadline = started_at + self.max_wait
+
+        state.queue_depth += 1
+        state.max_queue_depth = max(state.max_queue_depth, state.queue_depth)
+        try:
+            # ロックは到着順に取得されるため、先頭のリクエストだけが枠を待つ
+            try:
+                await asyncio.wait_for(state.lock.acquire(), timeout=self.max_wait)
+            except asyncio.TimeoutError:
+                self._reject(state, provider, model)
+
+            try:
+                while True:
+                    wait = self._time_until_admitted(state, tokens)
+                    if wait <= 0:
+                        break
+                    if time.monotonic() + wait > deadline:
+                        self._reject(state, provider, model)
+                    await asyncio.sleep(wait)
+
+                if self.requests_per_minute > 0:
+                    state.requests.consume(1)
+                if state.tokens is not None and tokens > 0:
+                    state.tokens.consume(tokens)
+            finally:
+                state.lock.release()
+
+            state.admitted += 1
+            state.total_wait_seconds += time.monotonic() - started_at
+        finally:
+            state.queue_depth -= 1
+
+    def _reject(self, state: _LimiterState, provider: str, model: str) -> None:
+        state.rejected += 1
+        logger.warning(
+            "LLM rate limit wait exceeded",
+            provider=provider,
+            model=model,
+            queue_depth=state.queue_depth,
+        )
+        raise LLMRateLimitError(
+            f"Rate limit wait exceeded {self.max_wait:.0f}s for {provider}/{model}"
+        )
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """プロバイダー×モデルごとの待ち行列メトリクスを取得"""
+        return {
+            f"{provider}/{model}": {
+                "queue_depth": state.queue_depth,
+                "max_queue_depth": state.max_queue_depth,
+                "admitted": state.admitted,
+                "rejected": state.rejected,
+                "avg_wait_seconds": (
+                    round(state.total_wait_seconds / state.admitted, 4)
+                    if state.admitted
+                    else 0.0
+                ),
+            }
+            for (provider, model), state in self._states.items()
+        }
+
+
+def estimate_request_tokens(
+    prompt: str, max_tokens: Optional[int], system_message: Optional[str] = None
+) -> int:
+    """レート制限用のトークン数概算（システムメッセージ + 入力 + 最大出力トークン）"""
+    tokens = max(1, count_tokens(prompt)) + (max_tokens or 0)
+    if system_message:
+        tokens += count_tokens(system_message)
+    return tokens
+
+
+async def acquire_rate_limit(
+    provider: str,
+    model: str,
+    prompt: str,
+    max_tokens: Optional[int],
+    system_message: Optional[str] = None,
+) -> None:
+    """プロバイダーからのリクエスト送信前に送信枠を取得
+
+    枠は論理リクエスト単位で1回だけ取得し、send_with_retry の再試行では取り直さない
+    （再試行は上流の 429 / Retry-After と再試行バジェットで制御する）。
+    """
+    await get_rate_limiter().acquire(
+        provider,
+        model,
+        tokens=estimate_request_tokens(prompt, max_tokens, system_message),
+    )
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """設定に基づくプロセス共有のレートリミッターを取得"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(
+            requests_per_minute=settings.llm_rate_limit_per_minute,
+            tokens_per_minute=settings.llm_token_rate_limit_per_minute,
+            burst=settings.llm_rate_limit_burst or None,
+            max_wait=settings.llm_rate_limit_max_wait,
+        )
+    return _rate_limiter
@@ -0,0 +1,341 @@
+"""
+記録・再生 LLMプロバイダー（負荷試験用）
+
+RecordingLLMProvider は実プロバイダーのストリームを TTFT・チャンク間隔込みで
+JSON Lines 形式のカセットファイルに追記する。
+ReplayLLMProvider はカセットを読み込み、記録時と同じ間隔（time_scale 倍、0 で待機なし）で
+ネットワークなしに再生する。同じ入力には常に同じ記録を返す。
+
+カセットの1行は1回分のストリーム:
+    {"key": "...", "provider": "...", "model": "...", "ttft_ms": 412,
+     "gaps_ms": [35, 41], "chunks": ["こん", "にちは", "。"], "usage": {...}}
+"""
+
+import asyncio
+import hashlib
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import structlog
+
+from utils import fast_json
+from .base import ILLMProvider, LLMError, LLMResponse
+
+logger = structlog.get_logger(__name__)
+
+
+def recording_key(prompt: str, system_message: Optional[str] = None) -> str:
+    """入力（システムメッセージ＋プロンプト）から記録の検索キーを作成"""
+    source = f"{system_message or ''}\0{prompt}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class StreamRecording:
+    """1回分のストリーム記録"""
+
+    key: str
+    provider: str
+    model: str
+    ttft_ms: int
+    gaps_ms: List[int] = field(default_factory=list)
+    chunks: List[str] = field(default_factory=list)
+    usage: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "key": self.key,
+            "provider": self.provider,
+            "model": self.model,
+            "ttft_ms": self.ttft_ms,
+            "gaps_ms": self.gaps_ms,
+            "chunks": self.chunks,
+        }
+        if self.usage:
+            data["usage"] = self.usage
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamRecording":
+        return cls(
+            key=data["key"],
+            provider=data.get("provider", "unknown"),
+            model=data.get("model", "unknown"),
+            ttft_ms=int(data.get("ttft_ms", 0)),
+            gaps_ms=[int(gap) for gap in data.get("gaps_ms", [])],
+            chunks=list(data.get("chunks", [])),
+            usage=data.get("usage"),
+        )
+
+
+def load_recordings(path: str) -> List[StreamRecording]:
+    """カセットファイルを読み込む（壊れた行は読み飛ばす）"""
+    recordings: List[StreamRecording] = []
+    with open(path, "rb") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                recordings.append(StreamRecording.from_dict(fast_json.loads(line)))
+            except (fast_json.JSONDecodeError, KeyError, TypeError, ValueError):
+                logger.warning("Skipping malformed recording", path=path, line=line_no)
+    return recordings
+
+
+def append_recording(path: str, recording: StreamRecording) -> None:
+    """カセットファイルに記録を1行追記"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(fast_json.dumps(recording.to_dict()) + "\n")
+
+
+def _ms(seconds: float) -> int:
+    return max(0, round(seconds * 1000))
+
+
+class RecordingLLMProvider(ILLMProvider):
+    """実プロバイダーの応答をタイミング込みで記録するラッパー"""
+
+    def __init__(self, inner: ILLMProvider, path: str, **kwargs):
+        super().__init__(inner.api_key, **kwargs)
+        self.inner = inner
+        self.path = path
+
+    @property
+    def provider_name(self) -> str:
+        return self.inner.provider_name
+
+    @property
+    def default_model(self) -> str:
+        return self.inner.default_model
+
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
+        **kwargs,
+    ) -> LLMResponse:
+        """テキスト生成（全体の所要時間を TTFT として記録）"""
+        started_at = time.monotonic()
+        response = await self.inner.generate(
+            prompt=prompt,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            system_message=system_message,
+            **kwargs,
+        )
+        self._save(
+            StreamRecording(
+                key=recording_key(prompt, system_message),
+                provider=response.provider,
+                model=response.model,
+                ttft_ms=_ms(time.monotonic() - started_at),
+                chunks=[response.content],
+                usage=response.usage,
+            )
+        )
+        return response
+
+    async def stream(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncGenerator[LLMResponse, None]:
+        """ストリーミング生成（最後まで受信したストリームのみ記録）"""
+        started_at = time.monotonic()
+        last_at: Optional[float] = None
+        recording = StreamRecording(
+            key=recording_key(prompt, system_message),
+            provider=self.provider_name,
+            model=model or self.default_model,
+            ttft_ms=0,
+        )
+
+        stream = self.inner.stream(
+            prompt=prompt,
+            system_message=system_message,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs,
+        )
+        async with aclosing(stream):
+            async for chunk in stream:
+                now = time.monotonic()
+                if chunk.content:
+                    if last_at is None:
+                        recording.ttft_ms = _ms(now - started_at)
+                    else:
+                        recording.gaps_ms.append(_ms(now - last_at))
+                    last_at = now
+                    recording.chunks.append(chunk.content)
+                    recording.model = chunk.model
+                if chunk.usage:
+                    recording.usage = chunk.usage
+                yield chunk
+
+        self._save(recording)
+
+    async def stream_generate(  # type: ignore[override]
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncGenerator[str, None]:
+        """ストリーミングテキスト生成"""
+        stream = self.stream(
+            prompt=prompt,
+            model=model,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **kwargs,
+        )
+        async with aclosing(stream):
+            async for chunk in stream:
+                if chunk.content:
+                    yield chunk.content
+
+    def _save(self, recording: StreamRecording) -> None:
+        try:
+            append_recording(self.path, recording)
+        except OSError as e:
+            # 記録の失敗で本番リクエストを失敗させない
+            logger.warning("Failed to save LLM recording", path=self.path, error=str(e))
+
+    async def is_available(self) -> bool:
+        return await self.inner.is_available()
+
+    async def health_check(self) -> bool:
+        return await self.inner.health_check()
+
+
+class ReplayLLMProvider(ILLMProvider):
+    """記録済みストリームを実際のペースで再生するプロバイダー
+
+    入力に一致する記録がなければ、キーのハッシュで決定的に選んだ記録を返す。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        time_scale: float = 1.0,
+        api_key: str = "replay",
+        **kwargs,
+    ):
+        super().__init__(api_key, **kwargs)
+        self.path = path
+        self.time_scale = max(0.0, time_scale)
+        self.recordings = load_recordings(path)
+        if not self.recordings:
+            raise LLMError(f"No recordings found in {path}")
+        self._by_key: Dict[str, StreamRecording] = {}
+        for recording in self.recordings:
+            self._by_key.setdefault(recording.key, recording)
+
+    @property
+    def provider_name(self) -> str:
+        return "replay"
+
+    @property
+    def default_model(self) -> str:
+        return "replay"
+
+    def select(
+        self, prompt: str, system_message: Optional[str] = None
+    ) -> StreamRecording:
+        """入力に対応する記録を選択"""
+        key = recording_key(prompt, system_message)
+        recording = self._by_key.get(key)
+        if recording is None:
+            recording = self.recordings[int(key, 16) % len(self.recordings)]
+        return recording
+
+    async def _pause(self, milliseconds: int) -> None:
+        delay = milliseconds / 1000 * self.time_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        system_message: Optional[str] = None,
+        **kwargs,
+    ) -> LLMResponse:
+        """記録全体の所要時間後に全文を返す"""
+        recording = self.select(prompt, system_message)
+        await self._pause(recording.ttft_ms + sum(recording.gaps_ms))
+        return LLMResponse(
+            content="".join(recording.chunks),
+            provider=self.provider_name,
+            model=recording.model,
+            usage=recording.usage,
+            metadata={"replay": True, "recording_key": recording.key},
+        )
+
+    async def stream(
+        self,
+        prompt: str,
+        system_message: Optional[str] = None,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncGenerator[LLMResponse, None]:
+        """記録時の TTFT・チャンク間隔で再生"""
+        recording = self.select(prompt, system_message)
+        await self._pause(recording.ttft_ms)
+        for i, content in enumerate(recording.chunks):
+            if i:
+                gap = recording.gaps_ms[i - 1] if i - 1 < len(recording.gaps_ms) else 0
+                await self._pause(gap)
+            yield LLMResponse(
+                content=content,
+                provider=self.provider_name,
+                model=recording.model,
+                usage=None,
+                metadata={"chunk": True, "replay": True},
+            )
+
+        if recording.usage:
+            yield LLMResponse(
+                content="",
+                provider=self.provider_name,
+                model=recording.model,
+                usage=recording.usage,
+                metadata={"chunk": True, "replay": True, "final": True},
+            )
+
+    async def stream_generate(  # type: ignore[override]
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        temperature: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncGenerator[str, None]:
+        """ストリーミングテキスト生成"""
+        async for chunk in self.stream(prompt=prompt, model=model, **kwargs):
+            if chunk.content:
+                yield chunk.content
+
+    async def is_available(self) -> bool:
+        return True
+
+    async def health_check(self) -> bool:
+        return True
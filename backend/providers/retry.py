@@ -0,0 +1,181 @@
+"""
+LLMプロバイダー リトライポリシー
+
+最初のトークンを受け取る前の一時的な失敗（接続エラー・429・5xx）のみを
+ジッター付き指数バックオフで再試行する。Retry-After ヘッダーを優先し、
+1リクエストあたりの総待機時間には上限を設ける。
+ストリーミングは応答ヘッダー受信までを再試行対象とし、本文の受信開始後は再試行しない。
+"""
+
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+# 再試行対象のHTTPステータス
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# リクエスト本文が上流に届いていないことが確実なトランスポートエラー
+RETRYABLE_TRANSPORT_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After ヘッダー（秒数またはHTTP日付）を待機秒数に変換"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """ジッター付き指数バックオフのリトライポリシー"""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        total_budget: float = 20.0,
+    ) -> None:
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.total_budget = total_budget
+
+    def is_retryable(self, error: Exception) -> bool:
+        """再試行してよいエラーか"""
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRYABLE_STATUS_CODES
+        return isinstance(error, RETRYABLE_TRANSPORT_ERRORS)
+
+    def compute_delay(self, attempt: int, error: Exception) -> float:
+        """次の試行までの待機秒数（Retry-After があれば優先）"""
+        if isinstance(error, httpx.HTTPStatusError):
+            retry_after = parse_retry_after(error.response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after
+        # Full Jitter: 0 〜 min(max_delay, base * 2^attempt) の一様乱数
+        ceiling = min(self.max_delay, self.base_delay * (2**attempt))
+        return random.uniform(0, ceiling)
+
+    async def run(
+        self, operation: Callable[[], Awaitable[T]], description: str = ""
+    ) -> T:
+        """operation を実行し、再試行可能な失敗はポリシーに従って再実行"""
+        started_at = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                return await operation()
+            except Exception as e:
+                if attempt >= self.max_retries or not self.is_retryable(e):
+                    raise
+
+                delay = self.compute_delay(attempt, e)
+                elapsed = time.monotonic() - started_at
+                if elapsed + delay > self.total_budget:
+                    logger.warning(
+                        "LLM retry budget exhausted",
+                        target=description,
+                        attempt=attempt + 1,
+                        delay=round(delay, 3),
+                        elapsed=round(elapsed, 3),
+                    )
+                    raise
+
+                attempt += 1
+                logger.warning(
+                    "Retrying LLM request",
+                    target=description,
+                    attempt=attempt,
+                    delay=round(delay, 3),
+                    error=_describe_error(e),
+                )
+                await asyncio.sleep(delay)
+
+
+def _describe_error(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return type(error).__name__
+
+
+async def send_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    policy: Optional[RetryPolicy] = None,
+    stream: bool = False,
+    **kwargs: Any,
+) -> httpx.Response:
+    """リクエストを送信し、エラーステータスは HTTPStatusError として再試行判定する"""
+    policy = policy or get_retry_policy()
+
+    async def attempt() -> httpx.Response:
+        request = client.build_request(method, url, **kwargs)
+        response = await client.send(request, stream=stream)
+        if response.is_error:
+            if stream:
+                # エラー本文をログ出力できるよう読み切ってから接続を解放
+                await response.aread()
+                await response.aclose()
+            response.raise_for_status()
+        return response
+
+    return await policy.run(attempt, description=f"{method} {url}")
+
+
+@asynccontextmanager
+async def stream_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    policy: Optional[RetryPolicy] = None,
+    **kwargs: Any,
+) -> AsyncIterator[httpx.Response]:
+    """応答ヘッダー受信までを再試行するストリーミングリクエスト"""
+    response = await send_with_retry(
+        client, method, url, policy=policy, stream=True, **kwargs
+    )
+    try:
+        yield response
+    finally:
+        await response.aclose()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """設定に基づくリトライポリシーを取得"""
+    return RetryPolicy(
+        max_retries=settings.llm_max_retries,
+        base_delay=settings.llm_retry_base_delay,
+        max_delay=settings.llm_retry_max_delay,
+        total_budget=settings.llm_retry_budget,
+    )
@@ -0,0 +1,168 @@
+"""
+プロバイダー共通 SSE ストリーミングデコーダー
+
+上流レスポンスの生バイト列を行単位にフレーミングし、SSE イベントの data を
+高速JSONパーサーでデコードする。細かいテキスト差分はサイズ・時間で束ねてから返す。
+"""
+
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+import httpx
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
+from utils import fast_json
+
+logger = structlog.get_logger(__name__)
+
+_DONE = b"[DONE]"
+
+
+class SSEDecoder:
+    """バイト列を SSE イベントの data ペイロードに逐次分解するデコーダー"""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._data_lines: List[bytes] = []
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """受信したバイト列を追加し、完結したイベントの data を返す"""
+        self._buffer += chunk
+        events: List[bytes] = []
+        start = 0
+        while True:
+            end = self._buffer.find(b"\n", start)
+            if end < 0:
+                break
+            line = bytes(self._buffer[start:end]).rstrip(b"\r")
+            start = end + 1
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        if start:
+            del self._buffer[:start]
+        return events
+
+    def flush(self) -> List[bytes]:
+        """ストリーム終端で残りのイベントを返す"""
+        events: List[bytes] = []
+        if self._buffer:
+            event = self._process_line(bytes(self._buffer).rstrip(b"\r"))
+            self._buffer.clear()
+            if event is not None:
+                events.append(event)
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _process_line(self, line: bytes) -> Optional[bytes]:
+        if not line:
+            # 空行でイベント確定
+            return self._dispatch()
+        if line.startswith(b":"):
+            # コメント（キープアライブ等）
+            return None
+        if line.startswith(b"data:"):
+            value = line[5:]
+            if value.startswith(b" "):
+                value = value[1:]
+            self._data_lines.append(value)
+        return None
+
+    def _dispatch(self) -> Optional[bytes]:
+        if not self._data_lines:
+            return None
+        data = (
+            self._data_lines[0]
+            if len(self._data_lines) == 1
+            else b"\n".join(self._data_lines)
+        )
+        self._data_lines = []
+        return data
+
+
+async def _iter_events(response: httpx.Response) -> AsyncIterator[bytes]:
+    decoder = SSEDecoder()
+    async for chunk in response.aiter_bytes():
+        for data in decoder.feed(chunk):
+            yield data
+    for data in decoder.flush():
+        yield data
+
+
+async def iter_sse_json(response: httpx.Response) -> AsyncIterator[Any]:
+    """SSE レスポンスの各イベントを JSON としてデコードして返す（[DONE] で終了）"""
+    async for data in _iter_events(response):
+        if data.strip() == _DONE:
+            return
+        try:
+            yield fast_json.loads(data)
+        except fast_json.JSONDecodeError:
+            logger.debug("Skipping malformed SSE payload", size=len(data))
+
+
+class DeltaBatcher:
+    """細かいテキスト差分をサイズ・時間で束ねるバッファ
+
+    最初の差分は TTFT を悪化させないよう即座に返し、以降は
+    max_chars 文字以上、または最初の保留から max_delay 秒経過した時点でまとめて返す。
+    時間判定は次の差分の到着時に行うため、上流が停止している間は保留分を保持する。
+    """
+
+    def __init__(
+        self, max_chars: Optional[int] = None, max_delay: Optional[float] = None
+    ) -> None:
+        self.max_chars = (
+            max_chars if max_chars is not None else settings.llm_stream_batch_chars
+        )
+        self.max_delay = (
+            max_delay if max_delay is not None else settings.llm_stream_batch_interval
+        )
+        self._parts: List[str] = []
+        self._size = 0
+        self._pending_since: Optional[float] = None
+        self._emitted_first = False
+
+    def add(self, text: str) -> Optional[str]:
+        """差分を追加し、送出すべきフレームがあれば返す"""
+        if not text:
+            return None
+        if not self._emitted_first:
+            self._emitted_first = True
+            return text
+
+        now = time.monotonic()
+        if self._pending_since is None:
+            self._pending_since = now
+        self._parts.append(text)
+        self._size += len(text)
+
+        if self._size >= self.max_chars or now - self._pending_since >= self.max_delay:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """保留中の差分をまとめて返す"""
+        if not self._parts:
+            return None
+        frame = "".join(self._parts)
+        self._parts = []
+        self._size = 0
+        self._pending_since = None
+        return frame
+
+
+async def batch_deltas(
+    deltas: AsyncIterator[str], batcher: Optional[DeltaBatcher] = None
+) -> AsyncIterator[str]:
+    """テキスト差分のストリームをフレーム単位に束ねる"""
+    batcher = batcher or DeltaBatcher()
+    async for text in deltas:
+        frame = batcher.add(text)
+        if frame:
+            yield frame
+    frame = batcher.flush()
+    if frame:
+        yield frame
@@ -0,0 +1,115 @@
+"""
+トークン数カウント（差し替え可能なローカルトークナイザー）
+
+送信前の予算計算・レート制限・使用量の推定に使う。
+tiktoken がインストールされていれば BPE で数え、なければ
+日本語（CJK）を考慮した文字種ベースの近似で数える。
+"""
+
+import math
+import re
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional
+
+from config import settings  # type: ignore[attr-defined]
+
+try:
+    import tiktoken
+
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# ひらがな・カタカナ・CJK統合漢字・全角記号
+_CJK_PATTERN = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+class ITokenizer(ABC):
+    """トークナイザーインターフェース"""
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """トークナイザー名"""
+        pass
+
+    @abstractmethod
+    def count(self, text: str) -> int:
+        """テキストのトークン数"""
+        pass
+
+
+class HeuristicTokenizer(ITokenizer):
+    """文字種ベースの近似トークナイザー
+
+    CJK 文字は1文字≒1トークン、それ以外は4文字≒1トークンとして数える。
+    """
+
+    @property
+    def name(self) -> str:
+        return "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        cjk = len(_CJK_PATTERN.findall(text))
+        return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class TiktokenTokenizer(ITokenizer):
+    """tiktoken の BPE エンコーディングによるトークナイザー"""
+
+    def __init__(self, encoding: str = "cl100k_base") -> None:
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    @property
+    def name(self) -> str:
+        return f"tiktoken:{self._encoding.name}"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+_factories: Dict[str, Callable[[], ITokenizer]] = {"heuristic": HeuristicTokenizer}
+if TIKTOKEN_AVAILABLE:
+    _factories["tiktoken"] = TiktokenTokenizer
+
+_tokenizers: Dict[str, ITokenizer] = {}
+
+
+def register_tokenizer(name: str, factory: Callable[[], ITokenizer]) -> None:
+    """トークナイザーを登録（LLM_TOKENIZER で選択可能になる）"""
+    _factories[name] = factory
+    _tokenizers.pop(name, None)
+
+
+def get_tokenizer(name: Optional[str] = None) -> ITokenizer:
+    """設定に基づくトークナイザーを取得（auto は tiktoken → heuristic の順）"""
+    name = name or settings.llm_tokenizer
+    if name == "auto":
+        name = "tiktoken" if "tiktoken" in _factories else "heuristic"
+    if name not in _factories:
+        raise ValueError(f"Unknown tokenizer: {name}")
+    if name not in _tokenizers:
+        _tokenizers[name] = _factories[name]()
+    return _tokenizers[name]
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """テキストのトークン数を数える"""
+    return get_tokenizer().count(text or "")
+
+
+def estimate_usage(
+    prompt: str, completion: str = "", system_message: Optional[str] = None
+) -> Dict[str, int]:
+    """ローカルトークナイザーで使用量を推定（OpenAI互換の形式）"""
+    prompt_tokens = count_tokens(prompt) + count_tokens(system_message)
+    completion_tokens = count_tokens(completion)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
@@ -0,0 +1,87 @@
+"""
+LLMプロバイダー共通HTTPトランスポート
+
+上流ホストごとにプロセス共有の httpx.AsyncClient を1つだけ保持し、
+接続プール・Keep-Alive・HTTP/2 を全プロバイダーで再利用する。
+"""
+
+import importlib.util
+from typing import Any, Dict
+from urllib.parse import urlparse
+
+import httpx
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
+
+logger = structlog.get_logger(__name__)
+
+# 上流オリジン（scheme://host:port）ごとの共有クライアント
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _origin(url: str) -> str:
+    """URLからオリジン部分を取り出す"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def is_http2_enabled() -> bool:
+    """HTTP/2を使用するか（設定有効かつ h2 がインストール済み）"""
+    return settings.llm_http2 and importlib.util.find_spec("h2") is not None
+
+
+def request_timeout() -> httpx.Timeout:
+    """通常リクエスト用タイムアウト"""
+    return httpx.Timeout(
+        settings.llm_request_timeout, connect=settings.llm_connect_timeout
+    )
+
+
+def stream_timeout() -> httpx.Timeout:
+    """ストリーミング用タイムアウト（読み取りはチャンク間の待ち時間）"""
+    return httpx.Timeout(
+        settings.llm_request_timeout,
+        connect=settings.llm_connect_timeout,
+        read=settings.llm_stream_read_timeout,
+    )
+
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """上流ホスト用の共有クライアントを取得（未作成・クローズ済みなら作成）"""
+    origin = _origin(base_url)
+    client = _clients.get(origin)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=is_http2_enabled(),
+            timeout=request_timeout(),
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry,
+            ),
+        )
+        _clients[origin] = client
+        logger.info("Created pooled LLM HTTP client", origin=origin)
+    return client
+
+
+async def close_http_clients() -> None:
+    """全ての共有クライアントをクローズ（アプリケーション終了時）"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning("Failed to close LLM HTTP client", error=str(e))
+
+
+def get_transport_stats() -> Dict[str, Any]:
+    """共有クライアントの状態を取得"""
+    return {
+        "http2": is_http2_enabled(),
+        "clients": sorted(
+            origin for origin, client in _clients.items() if not client.is_closed
+        ),
+    }
@@ -1,6 +1,6 @@
 """DeepResearchLangGraphAgent - Main agent class using LangGraph."""
 
-from typing import AsyncIterator, Dict, Any
+from typing import AsyncIterator, Dict, Any, Optional
 import logging
 
 from langgraph.graph import StateGraph, END
@@ -8,7 +8,8 @@ from langgraph.graph.graph import CompiledGraph
 
 from services.search_service import SearchService
 from services.llm_service import LLMService
-from .state import AgentState, create_initial_state
+from .state import AgentState, create_initial_state, has_diminishing_returns
+from .budget import ResearchBudgetScheduler, get_research_scheduler
 from .retrieve_node import RetrieveNode
 from .decide_node import DecideNode
 from .answer_node import AnswerNode
@@ -20,10 +21,14 @@ class DeepResearchLangGraphAgent:
     """LangGraph を使用した Deep Research エージェント."""
 
     def __init__(
-        self, search_service: SearchService = None, llm_service: LLMService = None
+        self,
+        search_service: SearchService = None,
+        llm_service: LLMService = None,
+        scheduler: Optional[ResearchBudgetScheduler] = None,
     ):
         self.search_service = search_service or SearchService()
         self.llm_service = llm_service or LLMService()
+        self.scheduler = scheduler or get_research_scheduler()
 
         # ノードの初期化
         self.retrieve_node = RetrieveNode(self.search_service)
@@ -64,6 +69,8 @@ class DeepResearchLangGraphAgent:
         """次のノードを決定する条件分岐関数."""
         if state["is_sufficient"] or state["search_count"] >= state["max_searches"]:
             return "finish"
+        elif has_diminishing_returns(state):
+            return "finish"
         else:
             return "continue"
 
@@ -80,8 +87,10 @@ class DeepResearchLangGraphAgent:
         """
         logger.info(f"DeepResearchAgent: 開始 - Question: {question[:100]}...")
 
-        # 初期状態を作成
-        initial_state = create_initial_state(question, session_id)
+        # 予算を割り当てて初期状態を作成
+        budget = self.scheduler.allocate()
+        initial_state = create_initial_state(question, session_id, budget)
+        gain_history = None
 
         try:
             # 進捗メッセージを送信
@@ -108,6 +117,7 @@ class DeepResearchLangGraphAgent:
 
             # 最終結果を取得
             final_state = await self._get_final_state(initial_state)
+            gain_history = final_state.get("gain_history")
 
             if final_state["error_message"]:
                 yield f"❌ エラーが発生しました: {final_state['error_message']}"
@@ -121,6 +131,8 @@ class DeepResearchLangGraphAgent:
         except Exception as e:
             logger.error(f"DeepResearchAgent: 実行エラー - {str(e)}")
             yield f"❌ システムエラー: {str(e)}"
+        finally:
+            self.scheduler.release(budget.run_id, gain_history)
 
     def _get_current_node_from_event(self, event: Dict[str, Any]) -> str:
         """イベントから現在のノード名を取得."""
@@ -167,10 +179,13 @@ class DeepResearchLangGraphAgent:
         Returns:
             実行結果の辞書
         """
-        initial_state = create_initial_state(question, session_id)
+        budget = self.scheduler.allocate()
+        initial_state = create_initial_state(question, session_id, budget)
+        gain_history = None
 
         try:
             final_state = await self.graph.ainvoke(initial_state)
+            gain_history = final_state.get("gain_history")
 
             return {
                 "success": True,
@@ -197,6 +212,8 @@ class DeepResearchLangGraphAgent:
                 "high_relevance_count": 0,
                 "error": str(e),
             }
+        finally:
+            self.scheduler.release(budget.run_id, gain_history)
 
     def get_graph_visualization(self) -> str:
         """グラフの可視化情報を返す（デバッグ用）."""
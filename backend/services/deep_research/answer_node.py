@@ -1,21 +1,37 @@
 """AnswerNode for LangGraph Deep Research workflow."""
 
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib
 import logging
 from datetime import datetime
 
+from config import settings  # type: ignore[attr-defined]
 from services.llm_service import LLMService
-from .state import AgentState, get_high_relevance_docs
+from services.prompt_builder import build_report_prompt
+from .state import AgentState, SearchResult, get_high_relevance_docs
 
 logger = logging.getLogger(__name__)
 
+# ソース別要約キャッシュ（質問+資料内容のハッシュ → 要約）
+_summary_cache: "OrderedDict[str, str]" = OrderedDict()
+
 
 class AnswerNode:
     """収集した情報を基にMarkdownレポートを生成するノード."""
 
-    def __init__(self, llm_service: LLMService = None):
+    def __init__(
+        self, llm_service: LLMService = None, map_reduce: Optional[bool] = None
+    ):
         self.llm_service = llm_service or LLMService()
         self.max_report_length = 8000  # 最大レポート長
+        # None の場合は資料量に応じて自動で Map-Reduce に切り替える
+        self.map_reduce = map_reduce
+        self.map_concurrency = settings.research_map_concurrency
+        self.map_max_documents = settings.research_map_max_documents
+        self.map_group_chars = settings.research_map_group_chars
+        self.map_summary_tokens = settings.research_map_summary_tokens
+        self.map_reduce_threshold_chars = settings.research_map_reduce_threshold_chars
 
     async def __call__(self, state: AgentState) -> Dict[str, Any]:
         """
@@ -38,15 +54,20 @@ class AnswerNode:
                 high_relevance_docs = state["search_results"]
                 logger.warning("高関連度ドキュメントがないため、全検索結果を使用")
 
-            # レポート生成用のプロンプトを構築
-            report_prompt = self._build_report_prompt(
-                state["question"], high_relevance_docs
-            )
+            # レポート生成用のプロンプトを構築（資料が多い場合は Map-Reduce）
+            if self._should_map_reduce(high_relevance_docs):
+                report_prompt = await self._build_map_reduce_prompt(
+                    state["question"], high_relevance_docs
+                )
+            else:
+                report_prompt = self._build_report_prompt(
+                    state["question"], high_relevance_docs
+                )
 
             # LLMでレポート生成
             llm_response = await self.llm_service.generate_response(
                 prompt=report_prompt,
-                max_tokens=3000,
+                max_tokens=state.get("max_report_tokens", 3000),
                 temperature=0.3,  # 一貫性のある出力のため低めに設定
             )
 
@@ -69,6 +90,13 @@ class AnswerNode:
                 "error_message": str(e),
             }
 
+    def _should_map_reduce(self, documents: List[SearchResult]) -> bool:
+        """Map-Reduce モードでレポートを生成すべきかを判定."""
+        if self.map_reduce is not None:
+            return self.map_reduce
+        total_chars = sum(len(doc.content) for doc in documents)
+        return len(documents) > 10 or total_chars > self.map_reduce_threshold_chars
+
     def _build_report_prompt(self, question: str, documents: list) -> str:
         """レポート生成用のプロンプトを構築."""
         # ドキュメントの内容を整理
@@ -79,44 +107,90 @@ class AnswerNode:
             doc_contents.append(f"{source_info}\n{content}")
 
         documents_text = "\n\n---\n\n".join(doc_contents)
-
-        prompt = f"""あなたは専門的なリサーチアナリストです。以下の質問に対して、提供された情報を基に詳細で構造化されたMarkdownレポートを作成してください。
+        return self._build_synthesis_prompt(question, documents_text)
+
+    async def _build_map_reduce_prompt(
+        self, question: str, documents: List[SearchResult]
+    ) -> str:
+        """ソース別に要約（Map）した結果からレポート生成用プロンプトを構築."""
+        groups = self._group_by_source(documents[: self.map_max_documents])
+
+        # 要約は内容ハッシュでキャッシュし、未要約のソースだけをバッチ生成する
+        summaries: Dict[str, str] = {}
+        pending: List[Tuple[str, str, str]] = []
+        for source, docs in groups.items():
+            content = "\n\n".join(doc.content for doc in docs)
+            content = content[: self.map_group_chars]
+            cache_key = hashlib.sha256(f"{question}\0{content}".encode()).hexdigest()
+
+            cached = _summary_cache.get(cache_key)
+            if cached is not None:
+                _summary_cache.move_to_end(cache_key)
+                summaries[source] = cached
+            else:
+                pending.append((source, content, cache_key))
+
+        if pending:
+            results = await self.llm_service.generate_batch(
+                [
+                    self._build_summary_prompt(question, source, content)
+                    for source, content, _ in pending
+                ],
+                max_tokens=self.map_summary_tokens,
+                temperature=0.0,
+                concurrency=self.map_concurrency,
+            )
+            for (source, content, cache_key), result in zip(pending, results):
+                if not result.ok:
+                    # 要約に失敗したソースは抜粋で代替し、レポート生成は継続する
+                    logger.warning(
+                        f"AnswerNode: ソース要約エラー ({source}) - {result.error}"
+                    )
+                    summaries[source] = content[:1000]
+                    continue
+
+                summary = result.response.content.strip()
+                summaries[source] = summary
+                _summary_cache[cache_key] = summary
+                while len(_summary_cache) > settings.cache_max_size:
+                    _summary_cache.popitem(last=False)
+
+        sections = [
+            f"[出典{i}: {source}]\n{summaries[source]}"
+            for i, source in enumerate(groups.keys(), 1)
+        ]
+        logger.info(
+            f"AnswerNode: Map-Reduce 要約完了 ({len(documents)} 件 → {len(groups)} ソース)"
+        )
+        return self._build_synthesis_prompt(question, "\n\n---\n\n".join(sections))
+
+    def _group_by_source(
+        self, documents: List[SearchResult]
+    ) -> "OrderedDict[str, List[SearchResult]]":
+        """ドキュメントをソース単位にまとめる（出現順を維持）."""
+        groups: "OrderedDict[str, List[SearchResult]]" = OrderedDict()
+        for doc in documents:
+            groups.setdefault(doc.source, []).append(doc)
+        return groups
+
+    def _build_summary_prompt(self, question: str, source: str, content: str) -> str:
+        """1ソース分の資料を質問に沿って要約するプロンプトを構築."""
+        return f"""以下の資料から、質問に答えるために必要な事実・数値・主張だけを簡潔な箇条書きで抜き出してください。資料にない情報は追加しないでください。
 
 ## 質問
 {question}
 
-## 参考資料
-{documents_text}
-
-## レポート作成指示
-1. **構造化**: 適切な見出し（##, ###）を使用して情報を整理
-2. **客観性**: 提供された情報に基づいて事実を正確に記述
-3. **引用**: 重要な情報には出典番号を明記（例：[出典1]）
-4. **完全性**: 質問に対する包括的な回答を提供
-5. **読みやすさ**: 箇条書きや表を適切に使用
+## 資料（{source}）
+{content}
 
-## 出力形式
-Markdownフォーマットで以下の構造を含むレポートを作成：
+要約："""
 
-# [質問に関連するタイトル]
+    def _build_synthesis_prompt(self, question: str, documents_text: str) -> str:
+        """整理済みの参考資料からレポート生成用の最終プロンプトを構築.
 
-## 概要
-- 主要なポイントの要約
-
-## 詳細分析
-### [関連するサブトピック1]
-### [関連するサブトピック2]
-
-## 結論
-- 質問に対する明確な回答
-- 重要な洞察
-
-## 参考文献
-- 使用した出典のリスト
-
-レポートを作成してください："""
-
-        return prompt
+        共通の指示文を先頭に、質問・参考資料を末尾に置いてプロンプトキャッシュを効かせる.
+        """
+        return build_report_prompt(question, documents_text)
 
     def _post_process_report(self, report: str, documents: list) -> str:
         """生成されたレポートの後処理."""
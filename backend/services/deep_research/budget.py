@@ -0,0 +1,164 @@
+"""Deep Research 実行予算スケジューラ.
+
+同時実行中の Deep Research の数と、過去の実行で観測された
+「検索1回あたりの新規高関連度ドキュメント数（限界利得）」に基づいて、
+実行ごとの検索回数とレポート生成トークン数を割り当てる。
+高負荷時は待ち行列を作らず、予算を段階的に縮小して即座に割り当てる。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config import settings  # type: ignore[attr-defined]
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResearchBudget:
+    """1回の Deep Research 実行に割り当てられた予算."""
+
+    run_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    max_searches: int = 3
+    min_documents: int = 5
+    relevance_threshold: float = 0.7
+    max_report_tokens: int = 3000
+    min_marginal_gain: int = 1
+    load_factor: float = 0.0
+
+
+class ResearchBudgetScheduler:
+    """負荷と限界利得に応じて Deep Research の予算を配分するスケジューラ."""
+
+    def __init__(
+        self,
+        capacity: int = 4,
+        max_searches: int = 3,
+        min_documents: int = 5,
+        relevance_threshold: float = 0.7,
+        max_report_tokens: int = 3000,
+        min_report_tokens: int = 1000,
+        min_marginal_gain: int = 1,
+        gain_smoothing: float = 0.3,
+        min_gain_samples: int = 5,
+        explore_interval: int = 10,
+    ) -> None:
+        self.capacity = max(1, capacity)
+        self.max_searches = max(1, max_searches)
+        self.min_documents = min_documents
+        self.relevance_threshold = relevance_threshold
+        self.max_report_tokens = max_report_tokens
+        self.min_report_tokens = min(min_report_tokens, max_report_tokens)
+        self.min_marginal_gain = min_marginal_gain
+        self.gain_smoothing = gain_smoothing
+        self.min_gain_samples = min_gain_samples
+        self.explore_interval = max(1, explore_interval)
+
+        self._lock = threading.Lock()
+        self._active: Dict[str, ResearchBudget] = {}
+        # 検索回数（1始まり）ごとの限界利得 EWMA とサンプル数
+        self._gain_ewma: Dict[int, float] = {}
+        self._gain_samples: Dict[int, int] = {}
+        self._total_runs = 0
+        self._shrunk_runs = 0
+
+    @property
+    def active_runs(self) -> int:
+        """実行中の Deep Research 数."""
+        return len(self._active)
+
+    def allocate(self, run_id: Optional[str] = None) -> ResearchBudget:
+        """新しい実行に予算を割り当てる（ブロックしない）."""
+        with self._lock:
+            load_factor = (len(self._active) + 1) / self.capacity
+            scale = 1.0 if load_factor <= 1.0 else 1.0 / load_factor
+
+            max_searches = max(1, round(self.max_searches * scale))
+            # 定期的に上限なしで実行し、後半の検索の限界利得を観測し続ける
+            if scale < 1.0 or (self._total_runs + 1) % self.explore_interval:
+                max_searches = min(max_searches, self._useful_search_limit())
+            report_tokens = max(
+                self.min_report_tokens, int(self.max_report_tokens * scale)
+            )
+
+            budget = ResearchBudget(
+                run_id=run_id or str(uuid.uuid4()),
+                max_searches=max_searches,
+                min_documents=self.min_documents,
+                relevance_threshold=self.relevance_threshold,
+                max_report_tokens=report_tokens,
+                min_marginal_gain=self.min_marginal_gain,
+                load_factor=load_factor,
+            )
+            self._active[budget.run_id] = budget
+            self._total_runs += 1
+            if scale < 1.0 or max_searches < self.max_searches:
+                self._shrunk_runs += 1
+
+        logger.info(
+            f"ResearchBudgetScheduler: 予算割当 run_id={budget.run_id}, "
+            f"max_searches={budget.max_searches}, "
+            f"max_report_tokens={budget.max_report_tokens}, "
+            f"load={load_factor:.2f}"
+        )
+        return budget
+
+    def release(self, run_id: str, gain_history: Optional[List[int]] = None) -> None:
+        """実行完了時に予算を返却し、観測した限界利得を記録する."""
+        with self._lock:
+            self._active.pop(run_id, None)
+            for iteration, gain in enumerate(gain_history or [], 1):
+                previous = self._gain_ewma.get(iteration)
+                self._gain_ewma[iteration] = (
+                    float(gain)
+                    if previous is None
+                    else previous + self.gain_smoothing * (gain - previous)
+                )
+                self._gain_samples[iteration] = self._gain_samples.get(iteration, 0) + 1
+
+    def _useful_search_limit(self) -> int:
+        """限界利得が閾値を下回り始める検索回数の直前までを上限とする."""
+        for iteration in range(2, self.max_searches + 1):
+            samples = self._gain_samples.get(iteration, 0)
+            if samples < self.min_gain_samples:
+                break
+            if self._gain_ewma[iteration] < self.min_marginal_gain:
+                return iteration - 1
+        return self.max_searches
+
+    def get_stats(self) -> Dict[str, Any]:
+        """スケジューラの統計情報を取得."""
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "active_runs": len(self._active),
+                "total_runs": self._total_runs,
+                "shrunk_runs": self._shrunk_runs,
+                "marginal_gain": {
+                    str(k): round(v, 3) for k, v in sorted(self._gain_ewma.items())
+                },
+            }
+
+
+_scheduler: Optional[ResearchBudgetScheduler] = None
+
+
+def get_research_scheduler() -> ResearchBudgetScheduler:
+    """設定に基づくプロセス共有のスケジューラを取得."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ResearchBudgetScheduler(
+            capacity=settings.research_max_concurrent_runs,
+            max_searches=settings.research_max_searches,
+            min_documents=settings.research_min_documents,
+            relevance_threshold=settings.research_relevance_threshold,
+            max_report_tokens=settings.research_report_max_tokens,
+            min_report_tokens=settings.research_report_min_tokens,
+            min_marginal_gain=settings.research_min_marginal_gain,
+        )
+    return _scheduler
@@ -3,7 +3,7 @@
 from typing import Dict, Any
 import logging
 
-from .state import AgentState, get_high_relevance_docs
+from .state import AgentState, get_high_relevance_docs, has_diminishing_returns
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +46,9 @@ class DecideNode:
         elif state["search_count"] >= state["max_searches"]:
             next_node = "answer"  # 最大検索回数に達した場合も Answer へ
             logger.info("DecideNode: 最大検索回数に達しました → Answer へ")
+        elif has_diminishing_returns(state):
+            next_node = "answer"  # 追加検索の効果が薄い場合は予算を使い切らない
+            logger.info("DecideNode: 新規の高関連度ドキュメントが増えません → Answer へ")
         else:
             next_node = "retrieve"
             logger.info("DecideNode: 追加検索が必要です → Retrieve へ")
@@ -70,10 +73,11 @@ class DecideNode:
         Returns:
             十分かどうかのブール値
         """
-        # 基本的な数量チェック
-        if len(high_relevance_docs) < self.min_documents:
+        # 基本的な数量チェック（予算で割り当てられた値を優先）
+        min_documents = state.get("min_documents", self.min_documents)
+        if len(high_relevance_docs) < min_documents:
             logger.debug(
-                f"高関連度ドキュメント不足: {len(high_relevance_docs)} < {self.min_documents}"
+                f"高関連度ドキュメント不足: {len(high_relevance_docs)} < {min_documents}"
             )
             return False
 
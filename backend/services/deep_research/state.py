@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from typing_extensions import TypedDict
 
+from .budget import ResearchBudget
+
 # 型エイリアス
 Document = Dict[str, Any]  # Azure Search のドキュメント JSON
 
@@ -47,6 +49,14 @@ class AgentState(TypedDict):
         現在のノード名。
     error_message: Optional[str]
         エラーメッセージ。
+    run_id: str
+        予算スケジューラが割り当てた実行ID。
+    max_report_tokens: int
+        レポート生成に割り当てられた最大トークン数。
+    min_marginal_gain: int
+        検索を継続するために必要な1回あたりの新規高関連度ドキュメント数。
+    gain_history: List[int]
+        検索ごとに増えた高関連度ドキュメント数の履歴。
     """
 
     question: str
@@ -61,35 +71,48 @@ class AgentState(TypedDict):
     final_report: str
     current_node: str
     error_message: Optional[str]
+    run_id: str
+    max_report_tokens: int
+    min_marginal_gain: int
+    gain_history: List[int]
 
 
-def create_initial_state(question: str, session_id: str) -> AgentState:
-    """初期状態を作成する."""
+def create_initial_state(
+    question: str, session_id: str, budget: Optional[ResearchBudget] = None
+) -> AgentState:
+    """初期状態を作成する（予算未指定時は既定値を使用）."""
+    budget = budget or ResearchBudget()
     return AgentState(
         question=question,
         session_id=session_id,
         search_results=[],
         search_queries=[],
         search_count=0,
-        max_searches=3,
-        relevance_threshold=0.7,
-        min_documents=5,
+        max_searches=budget.max_searches,
+        relevance_threshold=budget.relevance_threshold,
+        min_documents=budget.min_documents,
         is_sufficient=False,
         final_report="",
         current_node="start",
         error_message=None,
+        run_id=budget.run_id,
+        max_report_tokens=budget.max_report_tokens,
+        min_marginal_gain=budget.min_marginal_gain,
+        gain_history=[],
     )
 
 
 def add_search_results(state: AgentState, results: List[SearchResult]) -> AgentState:
-    """検索結果を追加し、重複を除去."""
+    """検索結果を追加し、重複を除去（新規高関連度ドキュメント数も記録）."""
     existing_sources = {r.source for r in state["search_results"]}
     new_results = [r for r in results if r.source not in existing_sources]
+    gain = len([r for r in new_results if r.score >= state["relevance_threshold"]])
 
     return {
         **state,
         "search_results": state["search_results"] + new_results,
         "search_count": state["search_count"] + 1,
+        "gain_history": state.get("gain_history", []) + [gain],
     }
 
 
@@ -100,10 +123,27 @@ def get_high_relevance_docs(state: AgentState) -> List[SearchResult]:
     ]
 
 
+def has_diminishing_returns(state: AgentState) -> bool:
+    """直近の検索で新規高関連度ドキュメントが十分増えなかったかを判定.
+
+    初回の検索で何も見つからなかった場合は打ち切らず、絞り込んだクエリで再検索する
+    （2回以上検索したか、高関連度ドキュメントが見つかってから判定する）.
+    """
+    history = state.get("gain_history", [])
+    if not history:
+        return False
+    if len(history) < 2 and not get_high_relevance_docs(state):
+        return False
+    return history[-1] < state.get("min_marginal_gain", 0)
+
+
 def should_continue_search(state: AgentState) -> bool:
     """検索を続行すべきかを判定."""
     if state["search_count"] >= state["max_searches"]:
         return False
 
+    if has_diminishing_returns(state):
+        return False
+
     high_relevance_docs = get_high_relevance_docs(state)
     return len(high_relevance_docs) < state["min_documents"]
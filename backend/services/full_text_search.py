@@ -0,0 +1,251 @@
+"""
+セッション・メッセージの全文検索
+
+SQLite（開発環境）では FTS5（trigram）、PostgreSQL では pg_trgm の GIN インデックスを
+使い、メッセージ件数が増えても全件走査しない。trigram のため日本語も部分一致で検索できる。
+インデックスの定義は models/search_index.py とマイグレーションを参照。
+"""
+
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from sqlalchemy import ColumnElement, column, func, literal, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.message import Message
+from models.session import Session
+
+# trigram インデックスが使える最小の検索文字数（未満は LIKE で検索する）
+MIN_TRIGRAM_QUERY_LENGTH = 3
+
+SNIPPET_CONTEXT_CHARS = 40
+SNIPPET_LENGTH = 160
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+
+@dataclass
+class SearchHit:
+    """検索結果1件（message_id が None ならタイトル一致）"""
+
+    session_id: str
+    session_title: str
+    message_id: Optional[str]
+    snippet: str
+    score: float
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _fts5_phrase(query: str) -> str:
+    """入力をそのまま1つのフレーズとして FTS5 に渡す（演算子として解釈させない）"""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def _highlight(snippet: str, query: str) -> str:
+    """スニペット中の一致箇所を強調表示"""
+    start = snippet.lower().find(query.lower())
+    if start < 0:
+        return snippet
+    end = start + len(query)
+    return (
+        f"{snippet[:start]}{HIGHLIGHT_START}{snippet[start:end]}"
+        f"{HIGHLIGHT_END}{snippet[end:]}"
+    )
+
+
+class FullTextSearch:
+    """インデックスを使ったセッション・メッセージ検索"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @property
+    def dialect(self) -> str:
+        return str(self.db.get_bind().dialect.name)
+
+    def _use_fts5(self, query: str) -> bool:
+        return self.dialect == "sqlite" and len(query) >= MIN_TRIGRAM_QUERY_LENGTH
+
+    def session_condition(
+        self, query: str, include_messages: bool = True
+    ) -> ColumnElement[bool]:
+        """タイトル（と本文）が一致するセッションの WHERE 条件"""
+        if self._use_fts5(query):
+            phrase = _fts5_phrase(query)
+            title_ids = (
+                text(
+                    "SELECT sessions.id FROM sessions_fts "
+                    "JOIN sessions ON sessions.rowid = sessions_fts.rowid "
+                    "WHERE sessions_fts MATCH :title_query"
+                )
+                .bindparams(title_query=phrase)
+                .columns(column("id"))
+            )
+            conditions = [Session.id.in_(title_ids)]
+            if include_messages:
+                message_session_ids = (
+                    text(
+                        "SELECT messages.session_id FROM messages_fts "
+                        "JOIN messages ON messages.rowid = messages_fts.rowid "
+                        "WHERE messages_fts MATCH :message_query"
+                    )
+                    .bindparams(message_query=phrase)
+                    .columns(column("session_id"))
+                )
+                conditions.append(Session.id.in_(message_session_ids))
+            return or_(*conditions)
+
+        # PostgreSQL では ILIKE が pg_trgm の GIN インデックスで処理される
+        pattern = _like_pattern(query)
+        conditions = [Session.title.ilike(pattern, escape="\\")]
+        if include_messages:
+            conditions.append(
+                Session.messages.any(Message.content.ilike(pattern, escape="\\"))
+            )
+        return or_(*conditions)
+
+    async def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """一致度順の検索結果（タイトル一致を先に）をスニペット付きで返す"""
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+
+        if self._use_fts5(query):
+            title_hits = await self._search_titles_fts5(query, limit)
+            message_hits = await self._search_messages_fts5(query, limit)
+        else:
+            title_hits = await self._search_titles_like(query, limit)
+            message_hits = await self._search_messages_like(query, limit)
+
+        return (title_hits + message_hits)[:limit]
+
+    async def _search_titles_fts5(self, query: str, limit: int) -> List[SearchHit]:
+        result = await self.db.execute(
+            text(
+                "SELECT sessions.id, sessions.title, bm25(sessions_fts) AS rank "
+                "FROM sessions_fts "
+                "JOIN sessions ON sessions.rowid = sessions_fts.rowid "
+                "WHERE sessions_fts MATCH :query ORDER BY rank LIMIT :limit"
+            ),
+            {"query": _fts5_phrase(query), "limit": limit},
+        )
+        return [
+            SearchHit(
+                session_id=session_id,
+                session_title=title,
+                message_id=None,
+                snippet=_highlight(title, query),
+                score=-rank,
+            )
+            for session_id, title, rank in result.all()
+        ]
+
+    async def _search_messages_fts5(self, query: str, limit: int) -> List[SearchHit]:
+        result = await self.db.execute(
+            text(
+                "SELECT messages.session_id, sessions.title, messages.id, "
+                "snippet(messages_fts, 0, :start, :end, '…', 16) AS snippet, "
+                "bm25(messages_fts) AS rank "
+                "FROM messages_fts "
+                "JOIN messages ON messages.rowid = messages_fts.rowid "
+                "JOIN sessions ON sessions.id = messages.session_id "
+                "WHERE messages_fts MATCH :query ORDER BY rank LIMIT :limit"
+            ),
+            {
+                "query": _fts5_phrase(query),
+                "limit": limit,
+                "start": HIGHLIGHT_START,
+                "end": HIGHLIGHT_END,
+            },
+        )
+        return [
+            SearchHit(
+                session_id=session_id,
+                session_title=title,
+                message_id=message_id,
+                snippet=snippet,
+                score=-rank,
+            )
+            for session_id, title, message_id, snippet, rank in result.all()
+        ]
+
+    async def _search_titles_like(self, query: str, limit: int) -> List[SearchHit]:
+        score = self._similarity(query, Session.title)
+        result = await self.db.execute(
+            select(Session.id, Session.title, score)
+            .where(Session.title.ilike(_like_pattern(query), escape="\\"))
+            .order_by(*self._rank_order(score), Session.updated_at.desc())
+            .limit(limit)
+        )
+        return [
+            SearchHit(
+                session_id=session_id,
+                session_title=title,
+                message_id=None,
+                snippet=_highlight(title, query),
+                score=float(rank),
+            )
+            for session_id, title, rank in result.all()
+        ]
+
+    async def _search_messages_like(self, query: str, limit: int) -> List[SearchHit]:
+        score = self._similarity(query, Message.content)
+        snippet_start = self._greatest(
+            self._position(Message.content, query) - SNIPPET_CONTEXT_CHARS, 1
+        )
+        result = await self.db.execute(
+            select(
+                Message.session_id,
+                Session.title,
+                Message.id,
+                func.substr(Message.content, snippet_start, SNIPPET_LENGTH),
+                snippet_start,
+                func.length(Message.content),
+                score,
+            )
+            .join(Session, Session.id == Message.session_id)
+            .where(Message.content.ilike(_like_pattern(query), escape="\\"))
+            .order_by(*self._rank_order(score), Message.created_at.desc())
+            .limit(limit)
+        )
+
+        hits = []
+        for session_id, title, message_id, snippet, start, length, rank in result:
+            snippet = _highlight(snippet, query)
+            if start > 1:
+                snippet = "…" + snippet
+            if start + SNIPPET_LENGTH <= length:
+                snippet += "…"
+            hits.append(
+                SearchHit(
+                    session_id=session_id,
+                    session_title=title,
+                    message_id=message_id,
+                    snippet=snippet,
+                    score=float(rank),
+                )
+            )
+        return hits
+
+    def _similarity(self, query: str, target: Any) -> Any:
+        """PostgreSQL では pg_trgm の類似度、それ以外は 0（新しい順で並べる）"""
+        if self.dialect == "postgresql":
+            return func.word_similarity(query, target)
+        return literal(0.0)
+
+    def _rank_order(self, score: Any) -> List[Any]:
+        return [score.desc()] if self.dialect == "postgresql" else []
+
+    def _position(self, target: Any, query: str) -> Any:
+        if self.dialect == "postgresql":
+            return func.strpos(func.lower(target), query.lower())
+        return func.instr(func.lower(target), query.lower())
+
+    def _greatest(self, value: Any, minimum: int) -> Any:
+        if self.dialect == "postgresql":
+            return func.greatest(value, minimum)
+        return func.max(value, minimum)
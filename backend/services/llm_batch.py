@@ -0,0 +1,100 @@
+"""
+LLM バッチ生成
+
+多数のプロンプトを上限付きの並列数で処理し、入力順に結果を返す。
+個々の失敗は該当項目のエラーとして記録し、残りの結果は返す。
+上流のバッチ API を使う場合は IBatchBackend を実装して LLMService に設定する。
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+import structlog
+
+from providers import LLMResponse
+
+logger = structlog.get_logger(__name__)
+
+GenerateFn = Callable[..., Awaitable[LLMResponse]]
+
+
+@dataclass
+class BatchResult:
+    """バッチ内1項目の結果"""
+
+    index: int
+    prompt: str
+    response: Optional[LLMResponse] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.response is not None
+
+
+class IBatchBackend(ABC):
+    """バッチ生成バックエンドインターフェース"""
+
+    @abstractmethod
+    async def run(
+        self,
+        prompts: Sequence[str],
+        system_message: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+    ) -> List[BatchResult]:
+        """全プロンプトを処理し、入力順の結果リストを返す"""
+        pass
+
+
+class ConcurrentBatchBackend(IBatchBackend):
+    """通常の生成呼び出しを上限付き並列で実行するバックエンド
+
+    レート制限・フェイルオーバーは各生成呼び出し（プロバイダー側）で適用される。
+    """
+
+    def __init__(self, generate: GenerateFn, concurrency: int) -> None:
+        self.generate = generate
+        self.concurrency = max(1, concurrency)
+
+    async def run(
+        self,
+        prompts: Sequence[str],
+        system_message: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.7,
+    ) -> List[BatchResult]:
+        results: List[Optional[BatchResult]] = [None] * len(prompts)
+        # ワーカー間で共有するイテレーター（項目数ぶんのタスクを作らない）
+        indices = iter(range(len(prompts)))
+
+        async def worker() -> None:
+            for index in indices:
+                results[index] = await self._run_one(
+                    index, prompts[index], system_message, max_tokens, temperature
+                )
+
+        await asyncio.gather(
+            *(worker() for _ in range(min(self.concurrency, len(prompts))))
+        )
+        return [result for result in results if result is not None]
+
+    async def _run_one(
+        self,
+        index: int,
+        prompt: str,
+        system_message: Optional[str],
+        max_tokens: int,
+        temperature: float,
+    ) -> BatchResult:
+        kwargs: dict[str, Any] = {"max_tokens": max_tokens, "temperature": temperature}
+        if system_message is not None:
+            kwargs["system_message"] = system_message
+        try:
+            response = await self.generate(prompt=prompt, **kwargs)
+        except Exception as e:
+            logger.warning("Batch item failed", index=index, error=str(e))
+            return BatchResult(index=index, prompt=prompt, error=str(e))
+        return BatchResult(index=index, prompt=prompt, response=response)
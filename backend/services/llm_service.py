@@ -2,60 +2,358 @@
 LLMサービス
 """
 
-from typing import Optional, AsyncGenerator, Dict, Any
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Optional, AsyncGenerator, Dict, Any, Iterator, List, Sequence
+
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
 from providers import LLMProviderFactory, ILLMProvider, LLMResponse, LLMError
+from providers.circuit_breaker import get_circuit_breaker
+from providers.health_monitor import get_health_monitor
+from providers.latency import LatencyStats, get_latency_tracker
+from providers.rate_limit import LLMRateLimitError
+from services.llm_batch import BatchResult, ConcurrentBatchBackend, IBatchBackend
+
+logger = structlog.get_logger(__name__)
+
+# 最大出力トークン数の既定値（予算の見積もりでも出力分として使う）
+DEFAULT_MAX_TOKENS = 1000
+
+
+@dataclass
+class _OpenedStream:
+    """最初のチャンクまで受信済みのストリーム"""
+
+    provider: ILLMProvider
+    stream: AsyncGenerator[LLMResponse, None]
+    first_chunk: Optional[LLMResponse]
+    ttft: float
 
 
 class LLMService:
-    """LLMサービス"""
+    """LLMサービス
+
+    優先順位順のプロバイダーチェーンを保持し、サーキットが開いている
+    プロバイダーをスキップしながら、最初のトークンを返す前の失敗は
+    次のプロバイダーへフェイルオーバーする。
+    ルーティング対象（LLM_ROUTING_PREFERENCE）のプロバイダーは
+    EWMA TTFT の速い順に試行し、ヘッジ有効時は p95 TTFT を過ぎても
+    初回トークンが来なければ次のプロバイダーへ並行リクエストを送る。
+    """
 
     def __init__(self) -> None:
+        self.providers: List[ILLMProvider] = []
         self.provider: Optional[ILLMProvider] = None
+        # 上流のバッチ API を使う場合に設定（未設定なら並列実行）
+        self.batch_backend: Optional[IBatchBackend] = None
         self._initialize_provider()
 
     def _initialize_provider(self) -> None:
-        """プロバイダーを初期化"""
-        provider_name = LLMProviderFactory.get_available_provider()
-        if provider_name:
-            self.provider = LLMProviderFactory.create_provider(provider_name)
+        """プロバイダーチェーンを初期化"""
+        self.providers = LLMProviderFactory.create_provider_chain()
+        # 後方互換: 先頭（プライマリ）プロバイダー
+        self.provider = self.providers[0] if self.providers else None
+
+    @staticmethod
+    def _latency_stats(provider: ILLMProvider) -> LatencyStats:
+        return get_latency_tracker().get(provider.provider_name, provider.default_model)
+
+    def _route_providers(self) -> List[ILLMProvider]:
+        """試行順のプロバイダーリスト
+
+        ルーティング対象はレイテンシ順に並べ、バックグラウンドヘルスチェックで
+        異常とされたプロバイダーは最後に回す（最後の手段としては試行する）。
+        """
+        monitor = get_health_monitor()
+        healthy = [p for p in self.providers if monitor.is_healthy(p.provider_name)]
+        unhealthy = [p for p in self.providers if p not in healthy]
+
+        preference = settings.get_routing_preference_list()
+        if not preference:
+            return healthy + unhealthy
+
+        preferred = [p for p in healthy if p.provider_name in preference]
+        others = [p for p in healthy if p.provider_name not in preference]
+
+        def score(provider: ILLMProvider) -> tuple:
+            stats = self._latency_stats(provider)
+            # 未計測のプロバイダーは計測のため先に試す
+            return (
+                stats.ewma_ttft if stats.ewma_ttft is not None else 0.0,
+                -(stats.ewma_throughput or 0.0),
+            )
+
+        return sorted(preferred, key=score) + others + unhealthy
+
+    @staticmethod
+    def _next_allowed(remaining: Iterator[ILLMProvider]) -> Optional[ILLMProvider]:
+        """サーキットが呼び出しを許可する次のプロバイダー"""
+        for provider in remaining:
+            if get_circuit_breaker(provider.provider_name).allow_request():
+                return provider
+        return None
+
+    def _hedge_delay(self, provider: ILLMProvider) -> Optional[float]:
+        """ヘッジ要求を送るまでの待機時間（ヘッジしない場合は None）"""
+        if not settings.llm_hedging_enabled:
+            return None
+        p95 = self._latency_stats(provider).p95_ttft(settings.llm_hedge_min_samples)
+        if p95 is None:
+            return None
+        return max(p95, settings.llm_hedge_min_delay)
+
+    def _record_failure(self, provider: ILLMProvider, error: LLMError) -> None:
+        breaker = get_circuit_breaker(provider.provider_name)
+        if isinstance(error, LLMRateLimitError):
+            # クライアント側の待機上限超過は上流の障害ではない
+            breaker.release()
+        else:
+            breaker.record_failure()
+        logger.warning(
+            "LLM provider failed, trying next provider",
+            provider=provider.provider_name,
+            error=str(error),
+        )
 
     async def generate_response(
         self,
         prompt: str,
         system_message: Optional[str] = None,
-        max_tokens: int = 1000,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
         temperature: float = 0.7,
     ) -> LLMResponse:
         """レスポンスを生成"""
-        if not self.provider:
+        if not self.providers:
             raise LLMError("No LLM provider available")
 
-        return await self.provider.generate(
-            prompt=prompt,
-            system_message=system_message,
-            max_tokens=max_tokens,
-            temperature=temperature,
+        last_error: Optional[LLMError] = None
+        for provider in self._route_providers():
+            breaker = get_circuit_breaker(provider.provider_name)
+            if not breaker.allow_request():
+                continue
+
+            try:
+                response = await provider.generate(
+                    prompt=prompt,
+                    system_message=system_message,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                )
+            except LLMError as e:
+                self._record_failure(provider, e)
+                last_error = e
+                continue
+            except BaseException:
+                breaker.release()
+                raise
+
+            # 所要時間にはレート制限の待機・リトライ間隔・生成全体が含まれ、
+            # 初回応答までの時間にならないため低速判定しない
+            breaker.record_success()
+            return response
+
+        raise LLMError(
+            f"All LLM providers failed: {last_error}"
+            if last_error
+            else "All LLM providers are unavailable (circuit open)"
         )
 
+    async def generate_batch(
+        self,
+        prompts: Sequence[str],
+        system_message: Optional[str] = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        temperature: float = 0.7,
+        concurrency: Optional[int] = None,
+    ) -> List[BatchResult]:
+        """複数プロンプトをまとめて生成
+
+        結果は入力順に返し、失敗した項目は error 付きの結果として返す。
+        """
+        if not prompts:
+            return []
+
+        backend = self.batch_backend or ConcurrentBatchBackend(
+            self.generate_response, concurrency or settings.llm_batch_concurrency
+        )
+        started_at = time.monotonic()
+        results = await backend.run(prompts, system_message, max_tokens, temperature)
+
+        failed = sum(1 for result in results if not result.ok)
+        logger.info(
+            "LLM batch completed",
+            items=len(results),
+            failed=failed,
+            duration=round(time.monotonic() - started_at, 3),
+        )
+        return results
+
     async def stream_response(
         self,
         prompt: str,
         system_message: Optional[str] = None,
-        max_tokens: int = 1000,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
         temperature: float = 0.7,
     ) -> AsyncGenerator[LLMResponse, None]:
-        """ストリーミングレスポンスを生成"""
-        if not self.provider:
+        """ストリーミングレスポンスを生成
+
+        最初のチャンクを返した後の失敗はフェイルオーバーせずにそのまま送出する。
+        """
+        if not self.providers:
             raise LLMError("No LLM provider available")
 
-        stream_gen = self.provider.stream(
-            prompt=prompt,
-            system_message=system_message,
-            max_tokens=max_tokens,
-            temperature=temperature,
+        request = {
+            "prompt": prompt,
+            "system_message": system_message,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+        }
+        last_error: Optional[LLMError] = None
+        remaining = iter(self._route_providers())
+        while True:
+            provider = self._next_allowed(remaining)
+            if provider is None:
+                break
+            try:
+                opened = await self._open_stream_with_hedge(
+                    provider, remaining, request
+                )
+            except LLMError as e:
+                last_error = e
+                continue
+
+            relay = self._relay_stream(opened)
+            try:
+                async for chunk in relay:
+                    yield chunk
+            finally:
+                await relay.aclose()
+            return
+
+        raise LLMError(
+            f"All LLM providers failed: {last_error}"
+            if last_error
+            else "All LLM providers are unavailable (circuit open)"
         )
-        async for chunk in stream_gen:
-            yield chunk
+
+    async def _open_stream(
+        self, provider: ILLMProvider, request: Dict[str, Any]
+    ) -> _OpenedStream:
+        """ストリームを開始し最初のチャンクまで受信"""
+        started_at = time.monotonic()
+        stream_gen = provider.stream(**request)
+        try:
+            first_chunk: Optional[LLMResponse] = await stream_gen.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None
+        except LLMError as e:
+            self._record_failure(provider, e)
+            raise
+        except BaseException:
+            # キャンセル（ヘッジの敗者・呼び出し側の中断）はプロバイダーの失敗ではない
+            get_circuit_breaker(provider.provider_name).release()
+            await stream_gen.aclose()
+            raise
+
+        ttft = time.monotonic() - started_at
+        self._latency_stats(provider).record_ttft(ttft)
+        return _OpenedStream(provider, stream_gen, first_chunk, ttft)
+
+    async def _open_stream_with_hedge(
+        self,
+        provider: ILLMProvider,
+        remaining: Iterator[ILLMProvider],
+        request: Dict[str, Any],
+    ) -> _OpenedStream:
+        """ストリームを開始し、初回トークンが遅ければ次のプロバイダーと競争させる"""
+        delay = self._hedge_delay(provider)
+        if delay is None:
+            return await self._open_stream(provider, request)
+
+        primary = asyncio.create_task(self._open_stream(provider, request))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge_provider = self._next_allowed(remaining)
+        if hedge_provider is None:
+            return await primary
+
+        logger.info(
+            "Hedging LLM stream request",
+            primary=provider.provider_name,
+            hedge=hedge_provider.provider_name,
+            delay=round(delay, 3),
+        )
+        tasks = [
+            primary,
+            asyncio.create_task(self._open_stream(hedge_provider, request)),
+        ]
+        pending = set(tasks)
+        winner: Optional[_OpenedStream] = None
+        last_error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winners = [task.result() for task in done if task.exception() is None]
+                if winners:
+                    winner = winners[0]
+                    return winner
+                for task in done:
+                    last_error = task.exception()
+                    if not isinstance(last_error, LLMError):
+                        raise last_error  # type: ignore[misc]
+        finally:
+            # 敗者（または中断時の全タスク）をキャンセル
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            # キャンセル前に開始済みになったストリーム（同時完了を含む）を閉じ、
+            # ブレーカーの試行枠を解放
+            for task in tasks:
+                if not task.done() or task.cancelled() or task.exception():
+                    continue
+                extra = task.result()
+                if extra is not winner:
+                    get_circuit_breaker(extra.provider.provider_name).release()
+                    await extra.stream.aclose()
+
+        raise last_error  # type: ignore[misc]
+
+    async def _relay_stream(
+        self, opened: _OpenedStream
+    ) -> AsyncGenerator[LLMResponse, None]:
+        """開始済みストリームを中継し、完了時に統計とブレーカーを更新"""
+        breaker = get_circuit_breaker(opened.provider.provider_name)
+        first_token_at = time.monotonic()
+        chars = 0
+        try:
+            if opened.first_chunk is not None:
+                chars += len(opened.first_chunk.content)
+                yield opened.first_chunk
+            async for chunk in opened.stream:
+                chars += len(chunk.content)
+                yield chunk
+        except LLMError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # 呼び出し側の中断（切断・キャンセル）はプロバイダーの失敗ではない
+            breaker.release()
+            raise
+        finally:
+            await opened.stream.aclose()
+
+        breaker.record_success(opened.ttft)
+        duration = time.monotonic() - first_token_at
+        if chars and duration > 0:
+            self._latency_stats(opened.provider).record_throughput(chars / duration)
 
     async def health_check(self) -> bool:
         """ヘルスチェック"""
@@ -72,4 +370,15 @@ class LLMService:
         if not self.provider:
             return {"provider": None, "available": False}
 
-        return {"provider": self.provider.__class__.__name__, "available": True}
+        return {
+            "provider": self.provider.__class__.__name__,
+            "available": True,
+            "failover_chain": [
+                {
+                    "provider": provider.provider_name,
+                    "circuit": get_circuit_breaker(provider.provider_name).state.value,
+                    "latency": self._latency_stats(provider).get_stats(),
+                }
+                for provider in self._route_providers()
+            ],
+        }
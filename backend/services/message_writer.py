@@ -0,0 +1,248 @@
+"""
+メッセージのライトビハインド書き込み
+
+メッセージ・使用量レコードの INSERT とセッションの updated_at 更新を
+短い間隔（flush_interval）でまとめ、1トランザクションでコミットする。
+同時に届いた書き込みは1回のコミット（fsync）を共有する。
+
+durable=True の書き込みはコミット完了まで待ち、失敗は呼び出し元に送出する。
+durable=False はキュー投入後すぐに戻り、失敗はログのみ。残りは close() でフラッシュする。
+"""
+
+import asyncio
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import structlog
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings  # type: ignore[attr-defined]
+from models.session import Session
+
+logger = structlog.get_logger(__name__)
+
+SessionFactory = Callable[[], AsyncSession]
+
+
+@dataclass
+class _PendingWrite:
+    """キュー内の書き込み1件（同じトランザクションで保存するオブジェクト群）"""
+
+    objects: List[Any]
+    session_id: Optional[str]
+    future: Optional["asyncio.Future[None]"] = None
+
+
+def _stamp(obj: Any, now: datetime) -> None:
+    """ID と作成日時をキュー投入時に確定（コミット前の参照・並び順のため）"""
+    if hasattr(obj, "id") and obj.id is None:
+        obj.id = str(uuid.uuid4())
+    if hasattr(obj, "created_at") and obj.created_at is None:
+        obj.created_at = now
+
+
+class MessageWriter:
+    """メッセージ保存とセッション更新日時をまとめてコミットするライター"""
+
+    def __init__(
+        self,
+        session_factory: Optional[SessionFactory] = None,
+        flush_interval: float = 0.02,
+        max_batch: int = 100,
+        durable: bool = True,
+        enabled: bool = True,
+    ) -> None:
+        self._session_factory = session_factory
+        self.flush_interval = max(0.0, flush_interval)
+        self.max_batch = max(1, max_batch)
+        self.durable = durable
+        self.enabled = enabled
+        self._pending: List[_PendingWrite] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._draining = False
+        self._stats: Dict[str, int] = {
+            "batches": 0,
+            "writes": 0,
+            "objects": 0,
+            "failed_writes": 0,
+        }
+
+    def _get_session_factory(self) -> SessionFactory:
+        if self._session_factory is None:
+            from database import SessionLocal
+
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    async def write(
+        self,
+        *objects: Any,
+        session_id: Optional[str] = None,
+        durable: Optional[bool] = None,
+    ) -> None:
+        """オブジェクトを保存し、session_id のセッションの updated_at を更新"""
+        now = datetime.now(timezone.utc)
+        for obj in objects:
+            _stamp(obj, now)
+        item = _PendingWrite(objects=list(objects), session_id=session_id)
+
+        if not self.enabled:
+            # まとめずにその場でコミット
+            await self._commit([item])
+            return
+
+        if self.durable if durable is None else durable:
+            item.future = asyncio.get_running_loop().create_future()
+        self._pending.append(item)
+        self._schedule()
+        if item.future is not None:
+            await item.future
+
+    def _schedule(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._batch_full = asyncio.Event()
+            self._flush_task = asyncio.create_task(self._run())
+        if self._batch_full is not None and len(self._pending) >= self.max_batch:
+            self._batch_full.set()
+
+    async def _run(self) -> None:
+        """最大 flush_interval 待って、キューが空になるまでコミット"""
+        while self._pending:
+            event = self._batch_full
+            if (
+                event is not None
+                and not self._draining
+                and len(self._pending) < self.max_batch
+            ):
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+            await self._flush_batch()
+
+    async def _flush_batch(self) -> None:
+        batch = self._pending[: self.max_batch]
+        del self._pending[: len(batch)]
+        if not batch:
+            return
+
+        try:
+            await self._commit(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._fail(batch[0], e)
+                return
+            # 1件の失敗（削除済みセッション等）で他の書き込みを失敗させない
+            logger.warning(
+                "Message write batch failed, retrying individually",
+                writes=len(batch),
+                error=str(e),
+            )
+            for item in batch:
+                try:
+                    await self._commit([item])
+                except Exception as item_error:
+                    self._fail(item, item_error)
+                else:
+                    self._resolve(item)
+            return
+
+        for item in batch:
+            self._resolve(item)
+
+    async def _commit(self, batch: List[_PendingWrite]) -> None:
+        session_ids = {item.session_id for item in batch if item.session_id}
+        async with self._get_session_factory()() as db:
+            try:
+                for item in batch:
+                    db.add_all(item.objects)
+                if session_ids:
+                    await db.execute(
+                        update(Session)
+                        .where(Session.id.in_(session_ids))
+                        .values(updated_at=datetime.now(timezone.utc))
+                        # 更新日時のみの変更は一覧をスティッキーにしない（database.py 参照）
+                        .execution_options(
+                            synchronize_session=False, sticky_keys=tuple(session_ids)
+                        )
+                    )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+        self._stats["batches"] += 1
+        self._stats["writes"] += len(batch)
+        self._stats["objects"] += sum(len(item.objects) for item in batch)
+
+    @staticmethod
+    def _resolve(item: _PendingWrite) -> None:
+        if item.future is not None and not item.future.done():
+            item.future.set_result(None)
+
+    def _fail(self, item: _PendingWrite, error: Exception) -> None:
+        self._stats["failed_writes"] += 1
+        if item.future is not None and not item.future.done():
+            item.future.set_exception(error)
+        else:
+            logger.error(
+                "Message write failed",
+                session_id=item.session_id,
+                objects=len(item.objects),
+                error=str(error),
+            )
+
+    async def flush(self) -> None:
+        """キュー内の書き込みを待たずにすべてコミット"""
+        self._draining = True
+        try:
+            if self._batch_full is not None:
+                self._batch_full.set()
+            task = self._flush_task
+            if task is not None and not task.done():
+                await task
+            while self._pending:
+                await self._flush_batch()
+        finally:
+            self._draining = False
+
+    async def close(self) -> None:
+        """残りの書き込みをフラッシュ（アプリケーション終了時）"""
+        pending = len(self._pending)
+        await self.flush()
+        if pending:
+            logger.info("Flushed pending message writes", writes=pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """書き込み統計（/metrics 用）"""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "avg_writes_per_batch": (
+                round(self._stats["writes"] / batches, 2) if batches else 0.0
+            ),
+            "durable": self.durable,
+            "enabled": self.enabled,
+        }
+
+
+_message_writer: Optional[MessageWriter] = None
+
+
+def get_message_writer() -> MessageWriter:
+    """プロセス共有のメッセージライターを取得"""
+    global _message_writer
+    if _message_writer is None:
+        _message_writer = MessageWriter(
+            flush_interval=settings.message_flush_interval,
+            max_batch=settings.message_flush_max_batch,
+            durable=settings.message_write_durable,
+            enabled=settings.message_write_behind_enabled,
+        )
+    return _message_writer
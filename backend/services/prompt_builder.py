@@ -0,0 +1,71 @@
+"""
+プロンプトビルダー
+
+リクエスト間で共通の指示文を先頭（安定プレフィックス）に、検索結果や質問などの
+可変部分を末尾（サフィックス）に配置し、上流のプロンプトキャッシュを効かせる。
+"""
+
+from providers.prompt_cache import PromptParts
+
+RAG_BASE_INSTRUCTION = "あなたは親切で知識豊富なAIアシスタントです。質問に対して正確で有用な回答を提供してください。"
+
+RAG_CONTEXT_INSTRUCTION = """あなたは親切で知識豊富なAIアシスタントです。
+以下の検索結果を参考にして、質問に対して正確で有用な回答を提供してください。
+回答には必ず引用番号 [1], [2], [3] を含めて、どの情報源から得た情報かを明示してください。
+
+検索結果:
+"""
+
+# 検索結果の後ろに置く締めの指示（固定文だがキャッシュ対象のプレフィックスには含めない）
+RAG_CONTEXT_TRAILER = "質問に対して、上記の検索結果を参考にして回答してください。"
+
+REPORT_INSTRUCTION = """あなたは専門的なリサーチアナリストです。以下の質問に対して、提供された情報を基に詳細で構造化されたMarkdownレポートを作成してください。
+
+## レポート作成指示
+1. **構造化**: 適切な見出し（##, ###）を使用して情報を整理
+2. **客観性**: 提供された情報に基づいて事実を正確に記述
+3. **引用**: 重要な情報には出典番号を明記（例：[出典1]）
+4. **完全性**: 質問に対する包括的な回答を提供
+5. **読みやすさ**: 箇条書きや表を適切に使用
+
+## 出力形式
+Markdownフォーマットで以下の構造を含むレポートを作成：
+
+# [質問に関連するタイトル]
+
+## 概要
+- 主要なポイントの要約
+
+## 詳細分析
+### [関連するサブトピック1]
+### [関連するサブトピック2]
+
+## 結論
+- 質問に対する明確な回答
+- 重要な洞察
+
+## 参考文献
+- 使用した出典のリスト
+
+"""
+
+
+def build_rag_system_prompt(context_text: str) -> PromptParts:
+    """RAG 回答用のシステムプロンプト（検索結果は可変サフィックス）"""
+    if not context_text:
+        return PromptParts(RAG_BASE_INSTRUCTION)
+    return PromptParts(
+        RAG_CONTEXT_INSTRUCTION, f"{context_text}\n\n{RAG_CONTEXT_TRAILER}"
+    )
+
+
+def build_report_prompt(question: str, documents_text: str) -> PromptParts:
+    """Deep Research レポート生成用プロンプト（質問・参考資料は可変サフィックス）"""
+    suffix = f"""## 質問
+{question}
+
+## 参考資料
+{documents_text}
+
+レポートを作成してください："""
+    return PromptParts(REPORT_INSTRUCTION, suffix)
@@ -2,27 +2,95 @@
 RAGサービス
 """
 
-import json
 import uuid
-from typing import Optional, List, Dict, Any, AsyncGenerator
+from typing import Optional, List, Dict, Any, AsyncGenerator, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.message import Message, MessageRole
+from models.usage import UsageRecord
+from providers.tokenizer import count_tokens, estimate_usage
+from services.message_writer import MessageWriter
 from services.session_service import SessionService
-from services.llm_service import LLMService
+from services.llm_service import DEFAULT_MAX_TOKENS, LLMService
+from services.prompt_builder import (
+    RAG_CONTEXT_INSTRUCTION,
+    RAG_CONTEXT_TRAILER,
+    build_rag_system_prompt,
+)
 from services.search_service import SearchService
+from services.usage_service import UsageService, normalize_usage
 
 
 class RAGService:
     """RAGサービス"""
 
     def __init__(
-        self, db: AsyncSession, search_service: Optional[SearchService] = None
+        self,
+        db: AsyncSession,
+        search_service: Optional[SearchService] = None,
+        message_writer: Optional[MessageWriter] = None,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
     ):
         self.db = db
+        # 回答の最大出力トークン数（送信前の予算見積もりにも使う）
+        self.max_tokens = max_tokens
+        # 指定時はメッセージ保存をライトビハインドでまとめてコミットする
+        self.message_writer = message_writer
         self.session_service = SessionService(db)
         self.llm_service = LLMService()
         self.search_service = search_service or SearchService()
+        self.usage_service = UsageService(db)
+
+    async def _check_budget(self, session_id: uuid.UUID, question: str) -> None:
+        """送信前にセッションのトークン予算を確認
+
+        質問・システムプロンプトの固定部分・最大出力トークンで見積もる。
+        検索結果（コンテキスト）は検索前のため含まない。
+        """
+        estimated = (
+            count_tokens(question)
+            + count_tokens(RAG_CONTEXT_INSTRUCTION)
+            + count_tokens(RAG_CONTEXT_TRAILER)
+            + self.max_tokens
+        )
+        await self.usage_service.check_session_budget(str(session_id), estimated)
+
+    def _record_usage(
+        self,
+        session_id: uuid.UUID,
+        message_id: str,
+        provider: str,
+        model: str,
+        usage: Optional[Dict[str, Any]],
+        question: str,
+        answer: str,
+        system_message: str,
+    ) -> Tuple[Optional[UsageRecord], Optional[Dict[str, int]]]:
+        """使用量レコードを作成（上流が返さない場合はローカルトークナイザーで推定）"""
+        estimated = usage is None
+        if estimated:
+            usage = estimate_usage(question, answer, system_message)
+        record = self.usage_service.build_record(
+            provider=provider,
+            model=model,
+            usage=usage,
+            session_id=str(session_id),
+            message_id=message_id,
+            estimated=estimated,
+        )
+        return record, normalize_usage(usage)
+
+    async def _save(self, session_id: uuid.UUID, *objects: Any) -> None:
+        """メッセージ等を1トランザクションで保存し、セッションの updated_at を更新"""
+        to_save = [obj for obj in objects if obj is not None]
+        if self.message_writer is not None:
+            await self.message_writer.write(*to_save, session_id=str(session_id))
+            return
+
+        for obj in to_save:
+            self.db.add(obj)
+        await self.session_service.touch_session(str(session_id))
+        await self.db.commit()
 
     async def ask_question(
         self,
@@ -41,13 +109,13 @@ class RAGService:
             if not session:
                 raise ValueError(f"Session not found: {session_id}")
 
+            await self._check_budget(session_id, question)
+
             # ユーザーメッセージを保存
             user_message = Message(
                 session_id=str(session_id), role=MessageRole.USER, content=question
             )
-            self.db.add(user_message)
-            await self.db.commit()
-            await self.db.refresh(user_message)
+            await self._save(session_id, user_message)
 
             # Azure AI Searchでドキュメント検索
             search_results = []
@@ -97,43 +165,44 @@ class RAGService:
                 print(f"Search error: {search_error}")
 
             # システムメッセージ構築（検索結果がある場合は引用付き回答を指示）
-            if context_text:
-                system_message = f"""あなたは親切で知識豊富なAIアシスタントです。
-以下の検索結果を参考にして、質問に対して正確で有用な回答を提供してください。
-回答には必ず引用番号 [1], [2], [3] を含めて、どの情報源から得た情報かを明示してください。
-
-検索結果:
-{context_text}
-
-質問に対して、上記の検索結果を参考にして回答してください。"""
-            else:
-                system_message = "あなたは親切で知識豊富なAIアシスタントです。質問に対して正確で有用な回答を提供してください。"
+            system_message = build_rag_system_prompt(context_text)
 
             # LLMで回答生成
             llm_response = await self.llm_service.generate_response(
                 prompt=question,
                 system_message=system_message,
+                max_tokens=self.max_tokens,
+            )
+
+            # 使用量をアシスタントメッセージと同じトランザクションで保存
+            assistant_message_id = str(uuid.uuid4())
+            usage_record, usage = self._record_usage(
+                session_id,
+                assistant_message_id,
+                llm_response.provider,
+                llm_response.model,
+                llm_response.usage,
+                question,
+                llm_response.content,
+                system_message,
             )
 
             # アシスタントメッセージを保存
             assistant_message = Message(
+                id=assistant_message_id,
                 session_id=str(session_id),
                 role=MessageRole.ASSISTANT,
                 content=llm_response.content,
-                citations=json.dumps(citations),  # 引用情報をJSON形式で保存
-                meta_data=json.dumps(
-                    {
-                        "provider": llm_response.provider,
-                        "model": llm_response.model,
-                        "usage": llm_response.usage,
-                        "search_results_count": len(search_results),
-                        "has_context": bool(context_text),
-                    }
-                ),
+                citations=citations,
+                meta_data={
+                    "provider": llm_response.provider,
+                    "model": llm_response.model,
+                    "usage": usage,
+                    "search_results_count": len(search_results),
+                    "has_context": bool(context_text),
+                },
             )
-            self.db.add(assistant_message)
-            await self.db.commit()
-            await self.db.refresh(assistant_message)
+            await self._save(session_id, assistant_message, usage_record)
 
             return {
                 "answer": llm_response.content,
@@ -143,7 +212,7 @@ class RAGService:
                 "metadata": {
                     "provider": llm_response.provider,
                     "model": llm_response.model,
-                    "usage": llm_response.usage,
+                    "usage": usage,
                     "search_results_count": len(search_results),
                     "has_context": bool(context_text),
                 },
@@ -180,13 +249,13 @@ class RAGService:
                 }
                 return
 
+            await self._check_budget(session_id, question)
+
             # ユーザーメッセージを保存
             user_message = Message(
                 session_id=str(session_id), role=MessageRole.USER, content=question
             )
-            self.db.add(user_message)
-            await self.db.commit()
-            await self.db.refresh(user_message)
+            await self._save(session_id, user_message)
 
             # Azure AI Searchでドキュメント検索
             search_results = []
@@ -235,48 +304,58 @@ class RAGService:
                 print(f"Search error: {search_error}")
 
             # システムメッセージ構築
-            if context_text:
-                system_message = f"""あなたは親切で知識豊富なAIアシスタントです。
-以下の検索結果を参考にして、質問に対して正確で有用な回答を提供してください。
-回答には必ず引用番号 [1], [2], [3] を含めて、どの情報源から得た情報かを明示してください。
-
-検索結果:
-{context_text}
+            system_message = build_rag_system_prompt(context_text)
 
-質問に対して、上記の検索結果を参考にして回答してください。"""
-            else:
-                system_message = "あなたは親切で知識豊富なAIアシスタントです。質問に対して正確で有用な回答を提供してください。"
-
-            # ストリーミング回答
-            full_response = ""
+            # ストリーミング回答（使用量は最終チャンクで届く）
+            response_parts: List[str] = []
+            provider_name, model_name = "unknown", "unknown"
+            stream_usage: Optional[Dict[str, Any]] = None
             async for chunk in self.llm_service.stream_response(
                 prompt=question,
                 system_message=system_message,
+                max_tokens=self.max_tokens,
             ):
-                full_response += chunk.content
+                provider_name, model_name = chunk.provider, chunk.model
+                if chunk.usage:
+                    stream_usage = chunk.usage
+                if not chunk.content:
+                    continue
+                response_parts.append(chunk.content)
                 yield {
                     "chunk": chunk.content,
                     "session_id": str(session_id),
                     "is_complete": False,
                 }
 
+            answer = "".join(response_parts)
+            assistant_message_id = str(uuid.uuid4())
+            usage_record, usage = self._record_usage(
+                session_id,
+                assistant_message_id,
+                provider_name,
+                model_name,
+                stream_usage,
+                question,
+                answer,
+                system_message,
+            )
+
             # アシスタントメッセージを保存
             assistant_message = Message(
+                id=assistant_message_id,
                 session_id=str(session_id),
                 role=MessageRole.ASSISTANT,
-                content=full_response,
-                citations=json.dumps(citations),
-                meta_data=json.dumps(
-                    {
-                        "provider": "streaming",
-                        "search_results_count": len(search_results),
-                        "has_context": bool(context_text),
-                    }
-                ),
+                content=answer,
+                citations=citations,
+                meta_data={
+                    "provider": provider_name,
+                    "model": model_name,
+                    "usage": usage,
+                    "search_results_count": len(search_results),
+                    "has_context": bool(context_text),
+                },
             )
-            self.db.add(assistant_message)
-            await self.db.commit()
-            await self.db.refresh(assistant_message)
+            await self._save(session_id, assistant_message, usage_record)
 
             # 完了通知
             yield {
@@ -402,6 +481,8 @@ class RAGService:
                 }
                 return
 
+            await self._check_budget(session_id, question)
+
             # Azure AI Searchでドキュメント検索
             search_results = []
             citations = []
@@ -449,48 +530,58 @@ class RAGService:
                 print(f"Search error: {search_error}")
 
             # システムメッセージ構築
-            if context_text:
-                system_message = f"""あなたは親切で知識豊富なAIアシスタントです。
-以下の検索結果を参考にして、質問に対して正確で有用な回答を提供してください。
-回答には必ず引用番号 [1], [2], [3] を含めて、どの情報源から得た情報かを明示してください。
+            system_message = build_rag_system_prompt(context_text)
 
-検索結果:
-{context_text}
-
-質問に対して、上記の検索結果を参考にして回答してください。"""
-            else:
-                system_message = "あなたは親切で知識豊富なAIアシスタントです。質問に対して正確で有用な回答を提供してください。"
-
-            # ストリーミング回答
-            full_response = ""
+            # ストリーミング回答（使用量は最終チャンクで届く）
+            response_parts: List[str] = []
+            provider_name, model_name = "unknown", "unknown"
+            stream_usage: Optional[Dict[str, Any]] = None
             async for chunk in self.llm_service.stream_response(
                 prompt=question,
                 system_message=system_message,
+                max_tokens=self.max_tokens,
             ):
-                full_response += chunk.content
+                provider_name, model_name = chunk.provider, chunk.model
+                if chunk.usage:
+                    stream_usage = chunk.usage
+                if not chunk.content:
+                    continue
+                response_parts.append(chunk.content)
                 yield {
                     "chunk": chunk.content,
                     "session_id": str(session_id),
                     "is_complete": False,
                 }
 
+            answer = "".join(response_parts)
+            assistant_message_id = str(uuid.uuid4())
+            usage_record, usage = self._record_usage(
+                session_id,
+                assistant_message_id,
+                provider_name,
+                model_name,
+                stream_usage,
+                question,
+                answer,
+                system_message,
+            )
+
             # アシスタントメッセージを保存
             assistant_message = Message(
+                id=assistant_message_id,
                 session_id=str(session_id),
                 role=MessageRole.ASSISTANT,
-                content=full_response,
-                citations=json.dumps(citations),
-                meta_data=json.dumps(
-                    {
-                        "provider": "streaming",
-                        "search_results_count": len(search_results),
-                        "has_context": bool(context_text),
-                    }
-                ),
+                content=answer,
+                citations=citations,
+                meta_data={
+                    "provider": provider_name,
+                    "model": model_name,
+                    "usage": usage,
+                    "search_results_count": len(search_results),
+                    "has_context": bool(context_text),
+                },
             )
-            self.db.add(assistant_message)
-            await self.db.commit()
-            await self.db.refresh(assistant_message)
+            await self._save(session_id, assistant_message, usage_record)
 
             # 完了通知
             yield {
@@ -2,14 +2,82 @@
 セッション管理サービス
 """
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import base64
+import json
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, func, or_, and_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, func, or_, and_
+from sqlalchemy.orm import load_only, selectinload
 
+from config import settings  # type: ignore[attr-defined]
 from models.session import Session
-from models.message import Message
+from models.message import Message, MessageRole
+from models.json_fields import json_text
+from models.usage import UsageRecord
+from services.full_text_search import FullTextSearch, SearchHit
+
+SORT_FIELDS = ("created_at", "updated_at", "last_message_at", "message_count", "title")
+# カーソルで日時として復元するソートキー
+DATETIME_SORT_FIELDS = ("created_at", "updated_at", "last_message_at")
+
+# 総件数キャッシュ: フィルター条件 -> (取得時刻, 件数)
+_count_cache: Dict[Tuple[Any, ...], Tuple[float, int]] = {}
+
+
+@dataclass
+class MessagePreview:
+    """一覧表示用のメッセージ抜粋（引用・メタデータは含めない）"""
+
+    id: str
+    session_id: str
+    role: MessageRole
+    content: str
+    created_at: datetime
+    citations: Optional[List[Dict[str, Any]]] = None
+    meta_data: Optional[Dict[str, Any]] = None
+
+
+def _message_columns(load_content: bool, load_json: bool) -> List[Any]:
+    """メッセージ取得時に読み込む列（本文・JSON は要求時のみ）"""
+    columns: List[Any] = [
+        Message.id,
+        Message.session_id,
+        Message.role,
+        Message.created_at,
+    ]
+    if load_content:
+        columns.append(Message.content)
+    if load_json:
+        columns.extend([Message.citations, Message.meta_data])
+    return columns
+
+
+def invalidate_session_count_cache() -> None:
+    """セッションの作成・削除時に総件数キャッシュを破棄"""
+    _count_cache.clear()
+
+
+def encode_cursor(sort_field: str, row: Any) -> str:
+    """ソートキーとIDからカーソル文字列を作成（セッション・メッセージ共通）"""
+    value = getattr(row, sort_field)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, row.id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(sort_field: str, cursor: str) -> Tuple[Any, str]:
+    """カーソル文字列を (ソートキー, ID) に復元"""
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort_field in DATETIME_SORT_FIELDS:
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return value, str(row_id)
 
 
 class SessionService:
@@ -24,6 +92,7 @@ class SessionService:
         self.db.add(session)
         await self.db.commit()
         await self.db.refresh(session)
+        invalidate_session_count_cache()
         return session
 
     async def get_session(self, session_id: str) -> Optional[Session]:
@@ -33,6 +102,16 @@ class SessionService:
         session = result.scalar_one_or_none()
         return session if isinstance(session, Session) else None
 
+    async def touch_session(self, session_id: str) -> None:
+        """セッションの updated_at を現在時刻に更新（コミットは呼び出し側で行う）"""
+        await self.db.execute(
+            update(Session)
+            .where(Session.id == session_id)
+            .values(updated_at=datetime.now(timezone.utc))
+            # 更新日時のみの変更は一覧をスティッキーにしない（database.py 参照）
+            .execution_options(synchronize_session=False, sticky_keys=(session_id,))
+        )
+
     async def get_session_with_messages(self, session_id: str) -> Optional[Session]:
         """メッセージ付きでセッションを取得"""
         stmt = (
@@ -44,6 +123,105 @@ class SessionService:
         session = result.scalar_one_or_none()
         return session if isinstance(session, Session) else None
 
+    async def get_session_messages(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        newest_first: bool = True,
+        load_content: bool = True,
+        load_json: bool = True,
+    ) -> Dict[str, Any]:
+        """セッションのメッセージをカーソルでページング取得
+
+        after は前ページの next_cursor。load_content / load_json が False の列
+        （本文・引用・メタデータ）は読み込まないため、呼び出し側で参照しないこと。
+        """
+        stmt = (
+            select(Message)
+            .options(load_only(*_message_columns(load_content, load_json)))
+            .where(Message.session_id == session_id)
+        )
+
+        if after:
+            value, last_id = decode_cursor("created_at", after)
+            if newest_first:
+                stmt = stmt.where(
+                    or_(
+                        Message.created_at < value,
+                        and_(Message.created_at == value, Message.id < last_id),
+                    )
+                )
+            else:
+                stmt = stmt.where(
+                    or_(
+                        Message.created_at > value,
+                        and_(Message.created_at == value, Message.id > last_id),
+                    )
+                )
+
+        if newest_first:
+            stmt = stmt.order_by(Message.created_at.desc(), Message.id.desc())
+        else:
+            stmt = stmt.order_by(Message.created_at.asc(), Message.id.asc())
+
+        # 1件多く取得して続きの有無を判定
+        if limit is not None:
+            stmt = stmt.limit(limit + 1)
+
+        result = await self.db.execute(stmt)
+        messages = [m for m in result.scalars().all() if isinstance(m, Message)]
+
+        has_more = limit is not None and len(messages) > limit
+        if has_more:
+            messages = messages[:limit]
+
+        return {
+            "messages": messages,
+            "has_more": has_more,
+            "next_cursor": (
+                encode_cursor("created_at", messages[-1])
+                if has_more and messages
+                else None
+            ),
+        }
+
+    async def get_messages_for_sessions(
+        self,
+        session_ids: Sequence[str],
+        load_content: bool = True,
+        load_json: bool = True,
+    ) -> Dict[str, List[Message]]:
+        """複数セッションのメッセージを1クエリで取得（セッションごとに古い順）"""
+        messages: Dict[str, List[Message]] = {sid: [] for sid in session_ids}
+        if not session_ids:
+            return messages
+
+        stmt = (
+            select(Message)
+            .options(load_only(*_message_columns(load_content, load_json)))
+            .where(Message.session_id.in_(list(session_ids)))
+            .order_by(Message.session_id, Message.created_at.asc(), Message.id.asc())
+        )
+        result = await self.db.execute(stmt)
+        for message in result.scalars().all():
+            messages[message.session_id].append(message)
+        return messages
+
+    async def get_messages_by_research_id(
+        self, research_id: str, message_type: Optional[str] = None
+    ) -> List[Message]:
+        """Deep Research の質問・レポートを research_id で取得（式インデックスを使用）"""
+        stmt = select(Message).where(
+            json_text(Message.meta_data, "research_id") == research_id
+        )
+        if message_type is not None:
+            stmt = stmt.where(json_text(Message.meta_data, "type") == message_type)
+        stmt = stmt.order_by(Message.created_at.asc(), Message.id.asc())
+
+        result = await self.db.execute(stmt)
+        return [m for m in result.scalars().all() if isinstance(m, Message)]
+
     async def get_sessions(self, limit: int = 50, offset: int = 0) -> List[Session]:
         """セッション一覧を取得"""
         stmt = (
@@ -56,20 +234,68 @@ class SessionService:
         sessions = result.scalars().all()
         return [s for s in sessions if isinstance(s, Session)]
 
-    async def get_sessions_with_messages(
-        self, limit: int = 50, offset: int = 0
-    ) -> List[Session]:
-        """メッセージ付きでセッション一覧を取得"""
+    async def get_latest_messages(
+        self,
+        session_ids: Sequence[str],
+        per_session: int = 3,
+        max_chars: Optional[int] = None,
+    ) -> Dict[str, List[MessagePreview]]:
+        """セッションごとの最新 N 件のメッセージを1クエリで取得
+
+        ROW_NUMBER() OVER (PARTITION BY session_id) で各セッションの上位 N 件だけを
+        返すため、全メッセージを読み込まない。本文は max_chars 文字で切り詰める。
+        結果は各セッション内で古い順に並ぶ。
+        """
+        previews: Dict[str, List[MessagePreview]] = {
+            session_id: [] for session_id in session_ids
+        }
+        if not session_ids or per_session <= 0:
+            return previews
+
+        content = (
+            func.substr(Message.content, 1, max_chars) if max_chars else Message.content
+        )
+        ranked = (
+            select(
+                Message.id,
+                Message.session_id,
+                Message.role,
+                content.label("content"),
+                Message.created_at,
+                func.row_number()
+                .over(
+                    partition_by=Message.session_id,
+                    order_by=(Message.created_at.desc(), Message.id.desc()),
+                )
+                .label("rank"),
+            )
+            .where(Message.session_id.in_(session_ids))
+            .subquery()
+        )
         stmt = (
-            select(Session)
-            .options(selectinload(Session.messages))
-            .order_by(Session.updated_at.desc())
-            .limit(limit)
-            .offset(offset)
+            select(
+                ranked.c.id,
+                ranked.c.session_id,
+                ranked.c.role,
+                ranked.c.content,
+                ranked.c.created_at,
+            )
+            .where(ranked.c.rank <= per_session)
+            .order_by(ranked.c.session_id, ranked.c.rank.desc())
         )
+
         result = await self.db.execute(stmt)
-        sessions = result.scalars().all()
-        return [s for s in sessions if isinstance(s, Session)]
+        for row in result.all():
+            previews[row.session_id].append(
+                MessagePreview(
+                    id=row.id,
+                    session_id=row.session_id,
+                    role=row.role,
+                    content=row.content,
+                    created_at=row.created_at,
+                )
+            )
+        return previews
 
     async def get_sessions_filtered(
         self,
@@ -82,29 +308,33 @@ class SessionService:
         limit: Optional[int] = None,
         offset: Optional[int] = None,
         include_messages: bool = False,
+        after: Optional[str] = None,
+        include_total_count: bool = True,
     ) -> Dict[str, Any]:
-        """フィルタリング・ソート機能付きセッション一覧取得"""
+        """フィルタリング・ソート機能付きセッション一覧取得
 
-        # ベースクエリ
-        if include_messages:
-            stmt = select(Session).options(selectinload(Session.messages))
-        else:
-            stmt = select(Session)
+        after（前ページの next_cursor）を指定するとキーセット方式でページングし、
+        OFFSET と異なり何ページ目でも先頭ページと同じコストで取得できる。
+        総件数は include_total_count 指定時のみ数え、短時間キャッシュする。
+        include_messages 指定時はメッセージ本文も検索対象にする。
+        """
+        if sort_field not in SORT_FIELDS:
+            sort_field = "created_at"
+        descending = sort_order.lower() != "asc"
+
+        # ベースクエリ（メッセージは読み込まない。表示用は get_latest_messages で取得）
+        stmt = select(Session)
 
         # フィルタリング条件を構築
         conditions = []
 
-        # 検索クエリ（タイトルまたはメッセージ内容）
+        # 検索クエリ（タイトル、include_messages 時はメッセージ内容も）
         if search_query:
-            search_conditions = [Session.title.ilike(f"%{search_query}%")]
-
-            # メッセージ内容も検索対象に含める
-            if include_messages:
-                search_conditions.append(
-                    Session.messages.any(Message.content.ilike(f"%{search_query}%"))
+            conditions.append(
+                FullTextSearch(self.db).session_condition(
+                    search_query, include_messages=include_messages
                 )
-
-            conditions.append(or_(*search_conditions))
+            )
 
         # 作成日時フィルタ
         if created_after:
@@ -113,53 +343,102 @@ class SessionService:
         if created_before:
             conditions.append(Session.created_at <= created_before)
 
-        # メッセージ有無フィルタ
+        # メッセージ有無フィルタ（トリガーで保守する件数列を使い、相関サブクエリを避ける）
         if has_messages is not None:
             if has_messages:
-                conditions.append(Session.messages.any())
+                conditions.append(Session.message_count > 0)
+            else:
+                conditions.append(Session.message_count == 0)
+
+        # 総件数を取得（フィルター条件ごとにキャッシュ）
+        total_count: Optional[int] = None
+        if include_total_count:
+            total_count = await self._count_sessions(
+                conditions,
+                (
+                    search_query,
+                    created_after,
+                    created_before,
+                    has_messages,
+                    include_messages,
+                ),
+            )
+
+        # キーセット条件（ソートキー, ID）で前ページの続きから取得
+        sort_column = getattr(Session, sort_field)
+        page_conditions = list(conditions)
+        if after:
+            value, last_id = decode_cursor(sort_field, after)
+            if descending:
+                page_conditions.append(
+                    or_(
+                        sort_column < value,
+                        and_(sort_column == value, Session.id < last_id),
+                    )
+                )
             else:
-                conditions.append(~Session.messages.any())
+                page_conditions.append(
+                    or_(
+                        sort_column > value,
+                        and_(sort_column == value, Session.id > last_id),
+                    )
+                )
 
         # 条件を適用
-        if conditions:
-            stmt = stmt.where(and_(*conditions))
+        if page_conditions:
+            stmt = stmt.where(and_(*page_conditions))
 
-        # ソート
-        sort_column = getattr(Session, sort_field, Session.created_at)
-        if sort_order.lower() == "asc":
-            stmt = stmt.order_by(sort_column.asc())
+        # ソート（同値のときの順序を固定するため ID を第2キーにする）
+        if descending:
+            stmt = stmt.order_by(sort_column.desc(), Session.id.desc())
         else:
-            stmt = stmt.order_by(sort_column.desc())
-
-        # 総件数を取得（ページネーション用）
-        count_stmt = select(func.count(Session.id))
-        if conditions:
-            count_stmt = count_stmt.where(and_(*conditions))
-
-        count_result = await self.db.execute(count_stmt)
-        total_count = count_result.scalar() or 0
+            stmt = stmt.order_by(sort_column.asc(), Session.id.asc())
 
-        # ページネーション
+        # ページネーション（1件多く取得して続きの有無を判定）
         if limit is not None:
-            stmt = stmt.limit(limit)
-        if offset is not None:
+            stmt = stmt.limit(limit + 1)
+        if offset is not None and not after:
             stmt = stmt.offset(offset)
 
         # 実行
         result = await self.db.execute(stmt)
-        sessions = result.scalars().all()
+        sessions = [s for s in result.scalars().all() if isinstance(s, Session)]
+
+        has_more = limit is not None and len(sessions) > limit
+        if has_more:
+            sessions = sessions[:limit]
 
-        # has_moreフラグを計算
-        has_more = False
-        if limit is not None and offset is not None:
-            has_more = (offset + limit) < total_count
+        next_cursor = (
+            encode_cursor(sort_field, sessions[-1]) if has_more and sessions else None
+        )
 
         return {
-            "sessions": [s for s in sessions if isinstance(s, Session)],
+            "sessions": sessions,
             "total_count": total_count,
             "has_more": has_more,
+            "next_cursor": next_cursor,
         }
 
+    async def _count_sessions(self, conditions: List[Any], key: Tuple[Any, ...]) -> int:
+        """フィルター条件に一致するセッション数（TTL 付きキャッシュ）"""
+        ttl = settings.session_count_cache_ttl_seconds
+        now = time.monotonic()
+        cached = _count_cache.get(key)
+        if ttl > 0 and cached is not None and now - cached[0] < ttl:
+            return cached[1]
+
+        count_stmt = select(func.count(Session.id))
+        if conditions:
+            count_stmt = count_stmt.where(and_(*conditions))
+
+        count_result = await self.db.execute(count_stmt)
+        total_count = count_result.scalar() or 0
+        if ttl > 0:
+            if len(_count_cache) >= settings.cache_max_size:
+                _count_cache.clear()
+            _count_cache[key] = (now, total_count)
+        return total_count
+
     async def update_session(self, session_id: str, title: str) -> Optional[Session]:
         """セッションを更新"""
         stmt = (
@@ -180,31 +459,85 @@ class SessionService:
         return await self.update_session(session_id, title)
 
     async def delete_session(self, session_id: str) -> bool:
-        """セッションを削除（メッセージも含めてカスケード削除）"""
-        # セッションを取得
-        session = await self.get_session(session_id)
-        if not session:
-            return False
-
-        # オブジェクトレベルで削除（cascadeが有効になる）
-        await self.db.delete(session)
-        await self.db.commit()
-        return True
+        """セッションを削除（メッセージも含めて削除）"""
+        counts = await self.delete_sessions_bulk([session_id])
+        return counts["sessions"] > 0
 
     async def delete_multiple_sessions(self, session_ids: List[str]) -> int:
-        """複数のセッションを一括削除（メッセージも含めてカスケード削除）"""
-        if not session_ids:
-            return 0
-
-        deleted_count = 0
-        for session_id in session_ids:
-            session = await self.get_session(session_id)
-            if session:
-                await self.db.delete(session)
-                deleted_count += 1
-
+        """複数のセッションを一括削除（メッセージも含めて削除）"""
+        counts = await self.delete_sessions_bulk(session_ids)
+        return counts["sessions"]
+
+    async def delete_sessions_bulk(
+        self, session_ids: Sequence[str], batch_size: Optional[int] = None
+    ) -> Dict[str, int]:
+        """セッションを集合演算の DELETE でバッチごとに削除
+
+        ORM オブジェクトを読み込まず、バッチごとに
+        DELETE ... WHERE session_id IN (...) を発行してコミットする。
+        外部キー制約が無効な SQLite でも同じ結果になるよう、子テーブルも明示的に処理する。
+        """
+        batch_size = max(1, batch_size or settings.session_delete_batch_size)
+        unique_ids = list(dict.fromkeys(session_ids))
+        counts = {"sessions": 0, "messages": 0}
+
+        for start in range(0, len(unique_ids), batch_size):
+            batch_counts = await self._delete_session_batch(
+                unique_ids[start : start + batch_size]
+            )
+            counts["sessions"] += batch_counts["sessions"]
+            counts["messages"] += batch_counts["messages"]
+
+        if counts["sessions"]:
+            invalidate_session_count_cache()
+        return counts
+
+    async def delete_all_sessions(
+        self, batch_size: Optional[int] = None
+    ) -> Dict[str, int]:
+        """全セッションをバッチごとに削除"""
+        batch_size = max(1, batch_size or settings.session_delete_batch_size)
+        counts = {"sessions": 0, "messages": 0}
+
+        while True:
+            result = await self.db.execute(select(Session.id).limit(batch_size))
+            batch = list(result.scalars().all())
+            if not batch:
+                break
+            batch_counts = await self._delete_session_batch(batch)
+            counts["sessions"] += batch_counts["sessions"]
+            counts["messages"] += batch_counts["messages"]
+
+        invalidate_session_count_cache()
+        return counts
+
+    async def _delete_session_batch(self, batch: List[str]) -> Dict[str, int]:
+        messages = await self.db.execute(
+            delete(Message)
+            .where(Message.session_id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(
+            update(UsageRecord)
+            .where(UsageRecord.session_id.in_(batch))
+            .values(session_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        sessions = await self.db.execute(
+            delete(Session)
+            .where(Session.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+        # バッチごとにコミットしてトランザクションとロックを短く保つ
         await self.db.commit()
-        return deleted_count
+        return {
+            "sessions": sessions.rowcount or 0,
+            "messages": messages.rowcount or 0,
+        }
+
+    async def search_messages(self, query: str, limit: int = 20) -> List[SearchHit]:
+        """一致度順の検索結果をスニペット付きで取得"""
+        return await FullTextSearch(self.db).search(query, limit)
 
     async def get_session_count(self) -> int:
         """総セッション数を取得"""
@@ -213,15 +546,10 @@ class SessionService:
         return result.scalar() or 0
 
     async def search_sessions(self, query: str, limit: int = 20) -> List[Session]:
-        """セッション検索（簡易版）"""
+        """セッション検索（タイトル・メッセージ内容の全文検索インデックスを使用）"""
         stmt = (
             select(Session)
-            .where(
-                or_(
-                    Session.title.ilike(f"%{query}%"),
-                    Session.messages.any(Message.content.ilike(f"%{query}%")),
-                )
-            )
+            .where(FullTextSearch(self.db).session_condition(query))
             .order_by(Session.updated_at.desc())
             .limit(limit)
         )
@@ -0,0 +1,231 @@
+"""
+クライアント向けストリームの整形（差分の結合・バックプレッシャー）
+
+RAGService のストリーミングチャンク（{"chunk": ..., "is_complete": False, ...}）を
+一定間隔またはバイトサイズでまとめて1フレームにし、送信回数とエンベロープ生成を減らす。
+クライアントが遅い場合はバッファ上限で上流の読み取りを一時停止し、
+一定時間解消しなければ SlowConsumerError でストリームを打ち切る。
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import structlog
+
+from config import settings  # type: ignore[attr-defined]
+
+logger = structlog.get_logger(__name__)
+
+StreamItem = Dict[str, Any]
+
+
+class SlowConsumerError(Exception):
+    """クライアントの受信が追いつかずバッファ上限を超え続けたエラー"""
+
+    pass
+
+
+class _TextFrame:
+    """結合中のテキストチャンク"""
+
+    __slots__ = ("template", "parts", "size")
+
+    def __init__(self, template: StreamItem) -> None:
+        self.template = template
+        self.parts: List[str] = []
+        self.size = 0
+
+    def add(self, text: str, size: int) -> None:
+        self.parts.append(text)
+        self.size += size
+
+    def build(self) -> StreamItem:
+        frame = dict(self.template)
+        frame["chunk"] = "".join(self.parts)
+        return frame
+
+
+# プロセス全体の整形統計
+_stats: Dict[str, int] = {
+    "streams": 0,
+    "deltas_in": 0,
+    "frames_out": 0,
+    "max_buffered_bytes": 0,
+    "slow_consumers": 0,
+}
+
+
+def _is_text_chunk(item: StreamItem) -> bool:
+    return (
+        bool(item.get("chunk")) and not item.get("is_complete") and "error" not in item
+    )
+
+
+class StreamShaper:
+    """差分を時間・サイズでまとめ、バッファ上限でバックプレッシャーをかける"""
+
+    def __init__(
+        self,
+        flush_interval: Optional[float] = None,
+        max_frame_bytes: Optional[int] = None,
+        max_buffer_bytes: Optional[int] = None,
+        slow_consumer_timeout: Optional[float] = None,
+    ) -> None:
+        self.flush_interval = (
+            settings.stream_flush_interval if flush_interval is None else flush_interval
+        )
+        self.max_frame_bytes = (
+            settings.stream_max_frame_bytes
+            if max_frame_bytes is None
+            else max_frame_bytes
+        )
+        self.max_buffer_bytes = (
+            settings.stream_max_buffer_bytes
+            if max_buffer_bytes is None
+            else max_buffer_bytes
+        )
+        self.slow_consumer_timeout = (
+            settings.stream_slow_consumer_timeout
+            if slow_consumer_timeout is None
+            else slow_consumer_timeout
+        )
+
+        self._items: Deque[Any] = deque()
+        self._buffered_bytes = 0
+        self._pending_since: Optional[float] = None
+        self._reader_done = False
+        self._data_ready = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._drained = asyncio.Event()
+
+    async def shape(
+        self, source: AsyncIterator[StreamItem]
+    ) -> AsyncIterator[StreamItem]:
+        """source のチャンクを結合したフレームとして返す"""
+        _stats["streams"] += 1
+        reader = asyncio.create_task(self._read(source))
+        emitted_first = False
+        try:
+            while True:
+                if not self._items:
+                    if self._reader_done:
+                        break
+                    self._data_ready.clear()
+                    await self._data_ready.wait()
+                    continue
+
+                # 最初のフレームは即座に送出し、以降は間隔・サイズで結合する
+                if emitted_first and self._only_text_pending():
+                    await self._wait_for_flush()
+
+                # 送出中に追加された差分は次のフレームに結合する
+                for _ in range(len(self._items)):
+                    entry = self._items.popleft()
+                    if isinstance(entry, _TextFrame):
+                        self._buffered_bytes -= entry.size
+                        item = entry.build()
+                    else:
+                        item = entry
+                    self._pending_since = None
+                    self._flush_now.clear()
+                    self._drained.set()
+                    _stats["frames_out"] += 1
+                    emitted_first = True
+                    yield item
+
+            # 読み取り側の例外（上流エラー・低速クライアント）を呼び出し側へ
+            await reader
+        finally:
+            if not reader.done():
+                reader.cancel()
+                await asyncio.gather(reader, return_exceptions=True)
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _only_text_pending(self) -> bool:
+        return (
+            not self._reader_done
+            and len(self._items) == 1
+            and isinstance(self._items[0], _TextFrame)
+            and self._items[0].size < self.max_frame_bytes
+        )
+
+    async def _wait_for_flush(self) -> None:
+        """フレームが満杯になるか、保留開始から flush_interval 経過するまで待つ"""
+        started = self._pending_since or time.monotonic()
+        remaining = started + self.flush_interval - time.monotonic()
+        if remaining <= 0:
+            return
+        try:
+            await asyncio.wait_for(self._flush_now.wait(), timeout=remaining)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _read(self, source: AsyncIterator[StreamItem]) -> None:
+        try:
+            async for item in source:
+                if _is_text_chunk(item):
+                    await self._wait_for_capacity()
+                    self._append_text(item)
+                else:
+                    # 完了・エラー等の制御チャンクは順序を保ったまま即時送出
+                    self._items.append(item)
+                    self._flush_now.set()
+                self._data_ready.set()
+        finally:
+            self._reader_done = True
+            self._flush_now.set()
+            self._data_ready.set()
+
+    def _append_text(self, item: StreamItem) -> None:
+        text = item["chunk"]
+        size = len(text.encode("utf-8"))
+        tail = self._items[-1] if self._items else None
+        if not isinstance(tail, _TextFrame):
+            tail = _TextFrame(item)
+            self._items.append(tail)
+        tail.add(text, size)
+
+        _stats["deltas_in"] += 1
+        self._buffered_bytes += size
+        _stats["max_buffered_bytes"] = max(
+            _stats["max_buffered_bytes"], self._buffered_bytes
+        )
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        if tail.size >= self.max_frame_bytes:
+            self._flush_now.set()
+
+    async def _wait_for_capacity(self) -> None:
+        """バッファ上限を超えている間は上流の読み取りを止める"""
+        while self._buffered_bytes >= self.max_buffer_bytes:
+            self._drained.clear()
+            try:
+                await asyncio.wait_for(
+                    self._drained.wait(), timeout=self.slow_consumer_timeout
+                )
+            except asyncio.TimeoutError:
+                _stats["slow_consumers"] += 1
+                logger.warning(
+                    "Slow stream consumer, aborting stream",
+                    buffered_bytes=self._buffered_bytes,
+                    timeout=self.slow_consumer_timeout,
+                )
+                raise SlowConsumerError(
+                    f"Client did not drain {self._buffered_bytes} buffered bytes "
+                    f"within {self.slow_consumer_timeout:.0f}s"
+                )
+
+
+async def shape_stream(source: AsyncIterator[StreamItem]) -> AsyncIterator[StreamItem]:
+    """設定値で StreamShaper を適用"""
+    async for item in StreamShaper().shape(source):
+        yield item
+
+
+def get_stream_shaping_stats() -> Dict[str, int]:
+    """ストリーム整形の統計を取得"""
+    return dict(_stats)
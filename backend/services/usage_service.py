@@ -0,0 +1,165 @@
+"""
+トークン使用量計測サービス
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings  # type: ignore[attr-defined]
+from models.usage import UsageRecord
+
+
+class TokenBudgetExceededError(Exception):
+    """セッションのトークン予算超過エラー"""
+
+    pass
+
+
+def normalize_usage(usage: Optional[Dict[str, Any]]) -> Optional[Dict[str, int]]:
+    """プロバイダーごとの使用量表現を共通形式に正規化
+
+    OpenAI互換（prompt_tokens 等）と Google（promptTokenCount 等）に対応する。
+    """
+    if not usage:
+        return None
+
+    prompt_tokens = usage.get("prompt_tokens", usage.get("promptTokenCount")) or 0
+    completion_tokens = (
+        usage.get("completion_tokens", usage.get("candidatesTokenCount")) or 0
+    )
+    total_tokens = usage.get("total_tokens", usage.get("totalTokenCount")) or (
+        prompt_tokens + completion_tokens
+    )
+    details = usage.get("prompt_tokens_details") or {}
+    cached_tokens = (
+        details.get("cached_tokens")
+        or usage.get("cache_read_input_tokens")
+        or usage.get("cachedContentTokenCount")
+        or 0
+    )
+    return {
+        "prompt_tokens": int(prompt_tokens),
+        "completion_tokens": int(completion_tokens),
+        "total_tokens": int(total_tokens),
+        "cached_tokens": int(cached_tokens),
+    }
+
+
+class UsageService:
+    """トークン使用量の記録・集計サービス"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def build_record(
+        provider: str,
+        model: str,
+        usage: Optional[Dict[str, Any]],
+        session_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        estimated: bool = False,
+    ) -> Optional[UsageRecord]:
+        """使用量レコードを作成（DBセッションには追加しない）"""
+        normalized = normalize_usage(usage)
+        if normalized is None:
+            return None
+
+        return UsageRecord(
+            session_id=session_id,
+            message_id=message_id,
+            provider=provider,
+            model=model,
+            estimated=estimated,
+            **normalized,
+        )
+
+    def record_usage(
+        self,
+        provider: str,
+        model: str,
+        usage: Optional[Dict[str, Any]],
+        session_id: Optional[str] = None,
+        message_id: Optional[str] = None,
+        estimated: bool = False,
+    ) -> Optional[UsageRecord]:
+        """使用量をセッションに追加（コミットは呼び出し側で行う）"""
+        record = self.build_record(
+            provider, model, usage, session_id, message_id, estimated
+        )
+        if record is not None:
+            self.db.add(record)
+        return record
+
+    async def get_session_usage(self, session_id: str) -> Dict[str, int]:
+        """セッションの累計使用量を取得"""
+        stmt = select(
+            func.coalesce(func.sum(UsageRecord.prompt_tokens), 0),
+            func.coalesce(func.sum(UsageRecord.completion_tokens), 0),
+            func.coalesce(func.sum(UsageRecord.total_tokens), 0),
+            func.count(UsageRecord.id),
+        ).where(UsageRecord.session_id == session_id)
+        result = await self.db.execute(stmt)
+        prompt_tokens, completion_tokens, total_tokens, requests = result.one()
+        return {
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "total_tokens": int(total_tokens),
+            "requests": int(requests),
+        }
+
+    async def get_usage_summary(
+        self, since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """プロバイダー×モデル別の使用量集計を取得"""
+        stmt = select(
+            UsageRecord.provider,
+            UsageRecord.model,
+            func.count(UsageRecord.id),
+            func.sum(UsageRecord.prompt_tokens),
+            func.sum(UsageRecord.completion_tokens),
+            func.sum(UsageRecord.total_tokens),
+            func.sum(UsageRecord.cached_tokens),
+        ).group_by(UsageRecord.provider, UsageRecord.model)
+        if since is not None:
+            stmt = stmt.where(UsageRecord.created_at >= since)
+
+        result = await self.db.execute(stmt)
+        return [
+            {
+                "provider": provider,
+                "model": model,
+                "requests": int(requests),
+                "prompt_tokens": int(prompt_tokens or 0),
+                "completion_tokens": int(completion_tokens or 0),
+                "total_tokens": int(total_tokens or 0),
+                "cached_tokens": int(cached_tokens or 0),
+            }
+            for (
+                provider,
+                model,
+                requests,
+                prompt_tokens,
+                completion_tokens,
+                total_tokens,
+                cached_tokens,
+            ) in result.all()
+        ]
+
+    async def check_session_budget(
+        self, session_id: str, estimated_tokens: int
+    ) -> None:
+        """送信前にセッションのトークン予算を確認（超過見込みなら例外）"""
+        budget = settings.llm_session_token_budget
+        if budget <= 0:
+            return
+
+        used = (await self.get_session_usage(session_id))["total_tokens"]
+        if used + estimated_tokens > budget:
+            raise TokenBudgetExceededError(
+                f"Session token budget exceeded: {used} used + "
+                f"{estimated_tokens} estimated > {budget}"
+            )
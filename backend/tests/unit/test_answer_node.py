@@ -0,0 +1,116 @@
+"""
+AnswerNode（Map-Reduce レポート生成）のユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from services.deep_research import answer_node as answer_node_module
+from services.deep_research.answer_node import AnswerNode
+from services.deep_research.state import SearchResult, create_initial_state
+from services.llm_batch import ConcurrentBatchBackend
+from tests.mocks.llm_mock import MockLLMResponse
+
+
+class RecordingLLMService:
+    """呼び出しと同時実行数を記録するLLMサービス"""
+
+    def __init__(self, fail_on: str = ""):
+        self.prompts: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_on = fail_on
+
+    async def generate_response(self, prompt, max_tokens=1000, temperature=0.7):
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if self.fail_on and self.fail_on in prompt:
+            raise RuntimeError("summary failed")
+        return MockLLMResponse(content=f"summary-{len(self.prompts)}")
+
+    async def generate_batch(
+        self, prompts, max_tokens=1000, temperature=0.7, concurrency=8
+    ):
+        backend = ConcurrentBatchBackend(self.generate_response, concurrency)
+        return await backend.run(prompts, None, max_tokens, temperature)
+
+
+@pytest.fixture(autouse=True)
+def clear_summary_cache():
+    """テスト間で要約キャッシュを共有しない"""
+    answer_node_module._summary_cache.clear()
+    yield
+    answer_node_module._summary_cache.clear()
+
+
+def _documents(sources: int, per_source: int = 2) -> list[SearchResult]:
+    return [
+        SearchResult(content=f"本文 {s}-{i} " * 50, source=f"doc{s}.md", score=0.9)
+        for s in range(sources)
+        for i in range(per_source)
+    ]
+
+
+class TestAnswerNodeMapReduce:
+    """Map-Reduce モードのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_map_reduce_summarizes_each_source(self):
+        """ソースごとに1回要約し、最終プロンプトには要約のみを含める"""
+        llm = RecordingLLMService()
+        node = AnswerNode(llm, map_reduce=True)
+        state = create_initial_state("質問", "session-1")
+        state["search_results"] = _documents(sources=3)
+
+        result = await node(state)
+
+        # 3ソースの要約 + 最終レポート生成
+        assert len(llm.prompts) == 4
+        assert "summary-" in llm.prompts[-1]
+        assert "本文 0-0" not in llm.prompts[-1]
+        assert result["current_node"] == "answer"
+
+    @pytest.mark.asyncio
+    async def test_map_step_respects_concurrency_limit(self):
+        """Map ステップの並列数が上限を超えない"""
+        llm = RecordingLLMService()
+        node = AnswerNode(llm, map_reduce=True)
+        node.map_concurrency = 2
+
+        await node._build_map_reduce_prompt("質問", _documents(sources=6))
+
+        assert llm.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_summaries_are_cached_by_content(self):
+        """同じ質問・同じ資料の要約はキャッシュから再利用される"""
+        llm = RecordingLLMService()
+        node = AnswerNode(llm, map_reduce=True)
+        documents = _documents(sources=2)
+
+        await node._build_map_reduce_prompt("質問", documents)
+        await node._build_map_reduce_prompt("質問", documents)
+
+        assert len(llm.prompts) == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_summary_falls_back_to_excerpt(self):
+        """要約に失敗したソースは抜粋で代替される"""
+        llm = RecordingLLMService(fail_on="doc1.md")
+        node = AnswerNode(llm, map_reduce=True)
+
+        prompt = await node._build_map_reduce_prompt("質問", _documents(sources=2))
+
+        assert "本文 1-0" in prompt
+        assert "summary-" in prompt
+
+    def test_auto_mode_switches_on_large_evidence(self):
+        """自動モードでは資料量が多い場合のみ Map-Reduce を使う"""
+        node = AnswerNode(RecordingLLMService())
+
+        assert node._should_map_reduce(_documents(sources=1)) is False
+        assert node._should_map_reduce(_documents(sources=6)) is True
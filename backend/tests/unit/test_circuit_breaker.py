@@ -0,0 +1,206 @@
+"""
+サーキットブレーカーとプロバイダーフェイルオーバーのユニットテスト
+"""
+
+import time
+
+import pytest
+
+from providers.base import LLMError
+from providers.circuit_breaker import (
+    CircuitBreaker,
+    CircuitState,
+    get_circuit_breaker,
+    reset_circuit_breakers,
+)
+from providers.mock import MockLLMProvider
+from services.llm_service import LLMService
+
+
+class NamedMockProvider(MockLLMProvider):
+    """プロバイダー名を指定できるモックプロバイダー"""
+
+    def __init__(self, name: str, **kwargs):
+        super().__init__(response_delay=0.0, **kwargs)
+        self.name = name
+        self.calls = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+    async def generate(self, prompt, **kwargs):
+        self.calls += 1
+        return await super().generate(prompt, **kwargs)
+
+    async def stream(self, prompt, **kwargs):
+        self.calls += 1
+        async for chunk in super().stream(prompt, **kwargs):
+            yield chunk
+
+
+class MidStreamFailureProvider(NamedMockProvider):
+    """1チャンク返した後に失敗するプロバイダー"""
+
+    async def stream(self, prompt, **kwargs):
+        async for chunk in super().stream(prompt, **kwargs):
+            yield chunk
+            raise LLMError("connection lost")
+
+
+@pytest.fixture(autouse=True)
+def clear_breakers():
+    """テスト間でブレーカー状態を共有しない"""
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+def _service(*providers) -> LLMService:
+    service = LLMService()
+    service.providers = list(providers)
+    service.provider = providers[0]
+    return service
+
+
+class TestCircuitBreaker:
+    """サーキットブレーカー単体のテスト"""
+
+    def test_opens_when_failure_rate_exceeds_threshold(self):
+        """失敗率が閾値を超えると OPEN になり呼び出しを止める"""
+        breaker = CircuitBreaker("p", min_calls=4, failure_rate_threshold=0.5)
+
+        breaker.record_success(0.1)
+        breaker.record_success(0.1)
+        breaker.record_failure()
+        assert breaker.state == CircuitState.CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.allow_request() is False
+
+    def test_slow_responses_count_as_failures(self):
+        """低速応答は失敗として集計される"""
+        breaker = CircuitBreaker("p", min_calls=2, slow_call_seconds=1.0)
+
+        breaker.record_success(5.0)
+        breaker.record_success(5.0)
+
+        assert breaker.state == CircuitState.OPEN
+
+    def test_success_without_latency_is_not_slow(self):
+        """所要時間を渡さない成功は低速判定しない"""
+        breaker = CircuitBreaker("p", min_calls=2, slow_call_seconds=0.0)
+
+        breaker.record_success()
+        breaker.record_success()
+
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.total_successes == 2
+
+    def test_half_open_probe_restores_provider(self):
+        """待機時間経過後は1件だけ試行し、成功すれば CLOSED に戻る"""
+        breaker = CircuitBreaker("p", min_calls=1, open_seconds=10.0)
+        breaker.record_failure()
+        breaker.opened_at = time.monotonic() - 11.0
+
+        assert breaker.allow_request() is True
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert breaker.allow_request() is False
+
+        breaker.record_success(0.1)
+        assert breaker.state == CircuitState.CLOSED
+
+    def test_failed_probe_reopens(self):
+        """HALF_OPEN での失敗は再び OPEN にする"""
+        breaker = CircuitBreaker("p", min_calls=1, open_seconds=10.0)
+        breaker.record_failure()
+        breaker.opened_at = time.monotonic() - 11.0
+        breaker.allow_request()
+
+        breaker.record_failure()
+
+        assert breaker.state == CircuitState.OPEN
+        assert breaker.times_opened == 2
+
+
+class TestLLMServiceFailover:
+    """LLMService のフェイルオーバーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_generate_fails_over_to_next_provider(self):
+        """プライマリが失敗したら次のプロバイダーで応答する"""
+        primary = NamedMockProvider("primary", fail_requests=True)
+        fallback = NamedMockProvider("fallback")
+        service = _service(primary, fallback)
+
+        response = await service.generate_response("質問")
+
+        assert response.provider == "fallback"
+        assert get_circuit_breaker("primary").total_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_generate_is_not_counted_as_failure(self):
+        """非ストリーミング生成は所要時間が長くても失敗にしない"""
+        primary = NamedMockProvider("primary")
+        primary.response_delay = 0.05
+        service = _service(primary)
+        breaker = get_circuit_breaker("primary")
+        breaker.slow_call_seconds = 0.0
+
+        await service.generate_response("質問")
+
+        assert breaker.total_failures == 0
+        assert breaker.total_successes == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_provider(self):
+        """サーキットが開いているプロバイダーは呼び出さない"""
+        primary = NamedMockProvider("primary")
+        fallback = NamedMockProvider("fallback")
+        service = _service(primary, fallback)
+        get_circuit_breaker("primary")._open()
+
+        await service.generate_response("質問")
+
+        assert primary.calls == 0
+        assert fallback.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_all_providers_failing_raises(self):
+        """全プロバイダーが失敗した場合は LLMError"""
+        service = _service(
+            NamedMockProvider("a", fail_requests=True),
+            NamedMockProvider("b", fail_requests=True),
+        )
+
+        with pytest.raises(LLMError):
+            await service.generate_response("質問")
+
+    @pytest.mark.asyncio
+    async def test_stream_fails_over_before_first_token(self):
+        """最初のチャンク前の失敗は次のプロバイダーでストリーミングする"""
+        service = _service(
+            NamedMockProvider("primary", fail_requests=True),
+            NamedMockProvider("fallback"),
+        )
+
+        chunks = [chunk async for chunk in service.stream_response("質問")]
+
+        assert chunks
+        assert all(chunk.provider == "fallback" for chunk in chunks)
+
+    @pytest.mark.asyncio
+    async def test_stream_does_not_fail_over_after_first_token(self):
+        """チャンク送信後の失敗はフェイルオーバーせずに送出する"""
+        primary = MidStreamFailureProvider("primary")
+        fallback = NamedMockProvider("fallback")
+        service = _service(primary, fallback)
+
+        chunks = []
+        with pytest.raises(LLMError):
+            async for chunk in service.stream_response("質問"):
+                chunks.append(chunk)
+
+        assert len(chunks) == 1
+        assert fallback.calls == 0
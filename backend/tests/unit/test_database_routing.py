@@ -0,0 +1,125 @@
+"""
+読み取りレプリカ振り分けのユニットテスト
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import database
+from database import LIST_KEY, PrimarySession, ReplicaRouter, get_read_db
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    """primary とレプリカ（別ファイルの SQLite）"""
+    primary = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}")
+    replica = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}")
+    for engine in (primary, replica):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    yield primary, replica
+    await primary.dispose()
+    await replica.dispose()
+
+
+@pytest.fixture
+def router(engines, monkeypatch):
+    """テスト用のエンジンに差し替えたルーター"""
+    primary, replica = engines
+    router = ReplicaRouter([replica], sticky_seconds=60)
+    monkeypatch.setattr(database, "replica_router", router)
+    monkeypatch.setattr(
+        database,
+        "SessionLocal",
+        async_sessionmaker(
+            bind=primary,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            sync_session_class=PrimarySession,
+        ),
+    )
+    return router
+
+
+async def _read_bind(sticky_key=None):
+    async for db in get_read_db(sticky_key):
+        return db.bind
+
+
+class TestReplicaRouter:
+    """ReplicaRouter のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_reads_go_to_replica_until_write(self, router, engines):
+        """書き込みのないキーはレプリカ、書き込んだセッションは primary から読む"""
+        primary, replica = engines
+
+        assert await _read_bind("s-1") is replica
+
+        async with database.SessionLocal() as db:
+            db.add(Session(id="s-1", title="new"))
+            await db.commit()
+
+        assert await _read_bind("s-1") is primary
+        assert await _read_bind() is primary  # 一覧にも新しいセッションが出る
+        assert await _read_bind("s-2") is replica
+        assert router.get_stats()["sticky_reads"] == 2
+
+    @pytest.mark.asyncio
+    async def test_message_writes_do_not_pin_session_list(self, router):
+        """メッセージ追加と更新日時の更新は該当セッションだけをスティッキーにする"""
+        async with database.SessionLocal() as db:
+            db.add(Message(session_id="s-1", role=MessageRole.USER, content="q"))
+            await db.execute(
+                update(Session)
+                .where(Session.id == "s-1")
+                .values(title="t")
+                .execution_options(sticky_keys=("s-1",))
+            )
+            await db.commit()
+
+        assert router.is_sticky("s-1")
+        assert not router.is_sticky(LIST_KEY)
+
+    @pytest.mark.asyncio
+    async def test_bulk_delete_pins_session_list(self, router):
+        """キー指定のない一括削除は一覧をスティッキーにする"""
+        async with database.SessionLocal() as db:
+            await db.execute(delete(Session).where(Session.id == "s-1"))
+            await db.commit()
+
+        assert router.is_sticky(LIST_KEY)
+
+    @pytest.mark.asyncio
+    async def test_rolled_back_writes_are_not_recorded(self, router):
+        """ロールバックした書き込みはスティッキーにしない"""
+        async with database.SessionLocal() as db:
+            db.add(Session(id="s-1", title="new"))
+            await db.flush()
+            await db.rollback()
+
+        assert not router.is_sticky("s-1")
+
+    def test_round_robin_without_sticky_keys(self, engines):
+        """複数レプリカには順番に振り分ける"""
+        _, replica = engines
+        router = ReplicaRouter([replica, replica], sticky_seconds=1)
+
+        first = router.read_session_factory("s-1")
+        second = router.read_session_factory("s-1")
+
+        assert first is not second
+        assert router.read_session_factory("s-1") is first
+
+    def test_without_replicas_reads_primary(self):
+        """レプリカ未設定なら常に primary"""
+        router = ReplicaRouter()
+        router.record_write(["s-1"])
+
+        assert router.read_session_factory("s-1") is database.SessionLocal
+        assert router.get_stats()["primary_reads"] == 1
@@ -0,0 +1,183 @@
+"""
+データベース メトリクスのユニットテスト
+"""
+
+import pytest
+import pytest_asyncio
+import strawberry
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+import database
+from api.context import (
+    DatabaseSessionExtension,
+    GraphQLContext,
+    ResolverMetricsExtension,
+)
+from api.resolvers.query import Query
+from db_metrics import (
+    Histogram,
+    get_database_metrics,
+    instrument_engine,
+    metered_pool_class,
+    reset_database_metrics,
+)
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    reset_database_metrics()
+    yield
+    reset_database_metrics()
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    """計測を登録したテスト用エンジン"""
+    config = database.get_database_config(
+        f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}"
+    )
+    config["echo"] = False
+    engine = database._create_engine(config, "test")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+class TestHistogram:
+    """Histogram のテスト"""
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value)
+
+        stats = histogram.to_dict()
+
+        assert stats["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+        assert stats["count"] == 4
+        assert stats["max"] == 3.0
+
+
+class TestEngineMetrics:
+    """エンジン・プールの計測のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_statements_and_acquire_wait_are_recorded(self, engine):
+        """SQL 実行時間と接続取得待ち時間をエンジン名で集計"""
+        reset_database_metrics()
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+
+        stats = get_database_metrics().engine("test").get_stats()
+        assert stats["statement_seconds"]["count"] == 2
+        assert stats["acquire_wait_seconds"]["count"] == 1
+        assert stats["slow_statements"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_statements_are_counted(self, engine):
+        """しきい値以上の SQL を遅い SQL として数える"""
+        instrument_engine(engine, "slow", slow_query_seconds=1e-9)
+
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        assert get_database_metrics().engine("slow").slow_statements == 1
+
+    @pytest.mark.asyncio
+    async def test_pool_exhaustion_is_counted(self, tmp_path):
+        """接続を取得できずタイムアウトした回数を数える"""
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'tiny.db'}",
+            poolclass=metered_pool_class(AsyncAdaptedQueuePool),
+            pool_logging_name="tiny",
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        try:
+            async with engine.connect():
+                with pytest.raises(PoolTimeoutError):
+                    async with engine.connect():
+                        pass
+        finally:
+            await engine.dispose()
+
+        assert get_database_metrics().engine("tiny").acquire_timeouts == 1
+
+    def test_metered_pool_class_is_cached(self):
+        metered = metered_pool_class(AsyncAdaptedQueuePool)
+
+        assert metered is metered_pool_class(AsyncAdaptedQueuePool)
+        assert metered_pool_class(metered) is metered
+        assert issubclass(metered, AsyncAdaptedQueuePool)
+
+
+class TestResolverMetrics:
+    """リゾルバー別の SQL 件数のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_queries_are_counted_per_resolver(self, engine):
+        """DataLoader のバッチ取得は読み込みを要求したフィールドに計上"""
+        factory = async_sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with factory() as db:
+            for i in range(3):
+                db.add(Session(id=f"s-{i}", title=f"chat {i}"))
+                db.add(Message(session_id=f"s-{i}", role=MessageRole.USER, content="q"))
+            await db.commit()
+        reset_database_metrics()
+
+        schema = strawberry.Schema(
+            query=Query,
+            extensions=[DatabaseSessionExtension, ResolverMetricsExtension],
+        )
+        result = await schema.execute(
+            "query { sessions { id lastMessage { id } } }",
+            context_value=GraphQLContext(session_factory=factory),
+        )
+
+        assert result.errors is None
+        resolvers = get_database_metrics().get_stats()["resolvers"]
+        assert resolvers["Query.sessions"]["queries"] == 1
+        assert resolvers["SessionType.lastMessage"]["queries"] == 1
+
+
+class TestDatabaseHealth:
+    """check_database_health のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_healthy(self, engine, monkeypatch):
+        monkeypatch.setattr(database, "engine", engine)
+
+        health = await database.check_database_health()
+
+        assert health["status"] == "healthy"
+        assert health["health_check_result"] == 1
+        assert "checked_out" in health["pool_status"]
+
+    @pytest.mark.asyncio
+    async def test_unhealthy_on_timeout(self, tmp_path, monkeypatch):
+        """接続を取得できない場合は timeout 秒で unhealthy を返す"""
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'busy.db'}",
+            pool_size=1,
+            max_overflow=0,
+        )
+        monkeypatch.setattr(database, "engine", engine)
+        try:
+            async with engine.connect():
+                health = await database.check_database_health(timeout=0.05)
+        finally:
+            await engine.dispose()
+
+        assert health["status"] == "unhealthy"
+        assert "timed out" in health["error"]
@@ -0,0 +1,130 @@
+"""
+セッション・メッセージ全文検索のユニットテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+from services.full_text_search import FullTextSearch
+from services.session_service import SessionService, invalidate_session_count_cache
+
+
+@pytest_asyncio.fixture
+async def db():
+    """FTS5 インデックス付きのインメモリ SQLite"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+    invalidate_session_count_cache()
+
+
+async def _seed(db) -> None:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        ("s-1", "東京の天気", ["東京の明日は晴れのち曇りです。"]),
+        ("s-2", "レシピ相談", ["カレーの作り方", "東京風カレーも人気です"]),
+        ("s-3", "雑談", ["100% 果汁のジュース"]),
+    ]
+    for i, (session_id, title, contents) in enumerate(rows):
+        db.add(Session(id=session_id, title=title, updated_at=base + timedelta(i)))
+        for j, content in enumerate(contents):
+            db.add(
+                Message(
+                    id=f"{session_id}-m{j}",
+                    session_id=session_id,
+                    role=MessageRole.ASSISTANT,
+                    content=content,
+                )
+            )
+    await db.commit()
+
+
+class TestFullTextSearch:
+    """全文検索のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_ranked_hits_with_snippets(self, db):
+        """タイトル一致を先に、本文一致はスニペット付きで返す"""
+        await _seed(db)
+
+        hits = await FullTextSearch(db).search("東京の")
+
+        assert [(h.session_id, h.message_id) for h in hits] == [
+            ("s-1", None),
+            ("s-1", "s-1-m0"),
+        ]
+        assert hits[0].snippet == "<mark>東京の</mark>天気"
+        assert "<mark>東京の</mark>" in hits[1].snippet
+
+    @pytest.mark.asyncio
+    async def test_index_follows_inserts_updates_and_deletes(self, db):
+        """トリガーで更新・削除がインデックスに反映される"""
+        await _seed(db)
+        search = FullTextSearch(db)
+
+        await db.execute(
+            update(Message).where(Message.id == "s-2-m0").values(content="ラーメンの作り方")
+        )
+        await db.commit()
+        assert await search.search("カレーの") == []
+        assert [h.message_id for h in await search.search("ラーメン")] == ["s-2-m0"]
+
+        await SessionService(db).delete_session("s-2")
+        assert await search.search("ラーメン") == []
+
+    @pytest.mark.asyncio
+    async def test_short_query_falls_back_to_like(self, db):
+        """trigram 未満の短い検索語も一致し、LIKE の特殊文字はエスケープされる"""
+        await _seed(db)
+        search = FullTextSearch(db)
+
+        assert {h.session_id for h in await search.search("晴れ")} == {"s-1"}
+        assert [h.message_id for h in await search.search("%")] == ["s-3-m0"]
+
+    @pytest.mark.asyncio
+    async def test_session_filters_use_search_index(self, db):
+        """セッション一覧・検索がインデックス経由で絞り込まれる"""
+        await _seed(db)
+        service = SessionService(db)
+
+        titles_only = await service.get_sessions_filtered(search_query="東京の")
+        with_messages = await service.get_sessions_filtered(
+            search_query="東京風", include_messages=True
+        )
+        sessions = await service.search_sessions("東京")
+
+        assert [s.id for s in titles_only["sessions"]] == ["s-1"]
+        assert [s.id for s in with_messages["sessions"]] == ["s-2"]
+        assert [s.id for s in sessions] == ["s-2", "s-1"]
+
+
+def test_postgresql_search_uses_trigram_friendly_sql():
+    """PostgreSQL では ILIKE と word_similarity で検索する"""
+
+    class FakeBind:
+        dialect = postgresql.dialect()
+
+    class FakeSession:
+        def get_bind(self):
+            return FakeBind()
+
+    search = FullTextSearch(FakeSession())  # type: ignore[arg-type]
+    stmt = select(Session.id).where(search.session_condition("東京"))
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "ILIKE" in sql
+    assert "messages_fts" not in sql
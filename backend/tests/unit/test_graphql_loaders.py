@@ -0,0 +1,188 @@
+"""
+GraphQL コンテキスト（DB セッション共有・DataLoader）のユニットテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+import strawberry
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from api.context import DatabaseSessionExtension, GraphQLContext
+from api.resolvers.mutation import Mutation
+from api.resolvers.query import Query
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+
+schema = strawberry.Schema(query=Query, extensions=[DatabaseSessionExtension])
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    """5セッション×3メッセージ"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'loaders.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with factory() as db:
+        for i in range(5):
+            db.add(Session(id=f"s-{i}", title=f"chat {i}", created_at=base))
+            for j in range(3):
+                db.add(
+                    Message(
+                        id=f"m-{i}-{j}",
+                        session_id=f"s-{i}",
+                        role=MessageRole.USER,
+                        content=f"本文 {i}-{j}",
+                        created_at=base + timedelta(minutes=j),
+                    )
+                )
+        await db.commit()
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def statements(engine):
+    """実行された SQL を記録"""
+    executed = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def _context(engine) -> GraphQLContext:
+    factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    return GraphQLContext(session_factory=factory)
+
+
+class TestSessionLoaders:
+    """SessionType のネストしたフィールドのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_nested_fields_are_batched(self, engine, statements):
+        """セッション数に関係なく、ネストしたフィールドごとに1クエリ"""
+        result = await schema.execute(
+            """
+            query {
+              sessions(includeMessages: true) {
+                id
+                messageCount
+                lastMessage { id content }
+                messages { id }
+              }
+            }
+            """,
+            context_value=_context(engine),
+        )
+
+        assert result.errors is None
+        sessions = {s["id"]: s for s in result.data["sessions"]}
+        assert len(sessions) == 5
+        assert sessions["s-0"]["messageCount"] == 3
+        assert sessions["s-0"]["lastMessage"] == {"id": "m-0-2", "content": "本文 0-2"}
+        assert [m["id"] for m in sessions["s-0"]["messages"]] == [
+            "m-0-0",
+            "m-0-1",
+            "m-0-2",
+        ]
+        # 一覧 + 抜粋 + 最新メッセージ（件数は sessions の集計列）
+        assert len(statements) == 3
+
+    @pytest.mark.asyncio
+    async def test_unselected_fields_are_not_loaded(self, engine, statements):
+        """messages を選択しなければメッセージは読み込まない"""
+        result = await schema.execute(
+            "query { sessions(includeMessages: true) { id title } }",
+            context_value=_context(engine),
+        )
+
+        assert result.errors is None
+        assert len(result.data["sessions"]) == 5
+        assert len(statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_session_detail_loads_selected_columns(self, engine, statements):
+        """詳細の messages は全件を返し、選択されていない本文は読み込まない"""
+        result = await schema.execute(
+            'query { session(id: "s-1") { messageCount messages { id role } } }',
+            context_value=_context(engine),
+        )
+
+        assert result.errors is None
+        assert [m["id"] for m in result.data["session"]["messages"]] == [
+            "m-1-0",
+            "m-1-1",
+            "m-1-2",
+        ]
+        assert result.data["session"]["messageCount"] == 3
+        message_query = next(s for s in statements if "FROM messages" in s)
+        assert "messages.content" not in message_query
+
+    @pytest.mark.asyncio
+    async def test_context_sessions_are_closed(self, engine):
+        """同じ操作内のリゾルバーは1つの DB セッションを共有し、終了時に閉じる"""
+        context = _context(engine)
+        opened = []
+        original = context._session_factory
+
+        def factory():
+            session = original()
+            opened.append(session)
+            return session
+
+        context._session_factory = factory
+
+        result = await schema.execute(
+            'query { sessions { id } session(id: "s-0") { messageCount } }',
+            context_value=context,
+        )
+
+        assert result.errors is None
+        assert len(opened) == 1
+        assert context._sessions == {}
+
+    @pytest.mark.asyncio
+    async def test_mutations_use_context_session(self, engine):
+        """ミューテーションも操作で共有する primary セッションを使い、終了時に閉じる"""
+        context = _context(engine)
+        opened = []
+        original = context._session_factory
+
+        def factory():
+            session = original()
+            opened.append(session)
+            return session
+
+        context._session_factory = factory
+        mutation_schema = strawberry.Schema(
+            query=Query, mutation=Mutation, extensions=[DatabaseSessionExtension]
+        )
+
+        result = await mutation_schema.execute(
+            """
+            mutation {
+              updateSessionTitle(id: "s-0", input: {title: "renamed"}) { title }
+              deleteSession(id: "s-1")
+            }
+            """,
+            context_value=context,
+        )
+
+        assert result.errors is None
+        assert result.data == {
+            "updateSessionTitle": {"title": "renamed"},
+            "deleteSession": True,
+        }
+        assert len(opened) == 1
+        assert context._sessions == {}
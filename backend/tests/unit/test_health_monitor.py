@@ -0,0 +1,141 @@
+"""
+LLMプロバイダー バックグラウンドヘルスモニターのユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from providers import health_monitor as health_monitor_module
+from providers.factory import LLMProviderFactory
+from providers.health_monitor import ProviderHealthMonitor
+from providers.mock import MockLLMProvider
+
+
+class ProbeProvider(MockLLMProvider):
+    """ヘルスチェック結果・遅延を指定できるプロバイダー"""
+
+    def __init__(self, name: str, healthy=True, delay: float = 0.0):
+        super().__init__()
+        self.name = name
+        self.healthy = healthy
+        self.delay = delay
+        self.probes = 0
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+    async def health_check(self) -> bool:
+        self.probes += 1
+        await asyncio.sleep(self.delay)
+        if isinstance(self.healthy, Exception):
+            raise self.healthy
+        return self.healthy
+
+
+def _monitor(*providers, timeout: float = 1.0) -> ProviderHealthMonitor:
+    monitor = ProviderHealthMonitor(interval=60.0, timeout=timeout)
+    monitor._providers = {provider.provider_name: provider for provider in providers}
+    return monitor
+
+
+class TestProviderHealthMonitor:
+    """ヘルスモニターのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_probe_results_are_cached_with_timestamp(self):
+        """プローブ結果はタイムスタンプ付きでキャッシュされる"""
+        monitor = _monitor(ProbeProvider("up"), ProbeProvider("down", healthy=False))
+
+        await monitor.probe_all()
+
+        assert monitor.is_healthy("up") is True
+        assert monitor.is_healthy("down") is False
+        snapshot = monitor.get_snapshot()
+        assert snapshot["up"]["checked_at"] is not None
+        assert snapshot["down"]["consecutive_failures"] == 1
+
+    @pytest.mark.asyncio
+    async def test_probes_run_concurrently_with_timeout(self):
+        """プローブは並列実行され、タイムアウトは異常として記録される"""
+        monitor = _monitor(
+            ProbeProvider("slow-a", delay=0.2),
+            ProbeProvider("slow-b", delay=0.2),
+            timeout=0.05,
+        )
+
+        started = asyncio.get_running_loop().time()
+        await monitor.probe_all()
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert elapsed < 0.2
+        assert "timeout" in monitor.get_health("slow-a").error
+
+    @pytest.mark.asyncio
+    async def test_probe_errors_mark_provider_unhealthy(self):
+        """例外を送出したプロバイダーは異常として記録される"""
+        monitor = _monitor(ProbeProvider("broken", healthy=RuntimeError("boom")))
+
+        await monitor.probe_all()
+
+        assert monitor.get_health("broken").error == "boom"
+        assert monitor.is_healthy("broken") is False
+
+    def test_unknown_provider_is_assumed_healthy(self):
+        """未プローブのプロバイダーは利用可能とみなす"""
+        assert ProviderHealthMonitor().is_healthy("openrouter") is True
+
+    @pytest.mark.asyncio
+    async def test_start_and_stop(self):
+        """バックグラウンドタスクを開始・停止できる"""
+        provider = ProbeProvider("up")
+        monitor = _monitor(provider)
+
+        monitor.start()
+        await asyncio.sleep(0.01)
+        await monitor.stop()
+
+        assert provider.probes == 1
+        assert monitor._task is None
+
+
+class TestFactoryUsesCachedHealth:
+    """ファクトリがキャッシュ済みヘルス情報を参照するテスト"""
+
+    @pytest.mark.asyncio
+    async def test_healthy_provider_falls_back_to_mock(self, monkeypatch):
+        """設定済みプロバイダーが無ければ上流へ問い合わせずモックを返す"""
+        monkeypatch.setattr(
+            health_monitor_module, "_health_monitor", ProviderHealthMonitor()
+        )
+        monkeypatch.setattr(
+            LLMProviderFactory,
+            "is_provider_configured",
+            classmethod(lambda c, n: False),
+        )
+
+        provider = await LLMProviderFactory.get_healthy_provider()
+
+        assert isinstance(provider, MockLLMProvider)
+
+    def test_provider_config_does_not_instantiate(self, monkeypatch):
+        """get_provider_config はプロバイダーを生成しない"""
+
+        def fail(*args, **kwargs):
+            raise AssertionError("provider instantiated")
+
+        monkeypatch.setattr(LLMProviderFactory, "create_provider", fail)
+
+        config = LLMProviderFactory.get_provider_config()
+
+        assert config["provider_status"]["mock"] is True
+        assert "provider_health" in config
+
+    @pytest.mark.asyncio
+    async def test_health_check_accepts_bool_result(self):
+        """bool を返すプロバイダーのヘルスチェックを正しく判定する"""
+        assert await LLMProviderFactory._health_check_provider(ProbeProvider("up"))
+        assert not await LLMProviderFactory._health_check_provider(
+            ProbeProvider("down", healthy=False)
+        )
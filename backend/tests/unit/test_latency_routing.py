@@ -0,0 +1,196 @@
+"""
+レイテンシ計測・ルーティング・ヘッジ要求のユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from config import settings
+from providers.base import LLMResponse
+from providers.circuit_breaker import (
+    CircuitState,
+    get_circuit_breaker,
+    reset_circuit_breakers,
+)
+from providers.latency import LatencyStats, get_latency_tracker, reset_latency_tracker
+from providers.mock import MockLLMProvider
+from services.llm_service import LLMService
+
+
+class DelayedProvider(MockLLMProvider):
+    """初回チャンクまでの遅延を指定できるプロバイダー"""
+
+    def __init__(self, name: str, first_token_delay: float):
+        super().__init__(response_delay=0.0)
+        self.name = name
+        self.first_token_delay = first_token_delay
+        self.started = 0
+        self.cancelled = False
+
+    @property
+    def provider_name(self) -> str:
+        return self.name
+
+    async def stream(self, prompt, **kwargs):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.first_token_delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        for text in ("a", "b"):
+            yield LLMResponse(content=text, provider=self.name, model="m")
+
+
+class CancelIgnoringProvider(DelayedProvider):
+    """キャンセルされても最初のチャンクを返してしまうプロバイダー"""
+
+    def __init__(self, name: str, first_token_delay: float):
+        super().__init__(name, first_token_delay)
+        self.closed = False
+
+    async def stream(self, prompt, **kwargs):
+        try:
+            try:
+                await asyncio.sleep(self.first_token_delay)
+            except asyncio.CancelledError:
+                self.cancelled = True
+            yield LLMResponse(content="late", provider=self.name, model="m")
+        finally:
+            self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    """テスト間でブレーカー・レイテンシ統計を共有しない"""
+    reset_circuit_breakers()
+    reset_latency_tracker()
+    yield
+    reset_circuit_breakers()
+    reset_latency_tracker()
+
+
+def _service(*providers) -> LLMService:
+    service = LLMService()
+    service.providers = list(providers)
+    service.provider = providers[0]
+    return service
+
+
+def _seed_ttft(provider, seconds: float, samples: int = 10) -> None:
+    stats = get_latency_tracker().get(provider.provider_name, provider.default_model)
+    for _ in range(samples):
+        stats.record_ttft(seconds)
+
+
+class TestLatencyStats:
+    """レイテンシ統計のテスト"""
+
+    def test_ewma_and_p95(self):
+        """EWMA と p95 が直近サンプルから算出される"""
+        stats = LatencyStats(alpha=0.5)
+        for value in (1.0, 3.0):
+            stats.record_ttft(value)
+
+        assert stats.ewma_ttft == pytest.approx(2.0)
+        assert stats.p95_ttft(min_samples=3) is None
+        assert stats.p95_ttft(min_samples=2) == 3.0
+
+
+class TestLatencyRouting:
+    """レイテンシルーティングのテスト"""
+
+    def test_preferred_providers_sorted_by_ttft(self, monkeypatch):
+        """ルーティング対象は EWMA TTFT の速い順に並ぶ"""
+        monkeypatch.setattr(settings, "llm_routing_preference", "slow,fast")
+        slow = DelayedProvider("slow", 0.0)
+        fast = DelayedProvider("fast", 0.0)
+        other = DelayedProvider("other", 0.0)
+        _seed_ttft(slow, 2.0)
+        _seed_ttft(fast, 0.5)
+
+        service = _service(other, slow, fast)
+
+        assert [p.provider_name for p in service._route_providers()] == [
+            "fast",
+            "slow",
+            "other",
+        ]
+
+    def test_priority_order_kept_without_preference(self, monkeypatch):
+        """ルーティング対象が未設定なら優先順位のまま"""
+        monkeypatch.setattr(settings, "llm_routing_preference", "")
+        first = DelayedProvider("first", 0.0)
+        second = DelayedProvider("second", 0.0)
+        _seed_ttft(first, 5.0)
+
+        service = _service(first, second)
+
+        assert service._route_providers() == [first, second]
+
+    @pytest.mark.asyncio
+    async def test_stream_records_ttft(self):
+        """ストリーミングで TTFT とスループットが記録される"""
+        provider = DelayedProvider("p", 0.01)
+        service = _service(provider)
+
+        chunks = [chunk.content async for chunk in service.stream_response("質問")]
+
+        stats = get_latency_tracker().get("p", provider.default_model)
+        assert chunks == ["a", "b"]
+        assert stats.streams == 1
+        assert stats.ewma_ttft >= 0.01
+
+
+class TestHedging:
+    """ヘッジ要求のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_and_cancelled(self, monkeypatch):
+        """p95 TTFT を過ぎたら次のプロバイダーへ送り、敗者はキャンセルする"""
+        monkeypatch.setattr(settings, "llm_hedging_enabled", True)
+        monkeypatch.setattr(settings, "llm_hedge_min_delay", 0.01)
+        primary = DelayedProvider("primary", 1.0)
+        hedge = DelayedProvider("hedge", 0.0)
+        _seed_ttft(primary, 0.02)
+        service = _service(primary, hedge)
+
+        chunks = [chunk async for chunk in service.stream_response("質問")]
+
+        assert {chunk.provider for chunk in chunks} == {"hedge"}
+        assert primary.cancelled is True
+        assert get_circuit_breaker("primary").total_failures == 0
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self, monkeypatch):
+        """p95 TTFT 以内に初回トークンが来ればヘッジしない"""
+        monkeypatch.setattr(settings, "llm_hedging_enabled", True)
+        monkeypatch.setattr(settings, "llm_hedge_min_delay", 0.5)
+        primary = DelayedProvider("primary", 0.0)
+        hedge = DelayedProvider("hedge", 0.0)
+        _seed_ttft(primary, 0.5)
+        service = _service(primary, hedge)
+
+        chunks = [chunk async for chunk in service.stream_response("質問")]
+
+        assert {chunk.provider for chunk in chunks} == {"primary"}
+        assert hedge.started == 0
+
+    @pytest.mark.asyncio
+    async def test_loser_opened_despite_cancel_is_closed(self, monkeypatch):
+        """キャンセルが間に合わず開始済みになった敗者も閉じて試行枠を解放する"""
+        monkeypatch.setattr(settings, "llm_hedging_enabled", True)
+        monkeypatch.setattr(settings, "llm_hedge_min_delay", 0.01)
+        primary = CancelIgnoringProvider("primary", 1.0)
+        hedge = DelayedProvider("hedge", 0.0)
+        _seed_ttft(primary, 0.02)
+        service = _service(primary, hedge)
+        breaker = get_circuit_breaker("primary")
+        breaker.state = CircuitState.HALF_OPEN
+
+        chunks = [chunk async for chunk in service.stream_response("質問")]
+
+        assert {chunk.provider for chunk in chunks} == {"hedge"}
+        assert primary.closed is True
+        assert breaker._probe_in_flight is False
@@ -0,0 +1,103 @@
+"""
+LLMService バッチ生成のユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from providers.base import LLMError, LLMResponse
+from providers.circuit_breaker import reset_circuit_breakers
+from providers.mock import MockLLMProvider
+from services.llm_batch import BatchResult, IBatchBackend
+from services.llm_service import LLMService
+
+
+class CountingProvider(MockLLMProvider):
+    """同時実行数を記録し、指定したプロンプトで失敗するプロバイダー"""
+
+    def __init__(self, fail_on: str = ""):
+        super().__init__(response_delay=0.0)
+        self.fail_on = fail_on
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate(self, prompt, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # 後の項目ほど早く終わるようにして順序保持を確認する
+            await asyncio.sleep(0.02 / (int(prompt.split("-")[1]) + 1))
+            if self.fail_on and prompt == self.fail_on:
+                raise LLMError("upstream failure")
+            return LLMResponse(content=f"answer-{prompt}", provider="mock", model="m")
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    """失敗した項目でブレーカーの状態を持ち越さない"""
+    reset_circuit_breakers()
+    yield
+    reset_circuit_breakers()
+
+
+def _service(provider) -> LLMService:
+    service = LLMService()
+    service.providers = [provider]
+    service.provider = provider
+    return service
+
+
+class TestGenerateBatch:
+    """generate_batch のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_preserves_order_with_bounded_concurrency(self):
+        """結果は入力順で、同時実行数は上限以内"""
+        provider = CountingProvider()
+        prompts = [f"p-{i}" for i in range(10)]
+
+        results = await _service(provider).generate_batch(prompts, concurrency=3)
+
+        assert [r.index for r in results] == list(range(10))
+        assert [r.response.content for r in results] == [f"answer-{p}" for p in prompts]
+        assert provider.max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_item_failure_returns_partial_results(self):
+        """1項目の失敗は他の項目の結果に影響しない"""
+        provider = CountingProvider(fail_on="p-1")
+
+        results = await _service(provider).generate_batch(
+            ["p-0", "p-1", "p-2"], concurrency=2
+        )
+
+        assert [r.ok for r in results] == [True, False, True]
+        assert "upstream failure" in results[1].error
+
+    @pytest.mark.asyncio
+    async def test_custom_backend_is_used(self):
+        """上流バッチ API 用のバックエンドを差し替えられる"""
+
+        class RecordingBackend(IBatchBackend):
+            def __init__(self):
+                self.calls = []
+
+            async def run(
+                self, prompts, system_message=None, max_tokens=1000, temperature=0.7
+            ):
+                self.calls.append(list(prompts))
+                return [
+                    BatchResult(index=i, prompt=p, error="queued")
+                    for i, p in enumerate(prompts)
+                ]
+
+        service = _service(CountingProvider())
+        service.batch_backend = RecordingBackend()
+
+        results = await service.generate_batch(["p-0", "p-1"])
+
+        assert service.batch_backend.calls == [["p-0", "p-1"]]
+        assert [r.error for r in results] == ["queued", "queued"]
@@ -0,0 +1,104 @@
+"""
+メッセージ JSON 列（citations・meta_data）のユニットテスト
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from api.types.message import parse_citations, parse_metadata
+from models import Base
+from models.json_fields import json_text
+from models.message import Message, MessageRole
+from models.session import Session
+from services.session_service import SessionService
+
+
+@pytest_asyncio.fixture
+async def db():
+    """インメモリ SQLite の非同期セッション"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        session.add(Session(id="s-1", title="chat"))
+        for i, kind in enumerate(["research_question", "research_report", "chat"]):
+            session.add(
+                Message(
+                    id=f"m-{i}",
+                    session_id="s-1",
+                    role=MessageRole.ASSISTANT,
+                    content=f"content {i}",
+                    citations=[{"title": f"doc {i}", "score": 0.5}],
+                    meta_data={
+                        "research_id": "r-1" if kind != "chat" else None,
+                        "type": kind,
+                    },
+                )
+            )
+        await session.commit()
+        yield session
+    await engine.dispose()
+
+
+class TestJsonColumns:
+    """JSON 列の保存・読み出しのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_round_trips_structured_values(self, db):
+        """リスト・辞書のまま保存され、そのまま読み出せる"""
+        message = await db.get(Message, "m-0")
+        await db.refresh(message)
+
+        assert message.citations == [{"title": "doc 0", "score": 0.5}]
+        assert message.meta_data["type"] == "research_question"
+
+    def test_legacy_string_values_are_parsed(self):
+        """移行前の JSON 文字列も従来どおり解釈する"""
+        legacy = parse_citations('[{"title": "doc"}]')
+        current = parse_citations([{"title": "doc"}])
+
+        assert [c.title for c in legacy] == [c.title for c in current] == ["doc"]
+        assert parse_citations("not json") == []
+        assert parse_metadata('{"type": "chat"}') == {"type": "chat"}
+        assert parse_metadata({"type": "chat"}) == {"type": "chat"}
+
+
+class TestMetadataLookup:
+    """メタデータキーでの検索のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_finds_messages_by_research_id(self, db):
+        """research_id と type で絞り込める"""
+        service = SessionService(db)
+
+        messages = await service.get_messages_by_research_id("r-1")
+        reports = await service.get_messages_by_research_id(
+            "r-1", message_type="research_report"
+        )
+
+        assert [m.id for m in messages] == ["m-0", "m-1"]
+        assert [m.id for m in reports] == ["m-1"]
+
+    @pytest.mark.asyncio
+    async def test_lookup_uses_expression_index(self, db):
+        """検索条件が式インデックスと同じ式になり、インデックスが使われる"""
+        condition = json_text(Message.meta_data, "research_id") == "r-1"
+        compiled = condition.compile(
+            dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+
+        plan = await db.execute(
+            text(f"EXPLAIN QUERY PLAN SELECT id FROM messages WHERE {compiled}")
+        )
+
+        assert "ix_messages_meta_research_id" in " ".join(str(row[-1]) for row in plan)
+
+    def test_rejects_unsafe_keys(self):
+        """キーは識別子のみ許可する"""
+        with pytest.raises(ValueError):
+            json_text(Message.meta_data, "type') OR 1=1 --")
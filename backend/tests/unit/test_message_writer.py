@@ -0,0 +1,158 @@
+"""
+メッセージのライトビハインド書き込みのユニットテスト
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+from models.usage import UsageRecord
+from services.message_writer import MessageWriter
+
+OLD = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'writer.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def session_factory(engine):
+    """更新日時の古いセッションを2件作成したセッションファクトリー"""
+    factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with factory() as db:
+        for session_id in ("s-1", "s-2"):
+            db.add(Session(id=session_id, title=session_id, updated_at=OLD))
+        await db.commit()
+    return factory
+
+
+@pytest.fixture
+def commits(engine):
+    """コミット回数を記録"""
+    calls = []
+    event.listen(engine.sync_engine, "commit", lambda conn: calls.append(1))
+    return calls
+
+
+def _message(session_id: str, content: str) -> Message:
+    return Message(session_id=session_id, role=MessageRole.USER, content=content)
+
+
+async def _count(factory, model) -> int:
+    async with factory() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+class TestMessageWriter:
+    """MessageWriter のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_writes_share_one_commit(self, session_factory, commits):
+        """同時の書き込みは1トランザクションにまとまり、セッションの更新日時も更新される"""
+        writer = MessageWriter(session_factory, flush_interval=0.05)
+
+        await asyncio.gather(
+            *(
+                writer.write(
+                    _message(f"s-{i % 2 + 1}", f"q{i}"), session_id=f"s-{i % 2 + 1}"
+                )
+                for i in range(6)
+            )
+        )
+
+        assert len(commits) == 1
+        assert await _count(session_factory, Message) == 6
+        async with session_factory() as db:
+            sessions = (await db.execute(select(Session))).scalars().all()
+        for session in sessions:
+            updated_at = session.updated_at.replace(tzinfo=timezone.utc)
+            assert updated_at > OLD + timedelta(days=1)
+        assert writer.get_stats()["avg_writes_per_batch"] == 6
+
+    @pytest.mark.asyncio
+    async def test_max_batch_flushes_without_waiting(self, session_factory, commits):
+        """件数上限に達したらフラッシュ間隔を待たずにコミットする"""
+        writer = MessageWriter(session_factory, flush_interval=10.0, max_batch=2)
+
+        await asyncio.wait_for(
+            asyncio.gather(*(writer.write(_message("s-1", f"q{i}")) for i in range(4))),
+            timeout=2.0,
+        )
+
+        assert len(commits) == 2
+
+    @pytest.mark.asyncio
+    async def test_message_and_usage_saved_together(self, session_factory):
+        """ID と作成日時はキュー投入時に確定し、関連レコードと一緒に保存される"""
+        writer = MessageWriter(session_factory, flush_interval=0.0)
+        first = _message("s-1", "question")
+        second = _message("s-1", "answer")
+        usage = UsageRecord(session_id="s-1", provider="mock", model="m")
+
+        await writer.write(first, session_id="s-1")
+        await writer.write(second, usage, session_id="s-1")
+
+        assert first.id and second.id
+        assert first.created_at <= second.created_at
+        assert await _count(session_factory, UsageRecord) == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_write_does_not_fail_batch(self, session_factory):
+        """1件の失敗は該当する呼び出し元にだけ送出される"""
+        writer = MessageWriter(session_factory, flush_interval=0.05)
+        duplicate = _message("s-1", "dup")
+        duplicate.id = "m-dup"
+        await writer.write(duplicate)
+
+        conflicting = _message("s-1", "conflict")
+        conflicting.id = "m-dup"
+        results = await asyncio.gather(
+            writer.write(_message("s-1", "ok-1")),
+            writer.write(conflicting),
+            writer.write(_message("s-2", "ok-2")),
+            return_exceptions=True,
+        )
+
+        assert results[0] is None and results[2] is None
+        assert isinstance(results[1], Exception)
+        assert await _count(session_factory, Message) == 3
+        assert writer.get_stats()["failed_writes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_non_durable_writes_flushed_on_close(self, session_factory):
+        """durable=False はすぐに戻り、close() で残りをコミットする"""
+        writer = MessageWriter(session_factory, flush_interval=10.0, durable=False)
+
+        await asyncio.wait_for(writer.write(_message("s-1", "q")), timeout=1.0)
+        assert writer.get_stats()["pending"] == 1
+
+        await writer.close()
+
+        assert writer.get_stats()["pending"] == 0
+        assert await _count(session_factory, Message) == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled_writer_commits_each_write(self, session_factory, commits):
+        """無効時はまとめずに書き込みごとにコミットする"""
+        writer = MessageWriter(session_factory, enabled=False)
+
+        await asyncio.gather(
+            *(writer.write(_message("s-1", f"q{i}")) for i in range(3))
+        )
+
+        assert len(commits) == 3
@@ -0,0 +1,204 @@
+"""
+プロンプトビルダー・プロンプトキャッシュ支援のユニットテスト
+"""
+
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from config import settings  # type: ignore[attr-defined]
+from providers import prompt_cache, transport
+from providers.google_ai import GoogleAIProvider
+from providers.openrouter import OpenRouterProvider
+from providers.prompt_cache import (
+    PromptParts,
+    build_message_content,
+    extract_cache_usage,
+    get_prompt_cache_stats,
+)
+from providers.retry import RetryPolicy
+from services.prompt_builder import (
+    RAG_CONTEXT_INSTRUCTION,
+    build_rag_system_prompt,
+    build_report_prompt,
+)
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_state(monkeypatch):
+    """キャッシュ統計と共有クライアントを初期化する"""
+    monkeypatch.setattr(
+        prompt_cache,
+        "_stats",
+        {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0},
+    )
+    yield
+    await transport.close_http_clients()
+
+
+class TestPromptBuilder:
+    """安定プレフィックス・可変サフィックスの分割"""
+
+    def test_prompt_parts_behaves_as_str(self):
+        """分割済みプロンプトは連結済み文字列として扱える"""
+        parts = PromptParts("指示\n", "検索結果")
+
+        assert parts == "指示\n検索結果"
+        assert parts.prefix == "指示\n"
+        assert parts.suffix == "検索結果"
+        assert len(parts) == len("指示\n検索結果")
+
+    def test_rag_prefix_is_stable_across_contexts(self):
+        """検索結果が異なってもプレフィックスは同一で、検索結果はサフィックスに入る"""
+        first = build_rag_system_prompt("[1] A\n本文A\n\n")
+        second = build_rag_system_prompt("[1] B\n本文B\n\n")
+
+        assert first.prefix == second.prefix
+        assert "本文A" in first.suffix
+        assert "本文A" not in first.prefix
+        assert build_rag_system_prompt("").suffix == ""
+
+    def test_rag_prompt_keeps_closing_instruction(self):
+        """締めの指示は検索結果の後ろに置かれる"""
+        prompt = build_rag_system_prompt("[1] A\n本文A")
+
+        assert prompt.suffix == ("[1] A\n本文A\n\n質問に対して、上記の検索結果を参考にして回答してください。")
+        assert str(prompt).startswith(RAG_CONTEXT_INSTRUCTION)
+
+    def test_report_prompt_puts_question_after_instructions(self):
+        """質問・参考資料は指示文の後ろに配置される"""
+        prompt = build_report_prompt("量子計算とは", "資料本文")
+
+        assert "量子計算とは" not in prompt.prefix
+        assert "資料本文" in prompt.suffix
+        assert prompt.prefix == build_report_prompt("別の質問", "別の資料").prefix
+
+
+class TestCacheControl:
+    """キャッシュ制御ヒントとヒット率の記録"""
+
+    def test_message_content_marks_prefix(self):
+        """対応モデルではプレフィックスだけに cache_control を付与する"""
+        content = build_message_content(PromptParts("指示", "質問"), True)
+
+        assert content == [
+            {"type": "text", "text": "指示", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "質問"},
+        ]
+        assert build_message_content(PromptParts("指示", "質問"), False) == "指示質問"
+        assert build_message_content("通常の文字列", True) == "通常の文字列"
+
+    def test_extract_cache_usage_formats(self):
+        """OpenAI互換・Google形式の使用量からヒット率を算出する"""
+        openai_usage = {
+            "prompt_tokens": 1000,
+            "prompt_tokens_details": {"cached_tokens": 800},
+        }
+        google_usage = {"promptTokenCount": 500, "cachedContentTokenCount": 0}
+
+        assert extract_cache_usage(openai_usage)["hit_rate"] == 0.8
+        assert extract_cache_usage(google_usage)["hit_rate"] == 0.0
+        assert extract_cache_usage({"prompt_tokens": 10}) is None
+
+        stats = get_prompt_cache_stats()
+        assert stats["requests"] == 2
+        assert stats["cached_tokens"] == 800
+        assert stats["hit_rate"] == round(800 / 1500, 4)
+
+    def test_extract_cache_usage_counts_misses(self):
+        """cached_tokens: 0（キャッシュミス）も集計に含める"""
+        miss = extract_cache_usage(
+            {"prompt_tokens": 1000, "prompt_tokens_details": {"cached_tokens": 0}}
+        )
+        hit = extract_cache_usage(
+            {"prompt_tokens": 1000, "prompt_tokens_details": {"cached_tokens": 500}}
+        )
+
+        assert miss == {"prompt_tokens": 1000, "cached_tokens": 0, "hit_rate": 0.0}
+        assert hit["hit_rate"] == 0.5
+        stats = get_prompt_cache_stats()
+        assert stats["requests"] == 2
+        assert stats["hit_rate"] == 0.25
+
+    @pytest.mark.asyncio
+    async def test_openrouter_sends_cache_hints_and_records_hits(self, monkeypatch):
+        """Anthropic モデルでは system プレフィックスにヒントを付与し、ヒット率を返す"""
+        monkeypatch.setattr(settings, "llm_prompt_cache_enabled", True)
+        captured = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            captured["payload"] = json.loads(request.content)
+            return httpx.Response(
+                200,
+                json={
+                    "id": "gen-1",
+                    "choices": [{"message": {"content": "回答"}}],
+                    "usage": {
+                        "prompt_tokens": 2000,
+                        "prompt_tokens_details": {"cached_tokens": 1500},
+                    },
+                },
+            )
+
+        provider = OpenRouterProvider(api_key="key", base_url="https://or.test/api")
+        provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider.retry_policy = RetryPolicy(max_retries=0)
+
+        response = await provider.generate(
+            "質問",
+            system_message=build_rag_system_prompt("[1] A\n本文\n\n"),
+            model="anthropic/claude-3-haiku",
+        )
+
+        system, user = captured["payload"]["messages"]
+        assert system["role"] == "system"
+        assert system["content"][0]["cache_control"] == {"type": "ephemeral"}
+        assert "本文" in system["content"][1]["text"]
+        assert user == {"role": "user", "content": "質問"}
+        assert response.metadata["prompt_cache"]["hit_rate"] == 0.75
+
+    @pytest.mark.asyncio
+    async def test_openrouter_generate_matches_interface_positions(self):
+        """2番目の位置引数は ILLMProvider と同じく model として扱う"""
+        captured = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            captured["payload"] = json.loads(request.content)
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": "回答"}}]}
+            )
+
+        provider = OpenRouterProvider(api_key="key", base_url="https://or.test/api")
+        provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider.retry_policy = RetryPolicy(max_retries=0)
+
+        await provider.generate("質問", "openai/gpt-4o-mini")
+
+        assert captured["payload"]["model"] == "openai/gpt-4o-mini"
+        assert captured["payload"]["messages"] == [{"role": "user", "content": "質問"}]
+
+    @pytest.mark.asyncio
+    async def test_zero_temperature_is_sent_as_is(self):
+        """temperature=0.0 は既定値 0.7 に置き換えずにそのまま送る"""
+        captured = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            captured["payload"] = json.loads(request.content)
+            return httpx.Response(
+                200, json={"choices": [{"message": {"content": "回答"}}]}
+            )
+
+        provider = OpenRouterProvider(api_key="key", base_url="https://or.test/api")
+        provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider.retry_policy = RetryPolicy(max_retries=0)
+
+        await provider.generate("質問", temperature=0.0)
+        assert captured["payload"]["temperature"] == 0.0
+
+        await provider.generate("質問")
+        assert captured["payload"]["temperature"] == 0.7
+
+        payload = GoogleAIProvider._build_payload("質問", None, None, 0.0)
+        assert payload["generationConfig"]["temperature"] == 0.0
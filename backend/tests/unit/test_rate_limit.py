@@ -0,0 +1,118 @@
+"""
+LLMクライアント側レートリミッターのユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from config import settings  # type: ignore[attr-defined]
+from providers.rate_limit import (
+    LLMRateLimitError,
+    RateLimiter,
+    TokenBucket,
+    estimate_request_tokens,
+)
+
+
+class TestTokenBucket:
+    """トークンバケットのテスト"""
+
+    def test_full_bucket_admits_immediately(self):
+        """満タンのバケットは待ち時間なしで消費できる"""
+        bucket = TokenBucket(60, capacity=2)
+
+        assert bucket.time_until_available(1, bucket.updated_at) == 0.0
+
+    def test_empty_bucket_waits_for_refill(self):
+        """空のバケットは補充レートに応じて待つ"""
+        bucket = TokenBucket(60, capacity=1)
+        now = bucket.updated_at
+        bucket.consume(1)
+
+        # 60/分 = 1/秒
+        assert bucket.time_until_available(1, now) == pytest.approx(1.0)
+        assert bucket.time_until_available(1, now + 1.0) == 0.0
+
+
+class TestRateLimiter:
+    """レートリミッターのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_burst_is_admitted_without_waiting(self):
+        """バースト枠内のリクエストは即座に受け付けられる"""
+        limiter = RateLimiter(requests_per_minute=60, burst=3)
+
+        for _ in range(3):
+            await limiter.acquire("openrouter", "model-a")
+
+        metrics = limiter.get_metrics()["openrouter/model-a"]
+        assert metrics["admitted"] == 3
+        assert metrics["rejected"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_wait_exceeds_limit(self):
+        """待機上限を超える見込みのリクエストは拒否される"""
+        limiter = RateLimiter(requests_per_minute=1, burst=1, max_wait=0.1)
+
+        await limiter.acquire("openrouter", "model-a")
+        with pytest.raises(LLMRateLimitError):
+            await limiter.acquire("openrouter", "model-a")
+
+        assert limiter.get_metrics()["openrouter/model-a"]["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_models_are_limited_independently(self):
+        """プロバイダー×モデルごとに別のバケットを持つ"""
+        limiter = RateLimiter(requests_per_minute=1, burst=1, max_wait=0.1)
+
+        await limiter.acquire("openrouter", "model-a")
+        await limiter.acquire("openrouter", "model-b")
+        await limiter.acquire("google_ai", "model-a")
+
+        assert len(limiter.get_metrics()) == 3
+
+    @pytest.mark.asyncio
+    async def test_token_budget_is_enforced(self):
+        """トークン数制限を超えるリクエストは待機・拒否される"""
+        limiter = RateLimiter(
+            requests_per_minute=600, tokens_per_minute=1000, max_wait=0.1
+        )
+
+        await limiter.acquire("openrouter", "model-a", tokens=900)
+        with pytest.raises(LLMRateLimitError):
+            await limiter.acquire("openrouter", "model-a", tokens=900)
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_admitted_in_arrival_order(self):
+        """待機中のリクエストは到着順に受け付けられる"""
+        limiter = RateLimiter(requests_per_minute=1200, burst=1, max_wait=5.0)
+        order: list[int] = []
+
+        async def request(index: int) -> None:
+            await limiter.acquire("openrouter", "model-a")
+            order.append(index)
+
+        await asyncio.gather(*(request(i) for i in range(4)))
+
+        assert order == [0, 1, 2, 3]
+        assert limiter.get_metrics()["openrouter/model-a"]["max_queue_depth"] == 4
+
+    @pytest.mark.asyncio
+    async def test_disabled_limiter_does_not_track(self):
+        """制限値が0なら何もしない"""
+        limiter = RateLimiter(requests_per_minute=0)
+
+        await limiter.acquire("openrouter", "model-a")
+
+        assert limiter.get_metrics() == {}
+
+    def test_estimate_includes_output_tokens(self, monkeypatch):
+        """トークン見積もりにはトークナイザーの入力数と最大出力トークンが含まれる"""
+        monkeypatch.setattr(settings, "llm_tokenizer", "heuristic")
+        assert estimate_request_tokens("あ" * 100, 500) == 600
+
+    def test_estimate_includes_system_message(self, monkeypatch):
+        """RAG のコンテキストを含むシステムメッセージも見積もりに含める"""
+        monkeypatch.setattr(settings, "llm_tokenizer", "heuristic")
+        assert estimate_request_tokens("あ" * 100, 500, "い" * 300) == 900
@@ -0,0 +1,121 @@
+"""
+記録・再生プロバイダーのユニットテスト
+"""
+
+import time
+
+import pytest
+
+from config import settings
+from providers.base import LLMError
+from providers.factory import LLMProviderFactory
+from providers.mock import MockLLMProvider
+from providers.replay import (
+    RecordingLLMProvider,
+    ReplayLLMProvider,
+    StreamRecording,
+    append_recording,
+    load_recordings,
+    recording_key,
+)
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+class TestRecordAndReplay:
+    """記録と再生のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_recorded_stream_replays_same_chunks(self, tmp_path):
+        """記録したストリームを同じ入力で再生すると同じチャンクが返る"""
+        path = str(tmp_path / "cassette.jsonl")
+        recorder = RecordingLLMProvider(MockLLMProvider(response_delay=0.0), path)
+
+        recorded = await _collect(recorder.stream("こんにちは", system_message="sys"))
+        replayed = await _collect(
+            ReplayLLMProvider(path, time_scale=0).stream("こんにちは", system_message="sys")
+        )
+
+        contents = [c.content for c in recorded if c.content]
+        assert [c.content for c in replayed if c.content] == contents
+        recording = load_recordings(path)[0]
+        assert recording.key == recording_key("こんにちは", "sys")
+        assert replayed[-1].usage == recording.usage
+        assert replayed[-1].metadata["final"] is True
+
+    @pytest.mark.asyncio
+    async def test_replay_follows_recorded_timing(self, tmp_path):
+        """TTFT・チャンク間隔を time_scale 倍で再現する"""
+        path = str(tmp_path / "cassette.jsonl")
+        append_recording(
+            path,
+            StreamRecording(
+                key="k",
+                provider="p",
+                model="m",
+                ttft_ms=100,
+                gaps_ms=[100],
+                chunks=["a", "b"],
+            ),
+        )
+
+        started_at = time.monotonic()
+        await _collect(ReplayLLMProvider(path, time_scale=0.5).stream("x"))
+        assert time.monotonic() - started_at >= 0.09
+
+        started_at = time.monotonic()
+        await _collect(ReplayLLMProvider(path, time_scale=0).stream("x"))
+        assert time.monotonic() - started_at < 0.05
+
+    def test_unknown_input_selects_deterministically(self, tmp_path):
+        """一致する記録がない入力でも常に同じ記録が選ばれる"""
+        path = str(tmp_path / "cassette.jsonl")
+        for i in range(5):
+            append_recording(
+                path,
+                StreamRecording(key=f"k{i}", provider="p", model="m", ttft_ms=0),
+            )
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("{broken\n")
+
+        provider = ReplayLLMProvider(path)
+        assert len(provider.recordings) == 5
+        assert provider.select("未知の質問") is provider.select("未知の質問")
+
+    def test_empty_cassette_raises(self, tmp_path):
+        """記録がないカセットはエラー"""
+        path = tmp_path / "empty.jsonl"
+        path.write_text("")
+        with pytest.raises(LLMError):
+            ReplayLLMProvider(str(path))
+
+
+class TestFactory:
+    """ファクトリー連携のテスト"""
+
+    def test_replay_provider_from_settings(self, tmp_path, monkeypatch):
+        """LLM_REPLAY_PATH 設定時に replay プロバイダーを作成できる"""
+        path = str(tmp_path / "cassette.jsonl")
+        append_recording(
+            path, StreamRecording(key="k", provider="p", model="m", ttft_ms=0)
+        )
+        monkeypatch.setattr(settings, "llm_replay_path", path)
+        monkeypatch.setattr(settings, "llm_replay_time_scale", 0.0)
+
+        provider = LLMProviderFactory.create_provider("replay")
+
+        assert isinstance(provider, ReplayLLMProvider)
+        assert provider.time_scale == 0.0
+
+    def test_recording_wrapper_when_record_path_set(self, tmp_path, monkeypatch):
+        """LLM_RECORD_PATH 設定時は記録ラッパーで包む"""
+        monkeypatch.setattr(
+            settings, "llm_record_path", str(tmp_path / "recorded.jsonl")
+        )
+
+        wrapped = LLMProviderFactory._with_recording(MockLLMProvider())
+
+        assert isinstance(wrapped, RecordingLLMProvider)
+        assert wrapped.provider_name == "mock"
@@ -0,0 +1,112 @@
+"""
+Deep Research 予算スケジューラのユニットテスト
+"""
+
+from services.deep_research.budget import ResearchBudget, ResearchBudgetScheduler
+from services.deep_research.state import (
+    SearchResult,
+    add_search_results,
+    create_initial_state,
+    has_diminishing_returns,
+    should_continue_search,
+)
+
+
+class TestResearchBudgetScheduler:
+    """ResearchBudgetSchedulerのテスト"""
+
+    def test_allocate_full_budget_within_capacity(self):
+        """容量内では既定の予算がそのまま割り当てられる"""
+        scheduler = ResearchBudgetScheduler(capacity=2, max_searches=3)
+
+        budget = scheduler.allocate()
+
+        assert budget.max_searches == 3
+        assert budget.max_report_tokens == 3000
+        assert scheduler.active_runs == 1
+
+    def test_allocate_shrinks_budget_under_load(self):
+        """容量を超えると待たせずに予算を縮小する"""
+        scheduler = ResearchBudgetScheduler(
+            capacity=1, max_searches=4, max_report_tokens=3000, min_report_tokens=500
+        )
+
+        scheduler.allocate()
+        budget = scheduler.allocate()
+
+        assert budget.max_searches == 2
+        assert budget.max_report_tokens == 1500
+        assert budget.load_factor == 2.0
+
+    def test_report_tokens_never_below_minimum(self):
+        """高負荷でもレポートトークンは最小値を下回らない"""
+        scheduler = ResearchBudgetScheduler(
+            capacity=1, max_report_tokens=3000, min_report_tokens=1000
+        )
+
+        budgets = [scheduler.allocate() for _ in range(10)]
+
+        assert budgets[-1].max_searches == 1
+        assert budgets[-1].max_report_tokens == 1000
+
+    def test_release_frees_capacity(self):
+        """予算を返却すると同時実行数が減る"""
+        scheduler = ResearchBudgetScheduler(capacity=1)
+        budget = scheduler.allocate()
+
+        scheduler.release(budget.run_id, [3])
+
+        assert scheduler.active_runs == 0
+        assert scheduler.allocate().max_searches == 3
+
+    def test_low_marginal_gain_caps_searches(self):
+        """後半の検索で利得が出ない場合は検索回数を減らす"""
+        scheduler = ResearchBudgetScheduler(
+            capacity=10, max_searches=3, min_gain_samples=2, explore_interval=100
+        )
+        for _ in range(3):
+            budget = scheduler.allocate()
+            scheduler.release(budget.run_id, [4, 0, 0])
+
+        assert scheduler.allocate().max_searches == 1
+
+
+class TestBudgetedState:
+    """予算を反映したエージェント状態のテスト"""
+
+    def test_create_initial_state_uses_budget(self):
+        """初期状態に割り当て予算が反映される"""
+        budget = ResearchBudget(max_searches=2, max_report_tokens=1200)
+
+        state = create_initial_state("質問", "session-1", budget)
+
+        assert state["max_searches"] == 2
+        assert state["max_report_tokens"] == 1200
+        assert state["run_id"] == budget.run_id
+
+    def test_stop_searching_when_no_new_relevant_docs(self):
+        """新規の高関連度ドキュメントが増えなければ検索を打ち切る"""
+        state = create_initial_state("質問", "session-1")
+        docs = [SearchResult(content="x", source="a.md", score=0.9)]
+
+        state = add_search_results(state, docs)
+        assert state["gain_history"] == [1]
+        assert should_continue_search(state) is True
+
+        state = add_search_results(state, docs)
+        assert state["gain_history"] == [1, 0]
+        assert should_continue_search(state) is False
+
+    def test_retry_when_first_search_finds_nothing(self):
+        """初回の検索で高関連度ドキュメントがなくても、再検索してから打ち切る"""
+        state = create_initial_state("質問", "session-1")
+        low = [SearchResult(content="x", source="a.md", score=0.1)]
+
+        state = add_search_results(state, low)
+        assert state["gain_history"] == [0]
+        assert has_diminishing_returns(state) is False
+        assert should_continue_search(state) is True
+
+        state = add_search_results(state, [])
+        assert has_diminishing_returns(state) is True
+        assert should_continue_search(state) is False
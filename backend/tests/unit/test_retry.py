@@ -0,0 +1,152 @@
+"""
+LLMプロバイダー リトライポリシーのユニットテスト
+"""
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from providers import transport
+from providers.base import LLMError
+from providers.openrouter import OpenRouterProvider
+from providers.retry import RetryPolicy, parse_retry_after
+
+SSE_BODY = (
+    b'data: {"choices":[{"delta":{"content":"Hello"}}]}\n\n'
+    b'data: {"choices":[{"delta":{"content":" world"}}]}\n\n'
+    b"data: [DONE]\n\n"
+)
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_clients():
+    """テストで登録された共有クライアントを破棄する"""
+    yield
+    await transport.close_http_clients()
+
+
+class BrokenStream(httpx.AsyncByteStream):
+    """1チャンク送信後に接続が切れるストリーム"""
+
+    async def __aiter__(self):
+        yield b'data: {"choices":[{"delta":{"content":"Hello"}}]}\n\n'
+        raise httpx.ReadError("connection reset")
+
+
+def _provider(responses: list) -> tuple[OpenRouterProvider, list]:
+    """順番に応答を返すモックトランスポート付きプロバイダー"""
+    calls: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        response = responses[min(len(calls), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    provider = OpenRouterProvider(api_key="key", base_url="https://openrouter.test")
+    provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider.retry_policy = RetryPolicy(max_retries=2, base_delay=0.0)
+    return provider, calls
+
+
+def _completion(content: str = "ok") -> httpx.Response:
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+class TestRetryPolicy:
+    """リトライポリシー単体のテスト"""
+
+    def test_retry_after_seconds_and_date(self):
+        """Retry-After は秒数・HTTP日付の両方を解釈する"""
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("invalid") is None
+
+    def test_retry_after_takes_precedence(self):
+        """Retry-After ヘッダーがあればバックオフより優先する"""
+        policy = RetryPolicy(base_delay=10.0)
+        response = httpx.Response(
+            429, headers={"Retry-After": "2"}, request=httpx.Request("GET", "http://x")
+        )
+        error = httpx.HTTPStatusError("", request=response.request, response=response)
+
+        assert policy.compute_delay(3, error) == 2.0
+
+    def test_backoff_is_capped(self):
+        """ジッター付きバックオフは最大待機時間を超えない"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=2.0)
+        error = httpx.ConnectError("refused")
+
+        assert all(0 <= policy.compute_delay(10, error) <= 2.0 for _ in range(20))
+
+
+class TestProviderRetry:
+    """プロバイダー経由のリトライ動作のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self):
+        """503・接続エラーは再試行され、成功すれば結果を返す"""
+        provider, calls = _provider(
+            [httpx.Response(503), httpx.ConnectError("refused"), _completion()]
+        )
+
+        response = await provider.generate("質問")
+
+        assert response.content == "ok"
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        """4xx（429以外）は再試行しない"""
+        provider, calls = _provider([httpx.Response(400), _completion()])
+
+        with pytest.raises(LLMError):
+            await provider.generate("質問")
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        """最大リトライ回数を超えたらエラーを返す"""
+        provider, calls = _provider([httpx.Response(502)])
+
+        with pytest.raises(LLMError):
+            await provider.generate("質問")
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_retry_budget_limits_total_wait(self):
+        """Retry-After が総待機上限を超える場合は待たずに失敗する"""
+        provider, calls = _provider(
+            [httpx.Response(429, headers={"Retry-After": "60"}), _completion()]
+        )
+        provider.retry_policy.total_budget = 1.0
+
+        with pytest.raises(LLMError):
+            await provider.generate("質問")
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_retries_before_first_token(self):
+        """ストリーミングは応答開始前の429を再試行する"""
+        provider, calls = _provider(
+            [httpx.Response(429), httpx.Response(200, content=SSE_BODY)]
+        )
+
+        chunks = [chunk async for chunk in provider.stream_generate("質問")]
+
+        assert chunks == ["Hello", " world"]
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_is_not_retried_after_tokens(self):
+        """トークン送信後の切断は再試行しない"""
+        provider, calls = _provider([httpx.Response(200, stream=BrokenStream())])
+
+        chunks = []
+        with pytest.raises(LLMError):
+            async for chunk in provider.stream_generate("質問"):
+                chunks.append(chunk)
+
+        assert chunks == ["Hello"]
+        assert len(calls) == 1
@@ -184,9 +184,11 @@ class TestRAGService:
         assert "metadata" in result
 
         # DBメソッドが適切に呼ばれたか
-        assert mock_db.add.call_count == 2  # user_message + assistant_message
+        # user_message + usage_record + assistant_message
+        assert mock_db.add.call_count == 3
         assert mock_db.commit.call_count == 2
-        assert mock_db.refresh.call_count == 2
+        # 保存後の再読み込みは行わない
+        mock_db.refresh.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_ask_question_no_session_id(self, rag_service):
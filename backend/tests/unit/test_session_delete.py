@@ -0,0 +1,102 @@
+"""
+セッション一括削除のユニットテスト
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+from models.usage import UsageRecord
+from services.session_service import SessionService, invalidate_session_count_cache
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+    invalidate_session_count_cache()
+
+
+@pytest_asyncio.fixture
+async def db(engine):
+    """インメモリ SQLite の非同期セッション（5セッション×3メッセージ）"""
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        for i in range(5):
+            session.add(Session(id=f"s-{i}", title=f"chat {i}"))
+            for j in range(3):
+                session.add(
+                    Message(
+                        session_id=f"s-{i}", role=MessageRole.USER, content=f"{i}-{j}"
+                    )
+                )
+        session.add(
+            UsageRecord(session_id="s-0", provider="mock", model="m", total_tokens=1)
+        )
+        await session.commit()
+        yield session
+
+
+async def _count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+class TestBulkDelete:
+    """一括削除のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_deletes_in_batches_with_set_based_statements(self, db, engine):
+        """バッチごとの DELETE ... IN で削除し、件数を返す"""
+        statements = []
+        event.listen(
+            engine.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, stmt, *args: statements.append(stmt),
+        )
+
+        counts = await SessionService(db).delete_sessions_bulk(
+            ["s-0", "s-1", "s-2", "s-0", "missing"], batch_size=2
+        )
+
+        assert counts == {"sessions": 3, "messages": 9}
+        deletes = [s for s in statements if s.startswith("DELETE FROM sessions")]
+        assert len(deletes) == 2
+        assert not any(s.startswith("SELECT sessions") for s in statements)
+        assert await _count(db, Session) == 2
+        assert await _count(db, Message) == 6
+        usage = (await db.execute(select(UsageRecord))).scalar_one()
+        assert usage.session_id is None
+
+    @pytest.mark.asyncio
+    async def test_delete_multiple_and_single_return_counts(self, db):
+        """既存 API は削除件数・成否を返す"""
+        service = SessionService(db)
+
+        assert await service.delete_multiple_sessions(["s-0", "s-1"]) == 2
+        assert await service.delete_multiple_sessions([]) == 0
+        assert await service.delete_session("s-2") is True
+        assert await service.delete_session("s-2") is False
+
+    @pytest.mark.asyncio
+    async def test_delete_all_sessions(self, db):
+        """全件削除はバッチを繰り返して空にする"""
+        counts = await SessionService(db).delete_all_sessions(batch_size=2)
+
+        assert counts == {"sessions": 5, "messages": 15}
+        assert await _count(db, Session) == 0
+        assert await _count(db, Message) == 0
+
+
+def test_message_foreign_key_cascades():
+    """messages.session_id は ON DELETE CASCADE"""
+    (fk,) = Base.metadata.tables["messages"].c.session_id.foreign_keys
+    assert fk.ondelete == "CASCADE"
@@ -0,0 +1,300 @@
+"""
+セッション一覧・メッセージのページング取得のユニットテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+import strawberry
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from api.context import GraphQLContext
+from api.resolvers import query as query_module
+from config import settings  # type: ignore[attr-defined]
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+from services.session_service import SessionService, invalidate_session_count_cache
+
+
+@pytest_asyncio.fixture
+async def db():
+    """インメモリ SQLite の非同期セッション"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+    invalidate_session_count_cache()
+
+
+async def _seed(db, count: int) -> None:
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        # 2件ずつ同じ作成日時にして ID による順序付けを確認する
+        created_at = base + timedelta(minutes=i // 2)
+        db.add(
+            Session(
+                id=f"s-{i:02d}",
+                title=f"chat {i}",
+                created_at=created_at,
+                updated_at=created_at,
+            )
+        )
+    await db.commit()
+
+
+async def _walk(service, **kwargs):
+    ids, cursor = [], None
+    while True:
+        page = await service.get_sessions_filtered(limit=3, after=cursor, **kwargs)
+        ids.extend(s.id for s in page["sessions"])
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            return ids
+        cursor = page["next_cursor"]
+
+
+class TestKeysetPagination:
+    """キーセットページングのテスト"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "sort_field",
+        ["created_at", "updated_at", "last_message_at", "message_count", "title"],
+    )
+    @pytest.mark.parametrize("sort_order", ["desc", "asc"])
+    async def test_pages_cover_all_sessions_in_order(self, db, sort_field, sort_order):
+        """カーソルで辿ると全件を重複・欠落なく同じ順序で取得できる"""
+        await _seed(db, 8)
+        service = SessionService(db)
+
+        full = await service.get_sessions_filtered(
+            sort_field=sort_field, sort_order=sort_order
+        )
+        paged = await _walk(service, sort_field=sort_field, sort_order=sort_order)
+
+        assert paged == [s.id for s in full["sessions"]]
+        assert len(set(paged)) == 8
+
+    @pytest.mark.asyncio
+    async def test_filters_apply_to_every_page(self, db):
+        """フィルター条件はカーソル指定時も適用される"""
+        await _seed(db, 8)
+        service = SessionService(db)
+
+        ids = await _walk(
+            service, created_after=datetime(2026, 1, 1, 0, 2, tzinfo=timezone.utc)
+        )
+
+        assert ids == ["s-07", "s-06", "s-05", "s-04"]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor_raises(self, db):
+        """壊れたカーソルは ValueError"""
+        with pytest.raises(ValueError):
+            await SessionService(db).get_sessions_filtered(
+                limit=3, after="not-a-cursor"
+            )
+
+
+class TestTotalCount:
+    """総件数のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_total_count_is_optional(self, db):
+        """include_total_count=False では件数を数えない"""
+        await _seed(db, 4)
+
+        page = await SessionService(db).get_sessions_filtered(
+            limit=2, include_total_count=False
+        )
+
+        assert page["total_count"] is None
+        assert page["has_more"] is True
+
+    @pytest.mark.asyncio
+    async def test_total_count_is_cached_until_invalidated(self, db, monkeypatch):
+        """件数は TTL 内はキャッシュされ、作成・削除で破棄される"""
+        monkeypatch.setattr(settings, "session_count_cache_ttl_seconds", 60)
+        await _seed(db, 4)
+        service = SessionService(db)
+
+        assert (await service.get_sessions_filtered(limit=2))["total_count"] == 4
+        db.add(Session(id="direct", title="direct"))
+        await db.commit()
+        assert (await service.get_sessions_filtered(limit=2))["total_count"] == 4
+
+        await service.create_session("via service")
+        assert (await service.get_sessions_filtered(limit=2))["total_count"] == 6
+
+
+class TestLatestMessages:
+    """セッションごとの最新メッセージ取得のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_returns_latest_n_per_session_in_order(self, db):
+        """各セッションの最新 N 件だけを古い順で返す"""
+        await _seed(db, 3)
+        base = datetime(2026, 2, 1, tzinfo=timezone.utc)
+        for session_index, count in ((0, 5), (1, 2)):
+            for i in range(count):
+                db.add(
+                    Message(
+                        id=f"m-{session_index}-{i}",
+                        session_id=f"s-{session_index:02d}",
+                        role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+                        content=f"本文{i}" * 100,
+                        created_at=base + timedelta(minutes=i),
+                    )
+                )
+        await db.commit()
+
+        previews = await SessionService(db).get_latest_messages(
+            ["s-00", "s-01", "s-02"], per_session=3, max_chars=10
+        )
+
+        assert [m.id for m in previews["s-00"]] == ["m-0-2", "m-0-3", "m-0-4"]
+        assert [m.id for m in previews["s-01"]] == ["m-1-0", "m-1-1"]
+        assert previews["s-02"] == []
+        assert previews["s-00"][0].content == ("本文2" * 4)[:10]
+        assert previews["s-00"][1].role == MessageRole.ASSISTANT
+
+    @pytest.mark.asyncio
+    async def test_empty_input_skips_query(self, db):
+        """セッションがなければクエリを実行しない"""
+        assert await SessionService(db).get_latest_messages([]) == {}
+
+
+async def _seed_messages(db, count: int) -> None:
+    await _seed(db, 1)
+    base = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        db.add(
+            Message(
+                id=f"m-{i:02d}",
+                session_id="s-00",
+                role=MessageRole.ASSISTANT,
+                content=f"レポート{i}",
+                citations=[{"title": "doc"}],
+                created_at=base + timedelta(minutes=i // 2),
+            )
+        )
+    await db.commit()
+
+
+class TestSessionMessages:
+    """セッションのメッセージページングのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_pages_newest_first(self, db):
+        """新しい順にカーソルで全件を辿れる"""
+        await _seed_messages(db, 7)
+        service = SessionService(db)
+
+        ids, cursor = [], None
+        while True:
+            page = await service.get_session_messages("s-00", limit=3, after=cursor)
+            ids.extend(m.id for m in page["messages"])
+            if not page["has_more"]:
+                break
+            cursor = page["next_cursor"]
+
+        assert ids == [f"m-{i:02d}" for i in reversed(range(7))]
+
+    @pytest.mark.asyncio
+    async def test_large_columns_are_not_loaded_when_not_requested(self, db):
+        """本文・JSON 列は指定しなければ読み込まない"""
+        await _seed_messages(db, 2)
+        db.expunge_all()
+
+        page = await SessionService(db).get_session_messages(
+            "s-00", load_content=False, load_json=False
+        )
+
+        unloaded = inspect(page["messages"][0]).unloaded
+        assert {"content", "citations", "meta_data"} <= unloaded
+
+    @pytest.mark.asyncio
+    async def test_graphql_selection_controls_loaded_fields(self, db):
+        """GraphQL で選択したフィールドだけを返す"""
+        await _seed_messages(db, 5)
+        db.expunge_all()
+
+        schema = strawberry.Schema(query=query_module.Query)
+
+        result = await schema.execute(
+            """
+            query {
+              sessionMessages(sessionId: "s-00", limit: 2) {
+                hasMore
+                nextCursor
+                messages { id ...Body }
+              }
+            }
+            fragment Body on MessageType { content }
+            """,
+            context_value=GraphQLContext(session_factory=lambda: db),
+        )
+
+        assert result.errors is None
+        page = result.data["sessionMessages"]
+        assert page["hasMore"] is True
+        assert page["messages"] == [
+            {"id": "m-04", "content": "レポート4"},
+            {"id": "m-03", "content": "レポート3"},
+        ]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("limit", "expected"),
+        [
+            (-5, ["m-04"]),
+            (0, ["m-04"]),
+            (1000, ["m-04", "m-03", "m-02"]),
+        ],
+    )
+    async def test_graphql_limit_is_clamped(self, db, monkeypatch, limit, expected):
+        """limit は 1〜SESSION_MESSAGE_PAGE_SIZE に丸める"""
+        monkeypatch.setattr(settings, "session_message_page_size", 3)
+        await _seed_messages(db, 5)
+        db.expunge_all()
+
+        schema = strawberry.Schema(query=query_module.Query)
+
+        result = await schema.execute(
+            f"""
+            query {{
+              sessionMessages(sessionId: "s-00", limit: {limit}) {{
+                hasMore
+                messages {{ id }}
+              }}
+            }}
+            """,
+            context_value=GraphQLContext(session_factory=lambda: db),
+        )
+
+        assert result.errors is None
+        page = result.data["sessionMessages"]
+        assert page["hasMore"] is True
+        assert [m["id"] for m in page["messages"]] == expected
+
+
+def test_listing_indexes_are_declared():
+    """一覧・メッセージ取得用の複合インデックスがある"""
+    session_indexes = {i.name for i in Base.metadata.tables["sessions"].indexes}
+    message_indexes = {i.name for i in Base.metadata.tables["messages"].indexes}
+
+    assert {
+        "ix_sessions_updated_at_id",
+        "ix_sessions_created_at_id",
+        "ix_sessions_last_message_at_id",
+        "ix_sessions_message_count_id",
+    } <= session_indexes
+    assert "ix_messages_session_id_created_at" in message_indexes
@@ -0,0 +1,132 @@
+"""
+セッションのメッセージ集計列（message_count・last_message_at）のユニットテスト
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from models import Base
+from models.message import Message, MessageRole
+from models.session import Session
+from models.session_stats import STATS_BACKFILL
+from services.message_writer import MessageWriter
+from services.session_service import SessionService, invalidate_session_count_cache
+
+BASE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest_asyncio.fixture
+async def factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+    invalidate_session_count_cache()
+
+
+def _message(session_id: str, index: int) -> Message:
+    return Message(
+        id=f"{session_id}-m{index}",
+        session_id=session_id,
+        role=MessageRole.USER,
+        content=f"q{index}",
+        created_at=BASE + timedelta(minutes=index),
+    )
+
+
+async def _stats(factory, session_id: str):
+    async with factory() as db:
+        result = await db.execute(
+            select(Session.message_count, Session.last_message_at).where(
+                Session.id == session_id
+            )
+        )
+        count, last_at = result.one()
+    return count, last_at.replace(tzinfo=timezone.utc)
+
+
+class TestSessionStats:
+    """トリガーによる集計列の保守のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_new_session_uses_created_at(self, factory):
+        async with factory() as db:
+            session = Session(id="s-1", title="new", created_at=BASE)
+            db.add(session)
+            await db.commit()
+
+        assert session.message_count == 0
+        assert await _stats(factory, "s-1") == (0, BASE)
+
+    @pytest.mark.asyncio
+    async def test_batched_inserts_update_counts(self, factory):
+        """ライトビハインドの一括 INSERT でも件数と最終日時が更新される"""
+        async with factory() as db:
+            db.add_all([Session(id=sid, created_at=BASE) for sid in ("s-1", "s-2")])
+            await db.commit()
+
+        writer = MessageWriter(session_factory=factory, flush_interval=0.01)
+        await writer.write(_message("s-1", 1), _message("s-1", 3), session_id="s-1")
+        await writer.write(_message("s-2", 2), session_id="s-2")
+        await writer.close()
+
+        assert await _stats(factory, "s-1") == (2, BASE + timedelta(minutes=3))
+        assert await _stats(factory, "s-2") == (1, BASE + timedelta(minutes=2))
+
+    @pytest.mark.asyncio
+    async def test_deletes_recompute_last_message_at(self, factory):
+        """削除すると件数を減らし、最終日時を残りのメッセージから求め直す"""
+        async with factory() as db:
+            db.add(Session(id="s-1", created_at=BASE))
+            await db.flush()
+            db.add_all([_message("s-1", i) for i in (1, 2, 3)])
+            await db.commit()
+
+            await db.execute(delete(Message).where(Message.id == "s-1-m3"))
+            await db.commit()
+            assert await _stats(factory, "s-1") == (2, BASE + timedelta(minutes=2))
+
+            await db.execute(delete(Message).where(Message.session_id == "s-1"))
+            await db.commit()
+            assert await _stats(factory, "s-1") == (0, BASE)
+
+    @pytest.mark.asyncio
+    async def test_backfill_recomputes_from_messages(self, factory):
+        async with factory() as db:
+            db.add(Session(id="s-1", created_at=BASE))
+            await db.flush()
+            db.add_all([_message("s-1", i) for i in (1, 2)])
+            await db.commit()
+            await db.execute(
+                update(Session).values(message_count=0, last_message_at=BASE)
+            )
+            await db.execute(text(STATS_BACKFILL))
+            await db.commit()
+
+        assert await _stats(factory, "s-1") == (2, BASE + timedelta(minutes=2))
+
+    @pytest.mark.asyncio
+    async def test_has_messages_filter_and_sort(self, factory):
+        """has_messages は件数列で絞り込み、最終メッセージ日時で並び替えられる"""
+        async with factory() as db:
+            db.add_all([Session(id=f"s-{i}", created_at=BASE) for i in range(1, 4)])
+            await db.flush()
+            db.add_all([_message("s-1", 1), _message("s-3", 5), _message("s-3", 6)])
+            await db.commit()
+
+            service = SessionService(db)
+            with_messages = await service.get_sessions_filtered(
+                has_messages=True, sort_field="last_message_at"
+            )
+            without_messages = await service.get_sessions_filtered(has_messages=False)
+            by_count = await service.get_sessions_filtered(sort_field="message_count")
+
+        assert [s.id for s in with_messages["sessions"]] == ["s-3", "s-1"]
+        assert with_messages["total_count"] == 2
+        assert [s.id for s in without_messages["sessions"]] == ["s-2"]
+        assert [s.id for s in by_count["sessions"]] == ["s-3", "s-1", "s-2"]
@@ -0,0 +1,149 @@
+"""
+プロバイダー共通 SSE デコーダーのユニットテスト
+"""
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from providers import transport
+from providers.google_ai import GoogleAIProvider
+from providers.retry import RetryPolicy
+from providers.sse import DeltaBatcher, SSEDecoder, batch_deltas, iter_sse_json
+from utils import fast_json
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    """任意の位置で分割されたバイト列を返すストリーム"""
+
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_clients():
+    """テストで登録された共有クライアントを破棄する"""
+    yield
+    await transport.close_http_clients()
+
+
+async def _agen(items):
+    for item in items:
+        yield item
+
+
+class TestSSEDecoder:
+    """SSE フレーミングのテスト"""
+
+    def test_events_split_across_chunks(self):
+        """チャンク境界をまたぐイベント・マルチバイト文字を正しく復元する"""
+        body = 'data: {"text":"こんにちは"}\n\ndata: {"text":"!"}\n\n'.encode()
+        decoder = SSEDecoder()
+
+        events = []
+        for i in range(0, len(body), 7):
+            events.extend(decoder.feed(body[i : i + 7]))
+
+        assert [fast_json.loads(e)["text"] for e in events] == ["こんにちは", "!"]
+
+    def test_crlf_comments_and_multiline_data(self):
+        """CRLF 改行・コメント行・複数行 data を扱える"""
+        decoder = SSEDecoder()
+
+        events = decoder.feed(b": keep-alive\r\ndata: a\r\ndata: b\r\n\r\n")
+
+        assert events == [b"a\nb"]
+
+    def test_flush_returns_unterminated_event(self):
+        """終端の空行が無いイベントも flush で返す"""
+        decoder = SSEDecoder()
+
+        assert decoder.feed(b"data: last") == []
+        assert decoder.flush() == [b"last"]
+
+    @pytest.mark.asyncio
+    async def test_iter_sse_json_stops_at_done(self):
+        """[DONE] 以降は読まず、不正な JSON は読み飛ばす"""
+        response = httpx.Response(
+            200,
+            stream=ChunkedStream(
+                [b'data: {"n":1}\n\ndata: {broken\n\n', b"data: [DONE]\n\ndata: {}\n\n"]
+            ),
+        )
+
+        payloads = [payload async for payload in iter_sse_json(response)]
+
+        assert payloads == [{"n": 1}]
+
+
+class TestDeltaBatcher:
+    """差分バッチングのテスト"""
+
+    def test_first_delta_is_emitted_immediately(self):
+        """最初の差分は即座に返す"""
+        batcher = DeltaBatcher(max_chars=10, max_delay=10.0)
+
+        assert batcher.add("a") == "a"
+        assert batcher.add("b") is None
+
+    def test_size_bound(self):
+        """保留が max_chars に達したらまとめて返す"""
+        batcher = DeltaBatcher(max_chars=4, max_delay=10.0)
+        batcher.add("x")
+
+        frames = [batcher.add(text) for text in ("ab", "cd", "e")]
+
+        assert frames == [None, "abcd", None]
+        assert batcher.flush() == "e"
+
+    def test_time_bound(self):
+        """保留開始から max_delay 経過後の差分でまとめて返す"""
+        batcher = DeltaBatcher(max_chars=100, max_delay=0.0)
+        batcher.add("x")
+
+        assert batcher.add("ab") == "ab"
+
+    @pytest.mark.asyncio
+    async def test_batch_deltas_preserves_content(self):
+        """バッチングしても連結結果は変わらない"""
+        deltas = [f"{i}," for i in range(100)]
+
+        frames = [
+            frame
+            async for frame in batch_deltas(
+                _agen(deltas), DeltaBatcher(max_chars=16, max_delay=10.0)
+            )
+        ]
+
+        assert "".join(frames) == "".join(deltas)
+        assert len(frames) < len(deltas)
+
+
+class TestGoogleStreaming:
+    """Google AI の SSE ストリーミングのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_stream_uses_sse_endpoint(self):
+        """alt=sse で受信し、parts のテキストを順に返す"""
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            body = (
+                b'data: {"candidates":[{"content":{"parts":[{"text":"Hello"}]}}]}\r\n\r\n'
+                b'data: {"candidates":[{"content":{"parts":[{"text":" world"}]}}]}\r\n\r\n'
+            )
+            return httpx.Response(200, stream=ChunkedStream([body[:30], body[30:]]))
+
+        provider = GoogleAIProvider(api_key="key")
+        provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider.retry_policy = RetryPolicy(max_retries=0)
+
+        chunks = [chunk async for chunk in provider.stream_generate("質問")]
+
+        assert "".join(chunks) == "Hello world"
+        assert requests[0].url.params["alt"] == "sse"
@@ -0,0 +1,105 @@
+"""
+クライアント向けストリーム整形のユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from services.stream_shaper import SlowConsumerError, StreamShaper
+
+
+def _delta(text: str) -> dict:
+    return {"chunk": text, "session_id": "s1", "is_complete": False}
+
+
+async def _source(items, delay: float = 0.0):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+
+async def _collect(shaper: StreamShaper, source) -> list:
+    return [item async for item in shaper.shape(source)]
+
+
+class TestStreamShaper:
+    """差分結合とバックプレッシャーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_deltas_are_coalesced_into_frames(self):
+        """連続した差分は結合され、内容と順序は保たれる"""
+        deltas = [_delta(f"{i},") for i in range(200)]
+        complete = {"chunk": "", "session_id": "s1", "is_complete": True}
+        shaper = StreamShaper(flush_interval=0.05, max_frame_bytes=10_000)
+
+        frames = await _collect(shaper, _source(deltas + [complete], delay=0.0001))
+
+        text = "".join(frame["chunk"] for frame in frames[:-1])
+        assert text == "".join(d["chunk"] for d in deltas)
+        assert frames[-1]["is_complete"] is True
+        assert len(frames) < len(deltas)
+
+    @pytest.mark.asyncio
+    async def test_first_frame_is_not_delayed(self):
+        """最初の差分は結合を待たずに送出される"""
+        shaper = StreamShaper(flush_interval=10.0, max_frame_bytes=10_000)
+        frames = shaper.shape(_source([_delta("a"), _delta("b")], delay=0.01))
+
+        first = await asyncio.wait_for(frames.__anext__(), timeout=1.0)
+        await frames.aclose()
+
+        assert first["chunk"] == "a"
+
+    @pytest.mark.asyncio
+    async def test_frame_size_triggers_flush(self):
+        """フレームサイズ上限に達したら間隔を待たずに送出する"""
+        shaper = StreamShaper(flush_interval=10.0, max_frame_bytes=4)
+
+        frames = await asyncio.wait_for(
+            _collect(shaper, _source([_delta("x")] + [_delta("ab")] * 4, delay=0.001)),
+            timeout=1.0,
+        )
+
+        assert "".join(frame["chunk"] for frame in frames) == "x" + "ab" * 4
+
+    @pytest.mark.asyncio
+    async def test_errors_are_forwarded_in_order(self):
+        """エラーチャンクは結合されずに順序通り送出される"""
+        error = {"error": "boom", "session_id": "s1", "is_complete": True}
+        shaper = StreamShaper(flush_interval=0.01)
+
+        frames = await _collect(shaper, _source([_delta("a"), _delta("b"), error]))
+
+        assert frames[-1] == error
+        assert "".join(f.get("chunk", "") for f in frames[:-1]) == "ab"
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_is_aborted(self):
+        """バッファ上限を超えたまま受信されなければ打ち切る"""
+        shaper = StreamShaper(
+            flush_interval=0.0, max_buffer_bytes=8, slow_consumer_timeout=0.05
+        )
+        frames = shaper.shape(_source([_delta("0123456789")] * 10))
+
+        await frames.__anext__()
+        # 受信側が停止している間に上流の読み取りが上限で止まる
+        await asyncio.sleep(0.2)
+
+        with pytest.raises(SlowConsumerError):
+            async for _ in frames:
+                pass
+
+    @pytest.mark.asyncio
+    async def test_upstream_errors_propagate(self):
+        """上流の例外は送出済みフレームの後に呼び出し側へ伝わる"""
+
+        async def failing():
+            yield _delta("a")
+            raise RuntimeError("upstream failed")
+
+        shaper = StreamShaper(flush_interval=0.0)
+
+        with pytest.raises(RuntimeError):
+            await _collect(shaper, failing())
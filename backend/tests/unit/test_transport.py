@@ -0,0 +1,69 @@
+"""
+LLMプロバイダー共通HTTPトランスポートのユニットテスト
+"""
+
+import pytest
+import pytest_asyncio
+
+from config import settings
+from providers import transport
+from providers.google_ai import GoogleAIProvider
+from providers.openrouter import OpenRouterProvider
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_clients():
+    """テストごとに共有クライアントを破棄する"""
+    await transport.close_http_clients()
+    yield
+    await transport.close_http_clients()
+
+
+class TestHTTPTransport:
+    """共有HTTPクライアントのテスト"""
+
+    def test_same_host_shares_client(self):
+        """同じ上流ホストには同じクライアントが返る"""
+        first = transport.get_http_client("https://openrouter.ai/api/v1")
+        second = transport.get_http_client("https://openrouter.ai/other")
+
+        assert first is second
+
+    def test_different_hosts_get_separate_clients(self):
+        """上流ホストが異なればクライアントも分かれる"""
+        openrouter = transport.get_http_client("https://openrouter.ai/api/v1")
+        google = transport.get_http_client("https://generativelanguage.googleapis.com")
+
+        assert openrouter is not google
+        assert len(transport.get_transport_stats()["clients"]) == 2
+
+    def test_providers_reuse_pooled_client(self):
+        """プロバイダーを何度生成しても接続プールは共有される"""
+        first = OpenRouterProvider(
+            api_key="key-1", base_url="https://openrouter.ai/api/v1"
+        )
+        second = OpenRouterProvider(
+            api_key="key-2", base_url="https://openrouter.ai/api/v1"
+        )
+
+        assert first.client is second.client
+        assert first.headers["Authorization"] != second.headers["Authorization"]
+
+    @pytest.mark.asyncio
+    async def test_close_recreates_client_on_next_use(self):
+        """クローズ後は新しいクライアントが作成される"""
+        client = GoogleAIProvider(api_key="key").client
+
+        await transport.close_http_clients()
+
+        assert client.is_closed
+        assert GoogleAIProvider(api_key="key").client is not client
+
+    def test_timeouts_follow_settings(self):
+        """タイムアウトは設定値に従い、ストリーミングは読み取りのみ別設定"""
+        timeout = transport.request_timeout()
+        streaming = transport.stream_timeout()
+
+        assert timeout.connect == settings.llm_connect_timeout
+        assert timeout.read == settings.llm_request_timeout
+        assert streaming.read == settings.llm_stream_read_timeout
@@ -0,0 +1,225 @@
+"""
+トークン数カウント・使用量計測のユニットテスト
+"""
+
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from config import settings  # type: ignore[attr-defined]
+from models import Base
+from models.session import Session
+from providers import transport
+from providers.mock import MockLLMProvider
+from providers.openrouter import OpenRouterProvider
+from providers.retry import RetryPolicy
+from providers.tokenizer import (
+    HeuristicTokenizer,
+    ITokenizer,
+    count_tokens,
+    get_tokenizer,
+    register_tokenizer,
+)
+from services.prompt_builder import RAG_CONTEXT_INSTRUCTION, RAG_CONTEXT_TRAILER
+from services.rag_service import RAGService
+from services.usage_service import (
+    TokenBudgetExceededError,
+    UsageService,
+    normalize_usage,
+)
+
+
+@pytest_asyncio.fixture
+async def db():
+    """インメモリ SQLite の非同期セッション"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    async with session_factory() as session:
+        yield session
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def reset_clients():
+    """テストで登録された共有クライアントを破棄する"""
+    yield
+    await transport.close_http_clients()
+
+
+class TestTokenizer:
+    """ローカルトークナイザーのテスト"""
+
+    def test_heuristic_counts_cjk_per_character(self):
+        """CJK は1文字1トークン、それ以外は4文字1トークンで数える"""
+        tokenizer = HeuristicTokenizer()
+
+        assert tokenizer.count("こんにちは") == 5
+        assert tokenizer.count("abcdefgh") == 2
+        assert tokenizer.count("") == 0
+
+    def test_registered_tokenizer_is_selectable(self, monkeypatch):
+        """登録したトークナイザーを LLM_TOKENIZER で選択できる"""
+
+        class FixedTokenizer(ITokenizer):
+            @property
+            def name(self) -> str:
+                return "fixed"
+
+            def count(self, text: str) -> int:
+                return 7
+
+        register_tokenizer("fixed", FixedTokenizer)
+        monkeypatch.setattr(settings, "llm_tokenizer", "fixed")
+
+        assert get_tokenizer().name == "fixed"
+        assert count_tokens("任意のテキスト") == 7
+
+    def test_normalize_google_usage(self):
+        """Google の usageMetadata を共通形式に変換する"""
+        usage = normalize_usage(
+            {
+                "promptTokenCount": 12,
+                "candidatesTokenCount": 30,
+                "totalTokenCount": 42,
+                "cachedContentTokenCount": 8,
+            }
+        )
+
+        assert usage == {
+            "prompt_tokens": 12,
+            "completion_tokens": 30,
+            "total_tokens": 42,
+            "cached_tokens": 8,
+        }
+
+
+class TestStreamingUsage:
+    """ストリーミング最終チャンクの使用量取得"""
+
+    @pytest.mark.asyncio
+    async def test_openrouter_stream_returns_final_usage(self):
+        """usage.include を要求し、最終チャンクの使用量を本文なしレスポンスで返す"""
+        payloads = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            payloads.append(json.loads(request.content))
+            body = (
+                b'data: {"choices":[{"delta":{"content":"Hello"}}]}\n\n'
+                b'data: {"choices":[{"delta":{}}],'
+                b'"usage":{"prompt_tokens":9,"completion_tokens":1,"total_tokens":10}}\n\n'
+                b"data: [DONE]\n\n"
+            )
+            return httpx.Response(200, content=body)
+
+        provider = OpenRouterProvider(api_key="key", base_url="https://or.test/api")
+        provider.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        provider.retry_policy = RetryPolicy(max_retries=0)
+
+        chunks = [chunk async for chunk in provider.stream("質問")]
+
+        assert payloads[0]["usage"] == {"include": True}
+        assert "".join(c.content for c in chunks) == "Hello"
+        assert chunks[-1].content == ""
+        assert chunks[-1].usage["total_tokens"] == 10
+
+    @pytest.mark.asyncio
+    async def test_mock_stream_reports_estimated_usage(self):
+        """モックも最終チャンクでトークナイザー推定の使用量を返す"""
+        provider = MockLLMProvider(response_delay=0)
+
+        chunks = [chunk async for chunk in provider.stream("質問", "指示")]
+
+        assert chunks[-1].usage["prompt_tokens"] == count_tokens("質問") + count_tokens(
+            "指示"
+        )
+        assert chunks[-1].usage["completion_tokens"] == count_tokens(
+            "".join(c.content for c in chunks)
+        )
+
+
+class TestUsageService:
+    """使用量の記録・集計・予算確認"""
+
+    @pytest.mark.asyncio
+    async def test_aggregates_per_session_and_model(self, db):
+        """セッション別・プロバイダー×モデル別に集計する"""
+        session = Session(title="usage")
+        db.add(session)
+        await db.commit()
+
+        service = UsageService(db)
+        service.record_usage(
+            "openrouter",
+            "model-a",
+            {"prompt_tokens": 10, "completion_tokens": 5},
+            session_id=session.id,
+        )
+        service.record_usage(
+            "openrouter",
+            "model-a",
+            {"prompt_tokens": 20, "completion_tokens": 5, "total_tokens": 25},
+            session_id=session.id,
+        )
+        service.record_usage("google_ai", "gemini-pro", {"promptTokenCount": 3})
+        await db.commit()
+
+        assert await service.get_session_usage(session.id) == {
+            "prompt_tokens": 30,
+            "completion_tokens": 10,
+            "total_tokens": 40,
+            "requests": 2,
+        }
+        summary = {
+            (row["provider"], row["model"]): row
+            for row in await service.get_usage_summary()
+        }
+        assert summary[("openrouter", "model-a")]["total_tokens"] == 40
+        assert summary[("google_ai", "gemini-pro")]["prompt_tokens"] == 3
+
+    @pytest.mark.asyncio
+    async def test_budget_rejects_requests_over_limit(self, db, monkeypatch):
+        """累計＋見積もりが予算を超える場合は送信前に拒否する"""
+        monkeypatch.setattr(settings, "llm_session_token_budget", 100)
+        session = Session(title="budget")
+        db.add(session)
+        await db.commit()
+
+        service = UsageService(db)
+        service.record_usage(
+            "mock", "mock-model-v1", {"total_tokens": 80}, session_id=session.id
+        )
+        await db.commit()
+
+        await service.check_session_budget(session.id, 20)
+        with pytest.raises(TokenBudgetExceededError):
+            await service.check_session_budget(session.id, 21)
+
+    @pytest.mark.asyncio
+    async def test_rag_estimate_includes_system_prompt_and_max_tokens(
+        self, db, monkeypatch
+    ):
+        """RAG の見積もりは質問・システムプロンプト・最大出力トークンを含む"""
+        session = Session(title="budget")
+        db.add(session)
+        await db.commit()
+
+        rag_service = RAGService(db, max_tokens=200)
+        expected = (
+            count_tokens("質問")
+            + count_tokens(RAG_CONTEXT_INSTRUCTION)
+            + count_tokens(RAG_CONTEXT_TRAILER)
+            + 200
+        )
+
+        monkeypatch.setattr(settings, "llm_session_token_budget", expected)
+        await rag_service._check_budget(session.id, "質問")
+        monkeypatch.setattr(settings, "llm_session_token_budget", expected - 1)
+        with pytest.raises(TokenBudgetExceededError):
+            await rag_service._check_budget(session.id, "質問")
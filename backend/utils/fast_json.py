@@ -0,0 +1,32 @@
+"""
+高速JSONユーティリティ
+
+orjson がインストールされていれば使用し、無ければ標準 json にフォールバックする。
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# orjson.JSONDecodeError は json.JSONDecodeError のサブクラス
+JSONDecodeError = json.JSONDecodeError
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """JSONをデコード（bytes をそのまま受け付ける）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """JSONをエンコード（非ASCII文字はエスケープしない）"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
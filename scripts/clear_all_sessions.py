@@ -4,12 +4,16 @@
 
 使用方法:
     python scripts/clear_all_sessions.py
+    python scripts/clear_all_sessions.py --list
+    python scripts/clear_all_sessions.py --batch-size 5000
 
 注意:
     - 全てのセッションとメッセージが削除されます
     - 実行前に確認プロンプトが表示されます
     - バックアップは作成されません
     - docker-compose環境のPostgreSQLに接続します
+    - セッションをバッチごとに削除し、メッセージは外部キーの ON DELETE CASCADE で
+      削除されます（マイグレーション c4d9e1f2a7b8 以降が必要）
 """
 
 import os
@@ -35,6 +39,12 @@ except ImportError:
 # グローバル変数で環境変数読み込み状態を管理
 _env_loaded = False
 
+# 1トランザクションで削除するセッション数
+DEFAULT_BATCH_SIZE = 1000
+
+# 一覧表示する最新セッション数
+LIST_LIMIT = 20
+
 def load_environment():
     """環境変数を.env.developmentから読み込み"""
     global _env_loaded
@@ -90,8 +100,8 @@ def get_database_connection():
         return None
 
 
-def clear_all_sessions():
-    """全てのセッションとメッセージを削除"""
+def clear_all_sessions(batch_size=DEFAULT_BATCH_SIZE):
+    """全てのセッションとメッセージをバッチごとに削除"""
     print("🗑️  セッション全削除スクリプト（PostgreSQL）")
     print("=" * 50)
 
@@ -126,20 +136,24 @@ def clear_all_sessions():
                 print("❌ 削除をキャンセルしました。")
                 return
 
-            # メッセージを削除（外部キー制約のため先に削除）
-            if message_count > 0:
-                print("🗑️  メッセージを削除中...")
-                cursor.execute("DELETE FROM messages")
-                print(f"✅ {message_count}件のメッセージを削除しました。")
-
-            # セッションを削除
-            if session_count > 0:
-                print("🗑️  セッションを削除中...")
-                cursor.execute("DELETE FROM sessions")
-                print(f"✅ {session_count}件のセッションを削除しました。")
+            # セッションをバッチごとに削除（メッセージはカスケード削除）
+            print(f"🗑️  {batch_size}件ずつ削除中...")
+            deleted_sessions = 0
+            while True:
+                cursor.execute(
+                    "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions LIMIT %s)",
+                    (batch_size,)
+                )
+                if cursor.rowcount == 0:
+                    break
+                deleted_sessions += cursor.rowcount
+                # バッチごとにコミットしてロックとWALを小さく保つ
+                conn.commit()
+                print(f"   {deleted_sessions}/{session_count}件のセッションを削除しました")
 
-            # コミット
-            conn.commit()
+            cursor.execute("SELECT COUNT(*) as count FROM messages")
+            remaining_messages = cursor.fetchone()['count']
+            print(f"✅ セッション {deleted_sessions}件, メッセージ {message_count - remaining_messages}件を削除しました。")
             print("✅ 全ての削除処理が完了しました。")
 
     except psycopg2.Error as e:
@@ -164,8 +178,13 @@ def show_current_sessions():
 
     try:
         with conn.cursor() as cursor:
-            # セッション一覧を取得
-            cursor.execute("SELECT id, title, created_at FROM sessions ORDER BY created_at DESC")
+            # 最新のセッションのみ取得（全件は件数のみ表示）
+            cursor.execute("SELECT COUNT(*) as count FROM sessions")
+            total = cursor.fetchone()['count']
+            cursor.execute(
+                "SELECT id, title, created_at FROM sessions ORDER BY created_at DESC LIMIT %s",
+                (LIST_LIMIT,)
+            )
             sessions = cursor.fetchall()
 
             if not sessions:
@@ -180,7 +199,9 @@ def show_current_sessions():
                 created_at = sess['created_at']
                 print(f"ID: {session_id} | タイトル: {title} | 作成日: {created_at}")
             print("-" * 80)
-            print(f"合計: {len(sessions)}件")
+            if total > len(sessions):
+                print(f"（最新{len(sessions)}件を表示）")
+            print(f"合計: {total}件")
 
     except psycopg2.Error as e:
         print(f"❌ セッション一覧の取得でエラーが発生しました: {e}")
@@ -242,12 +263,16 @@ def main():
         show_current_sessions()
         return
 
+    batch_size = DEFAULT_BATCH_SIZE
+    if "--batch-size" in sys.argv:
+        batch_size = int(sys.argv[sys.argv.index("--batch-size") + 1])
+
     # 現在のセッション一覧を表示
     show_current_sessions()
     print()
 
     # 削除処理を実行
-    clear_all_sessions()
+    clear_all_sessions(batch_size)
 
 
 if __name__ == "__main__":
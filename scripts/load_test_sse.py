@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+QRAI SSE ストリーミング負荷試験スクリプト
+=========================================
+
+記録済みの LLM ストリーム（カセット）を replay プロバイダーで再生し、
+/graphql/stream エンドポイントに同時接続して TTFB・完了時間を計測します。
+アプリはこのプロセス内で 127.0.0.1 に起動するため、外部ネットワークは不要です。
+
+カセットの作成:
+    LLM_RECORD_PATH=recordings/prod.jsonl でバックエンドを起動すると、
+    実プロバイダーの応答が TTFT・チャンク間隔込みで追記されます。
+
+使用方法:
+    python scripts/load_test_sse.py --cassette recordings/prod.jsonl
+    python scripts/load_test_sse.py --cassette recordings/prod.jsonl --concurrency 50 --requests 500
+    python scripts/load_test_sse.py --cassette recordings/prod.jsonl --time-scale 0   # 待機なし
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+
+@dataclass
+class StreamResult:
+    """1ストリーム分の計測結果"""
+
+    ttfb: Optional[float] = None
+    total: float = 0.0
+    chunks: int = 0
+    error: Optional[str] = None
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """バックエンドをインポートする前に replay 用の設定を行う"""
+    os.environ["LLM_PRIMARY_PROVIDER"] = "replay"
+    os.environ["LLM_FALLBACK_PROVIDERS"] = ""
+    os.environ["LLM_REPLAY_PATH"] = str(Path(args.cassette).resolve())
+    os.environ["LLM_REPLAY_TIME_SCALE"] = str(args.time_scale)
+    os.environ.setdefault("ENVIRONMENT", "test")
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        db_path = Path(tempfile.mkdtemp()) / "load_test.db"
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{db_path}"
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def seed_messages(count: int) -> List[Tuple[str, str]]:
+    """負荷試験用のセッションとユーザーメッセージを作成"""
+    from database import SessionLocal
+    from models.message import Message, MessageRole
+    from models.session import Session
+
+    targets: List[Tuple[str, str]] = []
+    async with SessionLocal() as db:
+        for i in range(count):
+            session = Session(title=f"負荷試験 {i}")
+            db.add(session)
+            await db.flush()
+            message = Message(
+                session_id=session.id,
+                role=MessageRole.USER,
+                content=f"負荷試験の質問 {i}",
+            )
+            db.add(message)
+            await db.flush()
+            targets.append((message.id, session.id))
+        await db.commit()
+    return targets
+
+
+async def run_stream(client: Any, message_id: str, session_id: str) -> StreamResult:
+    """1本の SSE ストリームを最後まで受信して計測"""
+    result = StreamResult()
+    started_at = time.perf_counter()
+    try:
+        async with client.stream(
+            "GET",
+            "/graphql/stream",
+            params={"id": message_id, "sessionId": session_id},
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                event = json.loads(line[6:])
+                if event["type"] == "chunk":
+                    if result.ttfb is None:
+                        result.ttfb = time.perf_counter() - started_at
+                    result.chunks += 1
+                elif event["type"] == "error":
+                    result.error = event.get("error", "unknown error")
+                elif event["type"] == "complete":
+                    result.total = time.perf_counter() - started_at
+            # EventSource と同様にサーバーが接続を閉じるまで読み切る
+    except Exception as e:
+        result.error = str(e)
+    if not result.total:
+        result.total = time.perf_counter() - started_at
+    return result
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(results: List[StreamResult], elapsed: float) -> Dict[str, Any]:
+    """計測結果を集計"""
+    ok = [r for r in results if r.error is None]
+    ttfbs = [r.ttfb for r in ok if r.ttfb is not None]
+    totals = [r.total for r in ok]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error:
+            errors[r.error] = errors.get(r.error, 0) + 1
+
+    def dist(values: List[float]) -> Dict[str, float]:
+        return {
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "mean_ms": round(statistics.fmean(values) * 1000, 1) if values else 0.0,
+        }
+
+    return {
+        "requests": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "ttfb": dist(ttfbs),
+        "total": dist(totals),
+        "mean_chunks": round(statistics.fmean(r.chunks for r in ok), 1) if ok else 0,
+        "errors": errors,
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    import httpx
+    import uvicorn
+
+    from main import app
+
+    port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        if server_task.done():
+            server_task.result()
+        await asyncio.sleep(0.05)
+
+    try:
+        targets = await seed_messages(args.requests)
+        semaphore = asyncio.Semaphore(args.concurrency)
+        limits = httpx.Limits(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        )
+
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=None, limits=limits
+        ) as client:
+
+            async def bounded(message_id: str, session_id: str) -> StreamResult:
+                async with semaphore:
+                    return await run_stream(client, message_id, session_id)
+
+            started_at = time.perf_counter()
+            results = await asyncio.gather(
+                *(bounded(message_id, session_id) for message_id, session_id in targets)
+            )
+            elapsed = time.perf_counter() - started_at
+    finally:
+        server.should_exit = True
+        await server_task
+
+    return summarize(list(results), elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="QRAI SSE ストリーミング負荷試験")
+    parser.add_argument("--cassette", required=True, help="再生するカセットファイル")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時接続数")
+    parser.add_argument("--requests", type=int, default=100, help="総リクエスト数")
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="記録時の待機時間の倍率（0で待機なし）",
+    )
+    parser.add_argument(
+        "--database-url",
+        default="",
+        help="使用するデータベース（省略時は一時SQLite）",
+    )
+    parser.add_argument("--json", action="store_true", help="結果をJSONで出力")
+    args = parser.parse_args()
+
+    if not Path(args.cassette).exists():
+        print(f"❌ カセットファイルが見つかりません: {args.cassette}")
+        sys.exit(1)
+
+    configure_environment(args)
+    report = asyncio.run(run(args))
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(
+        f"✅ {report['succeeded']}/{report['requests']} streams "
+        f"in {report['elapsed_s']}s ({report['throughput_rps']} req/s)"
+    )
+    for name in ("ttfb", "total"):
+        d = report[name]
+        print(
+            f"   {name:5} p50={d['p50_ms']}ms p95={d['p95_ms']}ms "
+            f"p99={d['p99_ms']}ms mean={d['mean_ms']}ms"
+        )
+    print(f"   mean chunks per stream: {report['mean_chunks']}")
+    if report["errors"]:
+        print("❌ errors:")
+        for error, count in report["errors"].items():
+            print(f"   {count} × {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()